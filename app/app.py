@@ -12,16 +12,22 @@ sys.path.insert(0, str(app_dir))
 
 import streamlit as st
 from modules.config_loader import ConfigLoader
-from modules.utils import build_full_context, validate_inputs
-from modules.tables import TableBuilder
-from modules.xml_word_engine_adapter import XMLWordEngineAdapter as WordEngine
-from modules.simple_vars import validate_simple_vars
-from modules.conditions import validate_conditions
+from modules.report_generator import (
+    ReportOptions,
+    generate_report,
+    report_filename,
+    validate_report_inputs
+)
+from modules.pdf_export import get_converter_registry
+from modules.pdf_jobs import get_pdf_job_queue
+from modules.report_cache import get_report_cache
+from modules.template_cache import get_block_cache
 from ui.main_ui import (
     render_main_ui,
     render_generation_section,
+    render_report_downloads,
     show_validation_errors,
-    show_success_message,
+    show_generation_metrics,
     show_processing_spinner
 )
 
@@ -33,12 +39,19 @@ def main():
     try:
         config_dir = app_dir / "config"
         loader = ConfigLoader(config_dir)
-        cfg_simple, cfg_cond, cfg_tab = loader.load_all_configs()
+        # Caché del proceso: solo se vuelven a parsear si cambian los YAML
+        cfg_simple, cfg_cond, cfg_tab = loader.load_all_configs(cached=True)
 
     except Exception as e:
         st.error(f"❌ Error al cargar las configuraciones: {e}")
         st.stop()
 
+    # Precargar los bloques condicionales (solo se leen los que no estén en caché)
+    get_block_cache().warm_from_config(cfg_cond, config_dir)
+
+    # Resolver los conversores a PDF una vez por proceso (no en cada petición)
+    get_converter_registry()
+
     # Renderizar UI principal
     simple_inputs, condition_inputs, table_inputs, table_custom_design, table_format_config = render_main_ui(
         cfg_simple, cfg_cond, cfg_tab
@@ -46,14 +59,8 @@ def main():
 
     # Sección de generación
     if render_generation_section():
-        # Validar entradas
-        errors = []
-
-        # Validar variables simples
-        errors.extend(validate_simple_vars(cfg_simple, simple_inputs))
-
-        # Validar condiciones
-        errors.extend(validate_conditions(cfg_cond, condition_inputs))
+        # Validar variables simples y condiciones
+        errors = validate_report_inputs(cfg_simple, cfg_cond, simple_inputs, condition_inputs)
 
         if errors:
             show_validation_errors(errors)
@@ -62,128 +69,58 @@ def main():
         # Generar el documento
         try:
             with show_processing_spinner("Generando informe..."):
-                # 1. Construir tablas
-                table_builder = TableBuilder(cfg_tab, simple_inputs)
-                tables_data = table_builder.build_all_tables(table_inputs)
-
-                # 2. Construir contexto completo
-                context, docs_to_insert = build_full_context(
-                    cfg_simple,
-                    cfg_cond,
-                    cfg_tab,
+                # 1-13. Tablas, contexto, motor de Word y limpieza final
+                options = ReportOptions(
+                    config_dir=config_dir,
+                    configs=(cfg_simple, cfg_cond, cfg_tab),
+                    first_page_image_path=st.session_state.get("first_page_image_path"),
+                    last_page_image_path=st.session_state.get("last_page_image_path"),
+                    result_cache=get_report_cache(),
+                )
+                result = generate_report(
                     simple_inputs,
                     condition_inputs,
-                    table_inputs
+                    table_inputs,
+                    table_format_config,
+                    options
                 )
 
-                # 3. Cargar plantilla y crear motor de Word
-                template_path = config_dir / "Plantilla.docx"
-
-                if not template_path.exists():
-                    st.error(f"❌ Plantilla no encontrada: {template_path}")
-                    st.stop()
-
-                engine = WordEngine(template_path)
-
-                # 4. Reemplazar variables simples
-                engine.replace_variables(context)
-
-                # 5. Insertar tablas
-                engine.insert_tables(tables_data, cfg_tab, table_format_config)
-
-                # 6. Insertar bloques condicionales
-                engine.insert_conditional_blocks(docs_to_insert, config_dir)
-
-                # 6.1. Eliminar secciones específicas cuando la condición es "No"
-                if condition_inputs.get("desarrollo_discrepancias_formales", "No") != "Sí":
-                    engine.remove_discrepancias_formales_section()
-
-                # 7. Procesar marcadores {salto}
-                engine.process_salto_markers()
-
-                # 8. Procesar índice (tabla de contenidos)
-                engine.process_table_of_contents()
-
-                # 9. Limpieza final - eliminar TODOS los marcadores << >>
-                engine.clean_unused_markers()  # Elimina todos los marcadores preservando imágenes y diseño de columnas
-
-                # 10. Eliminar líneas vacías al inicio de páginas (nueva mejora)
-                engine.remove_empty_lines_at_page_start()
-
-                engine.clean_empty_paragraphs()
-
-                # 11. Eliminar páginas vacías del documento (ya protege imágenes)
-                engine.remove_empty_pages()
-
-                # 12. Preservar headers y footers (verificación final)
-                engine.preserve_headers_and_footers()
-
-                # 12.5 Insertar imágenes de fondo si están configuradas
-                # NOTA: Ahora usa versión simplificada que no corrompe el documento
-                first_page_image_path = st.session_state.get("first_page_image_path")
-                if first_page_image_path:
-                    img_path = Path(first_page_image_path)
-                    if img_path.exists():
-                        engine.insert_background_image(img_path, page_type="first")
-
-                last_page_image_path = st.session_state.get("last_page_image_path")
-                if last_page_image_path:
-                    img_path = Path(last_page_image_path)
-                    if img_path.exists():
-                        engine.insert_background_image(img_path, page_type="last")
-
-                # 13. Obtener el documento como bytes
-                doc_bytes = engine.get_document_bytes()
-
-                # 14. Mostrar botón de descarga
-                show_success_message()
-
-                nombre_empresa = simple_inputs.get("nombre_compania", "Empresa")
-                ejercicio = simple_inputs.get("ejercicio_completo", "2023")
-
-                # Limpiar nombre para archivo
-                nombre_base = f"Informe_PT_{nombre_empresa.replace(' ', '_')}_{ejercicio}"
-                nombre_archivo_docx = f"{nombre_base}.docx"
-                nombre_archivo_pdf = f"{nombre_base}.pdf"
-
-                # Crear dos columnas para los botones de descarga
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.download_button(
-                        label="📥 Descargar Word (.docx)",
-                        data=doc_bytes,
-                        file_name=nombre_archivo_docx,
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                        type="primary",
-                        use_container_width=True
-                    )
-
-                with col2:
-                    # Intentar generar PDF
-                    try:
-                        pdf_bytes = engine.get_pdf_bytes()
-                        st.download_button(
-                            label="📑 Descargar PDF",
-                            data=pdf_bytes,
-                            file_name=nombre_archivo_pdf,
-                            mime="application/pdf",
-                            type="secondary",
-                            use_container_width=True
-                        )
-                    except RuntimeError as pdf_error:
-                        # Si falla la conversión a PDF, mostrar mensaje informativo
-                        st.warning(
-                            f"⚠️ No se pudo generar el PDF: {pdf_error}\n\n"
-                            "Puedes descargar el archivo Word y convertirlo manualmente."
-                        )
-
-                st.balloons()
+                # 14. Encargar el PDF en segundo plano: el Word se ofrece ya
+                pdf_job = get_pdf_job_queue().submit(result.doc_bytes)
+                st.session_state.generated_report = {
+                    "doc_bytes": result.doc_bytes,
+                    "docx_name": report_filename(simple_inputs, "docx"),
+                    "pdf_name": report_filename(simple_inputs, "pdf"),
+                    "pdf_job_key": pdf_job.key,
+                    "timings": result.timings,
+                    "engine_metrics": result.engine_metrics,
+                }
+
+            st.balloons()
+
+        except FileNotFoundError as e:
+            st.session_state.pop("generated_report", None)
+            st.error(f"❌ {e}")
 
         except Exception as e:
+            st.session_state.pop("generated_report", None)
             st.error(f"❌ Error al generar el informe: {e}")
             st.exception(e)
 
+    # 15. Descargas del último informe (se mantienen entre reruns mientras se
+    # convierte el PDF)
+    report = st.session_state.get("generated_report")
+    if report:
+        render_report_downloads(report)
+
+        if st.session_state.get("show_generation_metrics"):
+            # Espera en cola y conversión del PDF, si ya ha terminado
+            timings = dict(report["timings"])
+            pdf_job = get_pdf_job_queue().get(report["pdf_job_key"])
+            if pdf_job is not None and pdf_job.status == "done":
+                timings.update(pdf_job.result().timings)
+            show_generation_metrics(timings, report["engine_metrics"])
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,230 @@
+"""
+Generación de informes por lotes, sin interfaz Streamlit.
+
+Recorre una carpeta de ficheros JSON exportados desde la app ("Descargar
+Datos", ver export_data_to_json) y genera un .docx por cada uno con el mismo
+pipeline que `app.py`, repartiendo los informes entre varios procesos.
+
+Uso (desde la raíz del repositorio):
+    python -m app.batch <carpeta_json> [-o carpeta_salida] [-w workers]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List
+
+# Añadir el directorio app al path
+app_dir = Path(__file__).parent
+sys.path.insert(0, str(app_dir))
+
+from modules.config_loader import ConfigLoader
+from modules.utils import import_data_from_json
+from modules.report_generator import (
+    DEFAULT_CONFIG_DIR,
+    ReportOptions,
+    generate_report,
+    report_filename,
+    validate_report_inputs
+)
+from modules.template_cache import get_block_cache
+
+# Configuración cargada una vez por proceso de trabajo
+_configs = {}
+
+
+def _load_configs(config_dir: Path) -> tuple:
+    """Carga (y memoriza por proceso) las configuraciones YAML."""
+    key = str(config_dir)
+    if key not in _configs:
+        loader = ConfigLoader(config_dir)
+        cfg_simple, cfg_cond, cfg_tab = loader.load_all_configs()
+        get_block_cache().warm_from_config(cfg_cond, config_dir)
+        _configs[key] = (cfg_simple, cfg_cond, cfg_tab)
+    return _configs[key]
+
+
+def _plan_output_paths(json_files: List[Path], output_dir: Path) -> List[Path]:
+    """
+    Asigna el .docx de salida de cada JSON antes de repartir el trabajo.
+
+    Si varios JSON generan el mismo nombre (misma compañía y ejercicio), a
+    partir del segundo se añade el nombre del JSON para no sobrescribirlos.
+    """
+    output_paths = []
+    used = set()
+    for json_path in json_files:
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                simple_inputs, _, _, _ = import_data_from_json(json.load(f))
+            filename = report_filename(simple_inputs)
+        except (OSError, ValueError, AttributeError):
+            filename = f"{json_path.stem}.docx"
+
+        output_path = output_dir / filename
+        if output_path in used:
+            output_path = output_dir / f"{output_path.stem}_{json_path.stem}.docx"
+        used.add(output_path)
+        output_paths.append(output_path)
+    return output_paths
+
+
+def generate_from_json(
+    json_path: Path,
+    output_path: Path,
+    config_dir: Path,
+    streaming: bool = False
+) -> dict:
+    """
+    Genera el informe de un fichero JSON exportado.
+
+    Args:
+        json_path: JSON exportado con export_data_to_json
+        output_path: Ruta del .docx a escribir
+        config_dir: Carpeta con los YAML y la plantilla
+        streaming: Generar con StreamingWordEngine (memoria acotada)
+
+    Returns:
+        Diccionario con el resultado: json, output, status, errors, total_s, timings
+    """
+    start = time.perf_counter()
+    result = {"json": str(json_path), "output": None, "status": "ok", "errors": [], "timings": {}}
+
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        simple_inputs, condition_inputs, table_inputs, table_format_config = import_data_from_json(data)
+        cfg_simple, cfg_cond, cfg_tab = _load_configs(config_dir)
+
+        errors = validate_report_inputs(cfg_simple, cfg_cond, simple_inputs, condition_inputs)
+        if errors:
+            result.update(status="invalid", errors=errors)
+            return result
+
+        options = ReportOptions(
+            config_dir=config_dir, configs=(cfg_simple, cfg_cond, cfg_tab), streaming=streaming
+        )
+        report = generate_report(
+            simple_inputs, condition_inputs, table_inputs, table_format_config, options
+        )
+
+        Path(output_path).write_bytes(report.doc_bytes)
+
+        result.update(
+            output=str(output_path),
+            timings=report.timings,
+            engine_metrics=report.engine.metrics.report()
+        )
+
+    except Exception as e:
+        result.update(status="error", errors=[f"{type(e).__name__}: {e}"])
+
+    finally:
+        result["total_s"] = time.perf_counter() - start
+
+    return result
+
+
+def run_batch(
+    input_dir: Path,
+    output_dir: Path,
+    config_dir: Path = DEFAULT_CONFIG_DIR,
+    workers: int = None,
+    streaming: bool = False
+) -> List[dict]:
+    """
+    Genera los informes de todos los JSON de una carpeta.
+
+    Args:
+        input_dir: Carpeta con los JSON exportados
+        output_dir: Carpeta donde escribir los .docx
+        config_dir: Carpeta con los YAML y la plantilla
+        workers: Número de procesos (por defecto, uno por núcleo; 1 = sin pool)
+        streaming: Generar con StreamingWordEngine (memoria acotada por proceso)
+
+    Returns:
+        Lista de resultados de generate_from_json, en el orden de los ficheros
+    """
+    json_files = sorted(Path(input_dir).glob("*.json"))
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_paths = _plan_output_paths(json_files, output_dir)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(json_files) <= 1:
+        return [
+            generate_from_json(path, output_path, config_dir, streaming)
+            for path, output_path in zip(json_files, output_paths)
+        ]
+
+    results: Dict[Path, dict] = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(json_files))) as executor:
+        futures = {
+            executor.submit(generate_from_json, path, output_path, config_dir, streaming): path
+            for path, output_path in zip(json_files, output_paths)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    return [results[path] for path in json_files]
+
+
+def print_summary(results: List[dict], elapsed: float):
+    """Muestra un resumen con los tiempos de cada informe."""
+    print(f"{'JSON':<40} {'Estado':<8} {'Total (ms)':>10}  Etapa más lenta")
+    for result in results:
+        slowest = ""
+        if result["timings"]:
+            stage, seconds = max(result["timings"].items(), key=lambda item: item[1])
+            slowest = f"{stage} ({seconds * 1000:.1f} ms)"
+        print(
+            f"{Path(result['json']).name:<40} {result['status']:<8} "
+            f"{result['total_s'] * 1000:>10.1f}  {slowest}"
+        )
+        for error in result["errors"]:
+            print(f"    - {error}")
+
+    ok = sum(1 for result in results if result["status"] == "ok")
+    print(f"\n{ok}/{len(results)} informes generados en {elapsed:.2f} s")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Genera informes Word a partir de una carpeta de JSON exportados."
+    )
+    parser.add_argument("input_dir", type=Path, help="Carpeta con los ficheros JSON")
+    parser.add_argument("-o", "--output-dir", type=Path, default=Path("informes"),
+                        help="Carpeta de salida para los .docx (por defecto: ./informes)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Número de procesos (por defecto: núcleos disponibles)")
+    parser.add_argument("-c", "--config-dir", type=Path, default=DEFAULT_CONFIG_DIR,
+                        help="Carpeta con los YAML y Plantilla.docx")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Usar el motor en streaming (memoria acotada en plantillas muy grandes)")
+    parser.add_argument("--summary-json", type=Path, default=None,
+                        help="Guardar el resumen con los tiempos y métricas por etapa en un JSON")
+    args = parser.parse_args(argv)
+
+    if not args.input_dir.is_dir():
+        parser.error(f"No existe la carpeta de entrada: {args.input_dir}")
+
+    start = time.perf_counter()
+    results = run_batch(args.input_dir, args.output_dir, args.config_dir.resolve(), args.workers,
+                        args.streaming)
+    elapsed = time.perf_counter() - start
+
+    print_summary(results, elapsed)
+
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump({"elapsed_s": elapsed, "reports": results}, f, indent=2, ensure_ascii=False)
+
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
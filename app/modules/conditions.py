@@ -3,6 +3,8 @@ Módulo para manejar condiciones (bloques condicionales).
 """
 from typing import Dict, List
 
+from modules.config_model import CONDITION_VALUES, conditions_model
+
 
 def get_default_conditions(cfg_cond: dict) -> dict:
     """
@@ -14,13 +16,7 @@ def get_default_conditions(cfg_cond: dict) -> dict:
     Returns:
         Diccionario con valores por defecto
     """
-    defaults = {}
-
-    for cond in cfg_cond.get("conditions", []):
-        cond_id = cond["id"]
-        defaults[cond_id] = "No"
-
-    return defaults
+    return dict(conditions_model(cfg_cond).defaults)
 
 
 def validate_conditions(cfg_cond: dict, inputs: dict) -> list:
@@ -35,15 +31,11 @@ def validate_conditions(cfg_cond: dict, inputs: dict) -> list:
         Lista de errores (vacía si todo es válido)
     """
     errors = []
-    valid_values = ["Sí", "No"]
-
-    for cond in cfg_cond.get("conditions", []):
-        cond_id = cond["id"]
-        label = cond["label"]
 
-        value = inputs.get(cond_id)
+    for cond in conditions_model(cfg_cond).conditions:
+        value = inputs.get(cond.id)
 
-        if value is not None and value not in valid_values:
-            errors.append(f"El valor de '{label}' debe ser 'Sí' o 'No'")
+        if value is not None and value not in CONDITION_VALUES:
+            errors.append(cond.value_error)
 
     return errors
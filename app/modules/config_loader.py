@@ -1,9 +1,86 @@
 """
 Módulo para cargar y validar los archivos YAML de configuración.
+
+Las configuraciones se devuelven congeladas (FrozenDict / FrozenList): se
+comparten entre todas las sesiones de la app, así que nadie debe modificarlas.
+load_all_configs(cached=True) las guarda en una caché del proceso indexada por
+fecha de modificación y tamaño de los tres YAML (y por su hash, si solo cambió
+la fecha), de modo que cada rerun de Streamlit no vuelve a parsear ni validar
+nada mientras los ficheros no cambien.
 """
+import hashlib
+import threading
+from copy import deepcopy
 import yaml
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from modules.config_model import compile_models
+from modules.formulas import FormulaError, column_formulas, table_formula_graph
+
+# Cargador de libyaml (en C) si PyYAML se compiló con él; si no, el de Python
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+CONFIG_FILES = ("variables_simples.yaml", "variables_condicionales.yaml", "tablas.yaml")
+
+
+class FrozenDict(dict):
+    """dict de solo lectura (sigue siendo un dict para json, pandas, etc.)."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("La configuración es de solo lectura; usa copy.deepcopy para modificarla")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __deepcopy__(self, memo):
+        # La copia es mutable: es la forma de partir de una configuración y cambiarla
+        return {key: deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """list de solo lectura."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("La configuración es de solo lectura; usa copy.deepcopy para modificarla")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = reverse = sort = clear = _readonly
+
+    def __deepcopy__(self, memo):
+        return [deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value):
+    """Convierte recursivamente dicts y listas en FrozenDict y FrozenList."""
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+class _CachedConfigs:
+    """Configuraciones de un directorio junto con la firma de sus ficheros."""
+
+    def __init__(self, stats: tuple, digests: tuple, configs: tuple):
+        self.stats = stats
+        self.digests = digests
+        self.configs = configs
+
+
+_config_cache: Dict[str, _CachedConfigs] = {}
+_config_cache_lock = threading.Lock()
 
 
 class ConfigLoader:
@@ -46,9 +123,13 @@ class ConfigLoader:
         if not filepath.exists():
             raise FileNotFoundError(f"Archivo de configuración no encontrado: {filepath}")
 
+        with open(filepath, "rb") as f:
+            return self._parse_yaml(f.read(), filename)
+
+    def _parse_yaml(self, content: bytes, filename: str) -> Dict[str, Any]:
+        """Parsea el contenido de un YAML (con libyaml si está disponible)."""
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
+            data = yaml.load(content.decode("utf-8"), Loader=YamlLoader)
 
             if data is None:
                 raise ValueError(f"El archivo {filename} está vacío o no es un YAML válido")
@@ -58,31 +139,102 @@ class ConfigLoader:
         except yaml.YAMLError as e:
             raise yaml.YAMLError(f"Error al parsear {filename}: {e}")
 
-    def load_all_configs(self) -> tuple:
+    def load_all_configs(self, cached: bool = False) -> tuple:
         """
         Carga todas las configuraciones necesarias.
 
+        Args:
+            cached: Usar la caché del proceso: si ningún YAML ha cambiado desde
+                la última carga se devuelven las mismas configuraciones sin
+                leer ni validar nada
+
         Returns:
-            Tupla con (cfg_simple, cfg_cond, cfg_tab)
+            Tupla con (cfg_simple, cfg_cond, cfg_tab), congeladas
 
         Raises:
             Exception: Si hay algún error al cargar los archivos.
         """
         try:
-            cfg_simple = self.load_yaml("variables_simples.yaml")
-            cfg_cond = self.load_yaml("variables_condicionales.yaml")
-            cfg_tab = self.load_yaml("tablas.yaml")
+            if cached:
+                return self._load_cached()
 
-            # Validar que las estructuras básicas existan
-            self._validate_simple_config(cfg_simple)
-            self._validate_conditions_config(cfg_cond)
-            self._validate_tables_config(cfg_tab)
-
-            return cfg_simple, cfg_cond, cfg_tab
+            contents = [self._read_config_file(filename) for filename in CONFIG_FILES]
+            return self._build_configs(contents)
 
         except Exception as e:
             raise Exception(f"Error al cargar las configuraciones: {e}")
 
+    def _read_config_file(self, filename: str) -> bytes:
+        filepath = self.config_dir / filename
+        if not filepath.exists():
+            raise FileNotFoundError(f"Archivo de configuración no encontrado: {filepath}")
+        return filepath.read_bytes()
+
+    def _build_configs(self, contents: list) -> tuple:
+        """Parsea, valida, congela y compila el contenido de los tres YAML."""
+        cfg_simple, cfg_cond, cfg_tab = (
+            self._parse_yaml(content, filename) for content, filename in zip(contents, CONFIG_FILES)
+        )
+
+        # Validar que las estructuras básicas existan
+        self._validate_simple_config(cfg_simple)
+        self._validate_conditions_config(cfg_cond)
+        self._validate_tables_config(cfg_tab)
+
+        cfg_simple, cfg_cond, cfg_tab = freeze(cfg_simple), freeze(cfg_cond), freeze(cfg_tab)
+
+        # Modelos compilados (ver config_model): validar entradas y construir el
+        # contexto no vuelve a interpretar los YAML en cada generación
+        compile_models(cfg_simple, cfg_cond)
+        return cfg_simple, cfg_cond, cfg_tab
+
+    def _file_stats(self) -> Optional[tuple]:
+        """(mtime_ns, tamaño) de cada YAML, o None si falta alguno."""
+        stats = []
+        for filename in CONFIG_FILES:
+            try:
+                stat = (self.config_dir / filename).stat()
+            except OSError:
+                return None
+            stats.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(stats)
+
+    def _load_cached(self) -> tuple:
+        """
+        Devuelve las configuraciones de la caché del proceso.
+
+        Si cambian fecha o tamaño de algún YAML se vuelven a leer; si el hash
+        de los tres coincide con el de la entrada existente (solo se tocó la
+        fecha) se reutilizan sin parsear.
+        """
+        key = str(self.config_dir.resolve())
+        stats = self._file_stats()
+
+        with _config_cache_lock:
+            entry = _config_cache.get(key)
+            if entry is not None and stats is not None and entry.stats == stats:
+                return entry.configs
+
+            contents = [self._read_config_file(filename) for filename in CONFIG_FILES]
+            digests = tuple(hashlib.sha256(content).hexdigest() for content in contents)
+
+            if entry is not None and entry.digests == digests:
+                configs = entry.configs
+            else:
+                configs = self._build_configs(contents)
+
+            _config_cache[key] = _CachedConfigs(stats, digests, configs)
+            return configs
+
+    @staticmethod
+    def invalidate_cache(config_dir: Path = None):
+        """Vacía la caché del proceso (o solo la de un directorio)."""
+        with _config_cache_lock:
+            if config_dir is None:
+                _config_cache.clear()
+            else:
+                _config_cache.pop(str(Path(config_dir).resolve()), None)
+
     def _validate_simple_config(self, cfg: Dict[str, Any]):
         """Valida la estructura del YAML de variables simples."""
         if "simple_variables" not in cfg:
@@ -119,3 +271,11 @@ class ConfigLoader:
                 raise ValueError(f"Tabla sin 'marker' o 'marker_pattern': {table_id}")
             if "columns" not in table_cfg:
                 raise ValueError(f"Tabla sin 'columns': {table_id}")
+
+            # Las fórmulas se compilan aquí una sola vez (quedan en caché para
+            # TableBuilder y la UI) y los errores se detectan al cargar
+            try:
+                table_formula_graph(table_cfg)
+                column_formulas(table_cfg)
+            except FormulaError as e:
+                raise ValueError(f"Fórmula no válida en la tabla {table_id}: {e}")
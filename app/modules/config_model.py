@@ -0,0 +1,231 @@
+"""
+Modelo compilado de variables_simples.yaml y variables_condicionales.yaml.
+
+ConfigLoader compila cada configuración una sola vez al cargarla: cada
+variable lleva ya resueltos su valor por defecto, su validador y su
+formateador según el tipo, y sus mensajes de error; las condiciones, el
+contexto de marcadores a limpiar y los valores por defecto. Construir el
+contexto o validar las entradas en cada generación (o en cada rerun de
+Streamlit) recorre así objetos ya preparados en lugar de volver a consultar
+claves de diccionarios y despachar por el nombre del tipo.
+
+Los modelos se registran por id() de la configuración congelada que los
+generó (compile_models) y la entrada desaparece cuando esa configuración deja
+de existir. Los accesores no compilan en el momento: una configuración que no
+pasó por ConfigLoader o compile_models (por ejemplo, la copia mutable que
+devuelve copy.deepcopy) es un error, no un motivo para volver a compilar en
+cada llamada.
+"""
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Respuestas admitidas para una condición
+CONDITION_VALUES = ("Sí", "No")
+
+
+def _format_percent(value) -> str:
+    # 0.35 -> "35.00%"
+    return f"{value * 100:.2f}%" if isinstance(value, (int, float)) else str(value)
+
+
+def _format_number(value) -> str:
+    # Separadores de miles y dos decimales
+    return f"{value:,.2f}" if isinstance(value, (int, float)) else str(value)
+
+
+def _is_email(value) -> bool:
+    return "@" in str(value)
+
+
+def _is_number(value) -> bool:
+    try:
+        float(value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def _is_integer(value) -> bool:
+    try:
+        int(value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+# Formateador por tipo (el resto: texto, long_text, email... se usa str)
+TYPE_FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    "percent": _format_percent,
+    "number": _format_number,
+}
+
+# Validador por tipo y final del mensaje de error
+TYPE_VALIDATORS: Dict[str, Tuple[Callable[[Any], bool], str]] = {
+    "email": (_is_email, "debe ser un email válido"),
+    "number": (_is_number, "debe ser un número"),
+    "percent": (_is_number, "debe ser un número"),
+    "integer": (_is_integer, "debe ser un número entero"),
+}
+
+# Valor por defecto por tipo (el resto: "")
+TYPE_DEFAULTS: Dict[str, Any] = {
+    "number": 0.0,
+    "percent": 0.0,
+    "integer": 0,
+}
+
+
+class SimpleVariable:
+    """Variable simple compilada."""
+
+    __slots__ = (
+        "id", "label", "marker", "type", "optional", "required",
+        "default", "format", "is_valid", "required_error", "type_error",
+    )
+
+    def __init__(self, var_cfg: dict):
+        """
+        Args:
+            var_cfg: Entrada de simple_variables en variables_simples.yaml
+        """
+        self.id: str = var_cfg["id"]
+        self.label: str = var_cfg.get("label", self.id)
+        # Puede ser None (ej: ejercicio_anterior, solo se usa en tablas)
+        self.marker: Optional[str] = var_cfg.get("marker")
+        self.type: str = var_cfg.get("type", "text")
+        self.optional: bool = var_cfg.get("optional", False)
+        # Con marcador y no opcional: el campo es obligatorio
+        self.required: bool = self.marker is not None and not self.optional
+        self.default = TYPE_DEFAULTS.get(self.type, "")
+        self.format: Callable[[Any], str] = TYPE_FORMATTERS.get(self.type, str)
+
+        validator = TYPE_VALIDATORS.get(self.type)
+        self.is_valid: Optional[Callable[[Any], bool]] = validator[0] if validator else None
+        self.required_error = f"El campo '{self.label}' es requerido"
+        self.type_error = f"El campo '{self.label}' {validator[1]}" if validator else None
+
+    def __repr__(self) -> str:
+        return f"SimpleVariable({self.id!r}, type={self.type!r})"
+
+
+class SimpleVarsModel:
+    """variables_simples.yaml compilado, con índices por id y por marcador."""
+
+    __slots__ = ("variables", "by_id", "by_marker", "context_variables", "marked_variables", "defaults")
+
+    def __init__(self, cfg_simple: dict):
+        self.variables: Tuple[SimpleVariable, ...] = tuple(
+            SimpleVariable(var_cfg) for var_cfg in cfg_simple.get("simple_variables", [])
+        )
+        self.by_id: Dict[str, SimpleVariable] = {var.id: var for var in self.variables}
+        self.by_marker: Dict[str, SimpleVariable] = {var.marker: var for var in self.variables if var.marker}
+        # Variables que se reemplazan en la plantilla (marcador no vacío)
+        self.context_variables = tuple(var for var in self.variables if var.marker)
+        # Variables con clave marker (validate_inputs las considera obligatorias)
+        self.marked_variables = tuple(var for var in self.variables if var.marker is not None)
+        self.defaults: Dict[str, Any] = {var.id: var.default for var in self.variables}
+
+
+class Condition:
+    """Condición compilada."""
+
+    __slots__ = ("id", "label", "marker", "word_file", "value_error")
+
+    def __init__(self, cond_cfg: dict):
+        """
+        Args:
+            cond_cfg: Entrada de conditions en variables_condicionales.yaml
+        """
+        self.id: str = cond_cfg["id"]
+        self.label: str = cond_cfg.get("label", self.id)
+        self.marker: Optional[str] = cond_cfg.get("marker")
+        self.word_file: Optional[str] = cond_cfg.get("word_file")
+        self.value_error = f"El valor de '{self.label}' debe ser 'Sí' o 'No'"
+
+    def __repr__(self) -> str:
+        return f"Condition({self.id!r})"
+
+
+class ConditionsModel:
+    """variables_condicionales.yaml compilado, con índices por id y por marcador."""
+
+    __slots__ = ("conditions", "by_id", "by_marker", "defaults", "cleared_markers")
+
+    def __init__(self, cfg_cond: dict):
+        self.conditions: Tuple[Condition, ...] = tuple(
+            Condition(cond_cfg) for cond_cfg in cfg_cond.get("conditions", [])
+        )
+        self.by_id: Dict[str, Condition] = {cond.id: cond for cond in self.conditions}
+        self.by_marker: Dict[str, Condition] = {cond.marker: cond for cond in self.conditions if cond.marker}
+        self.defaults: Dict[str, str] = {cond.id: "No" for cond in self.conditions}
+        # Todos los marcadores de condición se vacían en el contexto (los "Sí"
+        # se sustituyen después por el bloque Word)
+        self.cleared_markers: Dict[str, str] = {cond.marker: "" for cond in self.conditions}
+
+
+# Modelos compilados, por id() de la configuración de la que salen
+_compiled_models: Dict[int, Any] = {}
+
+
+def _register(cfg: dict, model):
+    key = id(cfg)
+    try:
+        # Al destruirse la configuración se borra su entrada (antes de que su id
+        # pueda reutilizarse)
+        weakref.finalize(cfg, _compiled_models.pop, key, None)
+    except TypeError:
+        raise TypeError(
+            "Solo se compilan configuraciones congeladas (config_loader.freeze), no dicts normales"
+        )
+    _compiled_models[key] = model
+    return model
+
+
+def compile_models(cfg_simple: dict, cfg_cond: dict) -> Tuple[SimpleVarsModel, ConditionsModel]:
+    """
+    Compila y registra los modelos de dos configuraciones congeladas.
+
+    Args:
+        cfg_simple: variables_simples.yaml congelado
+        cfg_cond: variables_condicionales.yaml congelado
+
+    Returns:
+        Tupla (SimpleVarsModel, ConditionsModel)
+
+    Raises:
+        TypeError: Si alguna configuración no está congelada
+    """
+    return (
+        _register(cfg_simple, SimpleVarsModel(cfg_simple)),
+        _register(cfg_cond, ConditionsModel(cfg_cond)),
+    )
+
+
+def _compiled_model(cfg: dict, model_type: type, filename: str):
+    model = _compiled_models.get(id(cfg))
+    if not isinstance(model, model_type):
+        raise ValueError(
+            f"La configuración de {filename} no está compilada: cárgala con ConfigLoader "
+            f"o compílala con compile_models"
+        )
+    return model
+
+
+def simple_vars_model(cfg_simple: dict) -> SimpleVarsModel:
+    """
+    Modelo compilado de variables_simples.yaml.
+
+    Raises:
+        ValueError: Si la configuración no se compiló con compile_models
+    """
+    return _compiled_model(cfg_simple, SimpleVarsModel, "variables_simples.yaml")
+
+
+def conditions_model(cfg_cond: dict) -> ConditionsModel:
+    """
+    Modelo compilado de variables_condicionales.yaml.
+
+    Raises:
+        ValueError: Si la configuración no se compiló con compile_models
+    """
+    return _compiled_model(cfg_cond, ConditionsModel, "variables_condicionales.yaml")
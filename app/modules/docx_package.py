@@ -0,0 +1,287 @@
+"""
+Lectura y escritura en memoria de paquetes .docx (zip).
+
+El reempaquetado de un informe solo necesita serializar las partes que han
+cambiado (document.xml y poco más). El resto de partes, en especial las
+imágenes de word/media, se copian tal cual desde el zip de la plantilla: los
+bytes ya comprimidos, su CRC y sus tamaños se reutilizan sin descomprimir ni
+volver a comprimir nada, y todo el paquete se escribe en un BytesIO.
+"""
+import struct
+import time
+import zipfile
+import zlib
+from io import BytesIO
+from typing import Dict, Iterable, List, Tuple
+
+# Firmas y formatos de las cabeceras zip (APPNOTE.TXT)
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+LOCAL_HEADER_STRUCT = struct.Struct('<4s2B4HL2L2H')
+CENTRAL_HEADER_STRUCT = struct.Struct('<4s4B4HL2L5H2L')
+END_RECORD_STRUCT = struct.Struct('<4s4H2LH')
+
+# Bit 11 de los flags: nombre de la entrada codificado en UTF-8
+FLAG_UTF8 = 0x800
+ZIP_VERSION = 20
+
+
+class RawZipEntry:
+    """Entrada de zip con sus datos tal y como están almacenados (comprimidos)."""
+
+    def __init__(
+        self,
+        name: str,
+        compress_type: int,
+        crc: int,
+        compress_size: int,
+        file_size: int,
+        date_time: Tuple[int, int, int, int, int, int],
+        raw_data: bytes,
+        external_attr: int = 0
+    ):
+        self.name = name
+        self.compress_type = compress_type
+        self.crc = crc
+        self.compress_size = compress_size
+        self.file_size = file_size
+        self.date_time = date_time
+        self.raw_data = raw_data
+        self.external_attr = external_attr
+
+    def read(self) -> bytes:
+        """Devuelve el contenido descomprimido de la entrada."""
+        if self.compress_type == zipfile.ZIP_STORED:
+            return self.raw_data
+        if self.compress_type == zipfile.ZIP_DEFLATED:
+            return zlib.decompress(self.raw_data, -15)
+        raise ValueError(f"Método de compresión no soportado en {self.name}: {self.compress_type}")
+
+
+class CompressionPolicy:
+    """
+    Método y nivel de compresión por tipo de parte del paquete.
+
+    Las imágenes JPEG/PNG/GIF ya están comprimidas: deflatearlas de nuevo cuesta
+    CPU sin reducir el tamaño, por lo que por defecto se almacenan (ZIP_STORED).
+    El XML se comprime con deflate al nivel indicado.
+    """
+
+    # Extensiones cuyo contenido ya está comprimido
+    PRECOMPRESSED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.tif', '.tiff', '.wdp', '.jxr')
+
+    def __init__(
+        self,
+        xml_level: int = 6,
+        media_level: int = 6,
+        store_precompressed: bool = True,
+        recompress_template_parts: bool = False
+    ):
+        """
+        Args:
+            xml_level: Nivel de deflate (0-9) para partes XML (.xml, .rels)
+            media_level: Nivel de deflate para el resto de binarios (emf, wmf, bmp...)
+            store_precompressed: Guardar sin comprimir las imágenes ya comprimidas
+            recompress_template_parts: Si es True, las partes sin modificar de la
+                plantilla cuyo método no coincida con esta política se vuelven a
+                codificar; si es False se copian siempre tal cual
+        """
+        self.xml_level = xml_level
+        self.media_level = media_level
+        self.store_precompressed = store_precompressed
+        self.recompress_template_parts = recompress_template_parts
+
+    def settings_for(self, name: str) -> Tuple[int, int]:
+        """Devuelve (compress_type, compresslevel) para una parte."""
+        lower_name = name.lower()
+
+        if self.store_precompressed and lower_name.endswith(self.PRECOMPRESSED_EXTENSIONS):
+            return zipfile.ZIP_STORED, 0
+        if lower_name.endswith(('.xml', '.rels')):
+            return zipfile.ZIP_DEFLATED, self.xml_level
+        return zipfile.ZIP_DEFLATED, self.media_level
+
+
+DEFAULT_COMPRESSION_POLICY = CompressionPolicy()
+
+
+def read_raw_entries(data: bytes) -> List[RawZipEntry]:
+    """
+    Lee todas las entradas de un zip sin descomprimirlas.
+
+    Args:
+        data: Bytes del fichero .docx
+
+    Returns:
+        Lista de entradas en el orden del directorio central
+
+    Raises:
+        ValueError: Si el zip usa cifrado o una cabecera local no es válida.
+    """
+    entries = []
+
+    with zipfile.ZipFile(BytesIO(data), 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            if info.flag_bits & 0x1:
+                raise ValueError(f"Entrada cifrada no soportada: {info.filename}")
+
+            offset = info.header_offset
+            header = LOCAL_HEADER_STRUCT.unpack_from(data, offset)
+            if header[0] != LOCAL_HEADER_SIGNATURE:
+                raise ValueError(f"Cabecera local no válida en {info.filename}")
+
+            name_length, extra_length = header[10], header[11]
+            start = offset + LOCAL_HEADER_STRUCT.size + name_length + extra_length
+
+            entries.append(RawZipEntry(
+                name=info.filename,
+                compress_type=info.compress_type,
+                crc=info.CRC,
+                compress_size=info.compress_size,
+                file_size=info.file_size,
+                date_time=info.date_time,
+                raw_data=data[start:start + info.compress_size],
+                external_attr=info.external_attr,
+            ))
+
+    return entries
+
+
+def compress_entry(
+    name: str,
+    data: bytes,
+    compress_type: int = zipfile.ZIP_DEFLATED,
+    compresslevel: int = -1,
+    date_time: Tuple[int, int, int, int, int, int] = None
+) -> RawZipEntry:
+    """
+    Crea una entrada nueva comprimiendo sus datos en memoria.
+
+    Args:
+        name: Nombre de la parte dentro del paquete
+        data: Contenido sin comprimir
+        compress_type: zipfile.ZIP_DEFLATED o zipfile.ZIP_STORED
+        compresslevel: Nivel de zlib (-1 = nivel por defecto)
+        date_time: Fecha de la entrada (por defecto, la actual)
+    """
+    if date_time is None:
+        date_time = time.localtime(time.time())[:6]
+
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+        raw_data = compressor.compress(data) + compressor.flush()
+    elif compress_type == zipfile.ZIP_STORED:
+        raw_data = data
+    else:
+        raise ValueError(f"Método de compresión no soportado: {compress_type}")
+
+    return RawZipEntry(
+        name=name,
+        compress_type=compress_type,
+        crc=zlib.crc32(data) & 0xFFFFFFFF,
+        compress_size=len(raw_data),
+        file_size=len(data),
+        date_time=date_time,
+        raw_data=raw_data,
+        external_attr=0,
+    )
+
+
+def _dos_date_time(date_time: Tuple[int, int, int, int, int, int]) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | (second // 2)
+    return dos_date, dos_time
+
+
+def write_package(entries: Iterable[RawZipEntry]) -> bytes:
+    """
+    Escribe un zip completo en memoria a partir de entradas ya comprimidas.
+
+    Args:
+        entries: Entradas en el orden en que deben aparecer en el paquete
+
+    Returns:
+        Bytes del fichero .docx
+    """
+    output = BytesIO()
+    central_directory = []
+    count = 0
+
+    for entry in entries:
+        name_bytes = entry.name.encode('utf-8')
+        flags = FLAG_UTF8 if not entry.name.isascii() else 0
+        dos_date, dos_time = _dos_date_time(entry.date_time)
+        offset = output.tell()
+
+        if offset > 0xFFFFFFFF or entry.compress_size > 0xFFFFFFFF or entry.file_size > 0xFFFFFFFF:
+            raise ValueError("Los paquetes ZIP64 no están soportados")
+
+        output.write(LOCAL_HEADER_STRUCT.pack(
+            LOCAL_HEADER_SIGNATURE, ZIP_VERSION, 0, flags, entry.compress_type,
+            dos_time, dos_date, entry.crc, entry.compress_size, entry.file_size,
+            len(name_bytes), 0
+        ))
+        output.write(name_bytes)
+        output.write(entry.raw_data)
+
+        central_directory.append(CENTRAL_HEADER_STRUCT.pack(
+            b'PK\x01\x02', ZIP_VERSION, 0, ZIP_VERSION, 0, flags, entry.compress_type,
+            dos_time, dos_date, entry.crc, entry.compress_size, entry.file_size,
+            len(name_bytes), 0, 0, 0, 0, entry.external_attr, offset
+        ) + name_bytes)
+        count += 1
+
+    central_offset = output.tell()
+    for record in central_directory:
+        output.write(record)
+    central_size = output.tell() - central_offset
+
+    output.write(END_RECORD_STRUCT.pack(
+        b'PK\x05\x06', 0, 0, count, count, central_size, central_offset, 0
+    ))
+
+    return output.getvalue()
+
+
+def build_package(
+    template_entries: List[RawZipEntry],
+    modified_parts: Dict[str, bytes],
+    policy: CompressionPolicy = None
+) -> bytes:
+    """
+    Reempaqueta una plantilla sustituyendo solo las partes modificadas.
+
+    Las partes que no aparecen en modified_parts se copian tal cual (sin
+    recomprimir), salvo que la política pida recodificarlas. Las partes nuevas
+    se añaden al final del paquete.
+
+    Args:
+        template_entries: Entradas originales de la plantilla (read_raw_entries)
+        modified_parts: {nombre_parte: bytes} de las partes que han cambiado
+        policy: Política de compresión (por defecto, DEFAULT_COMPRESSION_POLICY)
+    """
+    policy = policy or DEFAULT_COMPRESSION_POLICY
+
+    def _compress(name, data, date_time=None):
+        compress_type, compresslevel = policy.settings_for(name)
+        return compress_entry(name, data, compress_type, compresslevel, date_time)
+
+    def _entries():
+        seen = set()
+        for entry in template_entries:
+            seen.add(entry.name)
+            if entry.name in modified_parts:
+                yield _compress(entry.name, modified_parts[entry.name], entry.date_time)
+            elif (policy.recompress_template_parts
+                  and entry.compress_type != policy.settings_for(entry.name)[0]):
+                yield _compress(entry.name, entry.read(), entry.date_time)
+            else:
+                yield entry
+
+        for name, data in modified_parts.items():
+            if name not in seen:
+                yield _compress(name, data)
+
+    return write_package(_entries())
@@ -0,0 +1,125 @@
+"""
+Métricas de ejecución del motor de Word.
+
+Cada método público instrumentado de XMLWordEngineAdapter registra su tiempo
+de ejecución, los párrafos cuyo texto se ha leído y los nodos XML que ha
+modificado (textos cambiados, elementos insertados o eliminados). Las llamadas
+anidadas entre métodos instrumentados se atribuyen al método exterior, de
+modo que la suma de las filas no cuenta dos veces el mismo trabajo.
+"""
+import functools
+import time
+from typing import Dict, List, Optional
+
+
+class MethodStats:
+    """Acumulado de un método instrumentado."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.paragraphs_scanned = 0
+        self.nodes_touched = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "method": self.name,
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "paragraphs_scanned": self.paragraphs_scanned,
+            "nodes_touched": self.nodes_touched,
+        }
+
+
+class EngineMetrics:
+    """Registro de métricas de una instancia del motor."""
+
+    def __init__(self):
+        self._stats: Dict[str, MethodStats] = {}
+        self._active: Optional[MethodStats] = None
+        # Trabajo hecho fuera de cualquier método instrumentado
+        self._untracked = MethodStats("(sin método)")
+
+    def scan(self, count: int = 1):
+        """Suma párrafos leídos al método en curso."""
+        (self._active or self._untracked).paragraphs_scanned += count
+
+    def touch(self, count: int = 1):
+        """Suma nodos XML modificados al método en curso."""
+        (self._active or self._untracked).nodes_touched += count
+
+    def _enter(self, name: str) -> Optional[MethodStats]:
+        if self._active is not None:
+            return None
+
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = MethodStats(name)
+        self._active = stats
+        return stats
+
+    def _exit(self, stats: MethodStats, elapsed: float):
+        stats.calls += 1
+        stats.seconds += elapsed
+        self._active = None
+
+    def report(self) -> List[dict]:
+        """
+        Devuelve las métricas por método, en orden de primera llamada.
+
+        Returns:
+            Lista de diccionarios con method, calls, seconds,
+            paragraphs_scanned y nodes_touched
+        """
+        rows = [stats.as_dict() for stats in self._stats.values()]
+        if self._untracked.paragraphs_scanned or self._untracked.nodes_touched:
+            rows.append(self._untracked.as_dict())
+        return rows
+
+    def totals(self) -> dict:
+        """Suma de todas las filas de report()."""
+        rows = self.report()
+        return {
+            "calls": sum(row["calls"] for row in rows),
+            "seconds": sum(row["seconds"] for row in rows),
+            "paragraphs_scanned": sum(row["paragraphs_scanned"] for row in rows),
+            "nodes_touched": sum(row["nodes_touched"] for row in rows),
+        }
+
+    def format_table(self) -> str:
+        """Tabla de texto con las métricas, para logs o la salida de consola."""
+        lines = [f"{'Método':<38} {'Llamadas':>8} {'ms':>10} {'Párrafos':>10} {'Nodos':>8}"]
+        for row in self.report() + [dict(method="TOTAL", **self.totals())]:
+            lines.append(
+                f"{row['method']:<38} {row['calls']:>8} {row['seconds'] * 1000:>10.2f} "
+                f"{row['paragraphs_scanned']:>10} {row['nodes_touched']:>8}"
+            )
+        return "\n".join(lines)
+
+    def reset(self):
+        """Descarta todas las métricas acumuladas."""
+        self._stats.clear()
+        self._untracked = MethodStats("(sin método)")
+
+
+def instrumented(method):
+    """
+    Decorador para métodos del motor: registra tiempo y contadores en self.metrics.
+
+    Si el método se llama desde otro método instrumentado, solo se ejecuta: su
+    trabajo queda contabilizado en el método exterior.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = self.metrics._enter(method.__name__)
+        if stats is None:
+            return method(self, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.metrics._exit(stats, time.perf_counter() - start)
+
+    return wrapper
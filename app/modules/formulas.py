@@ -0,0 +1,319 @@
+"""
+Motor de fórmulas para las filas y columnas calculadas de tablas.yaml.
+
+Las fórmulas son expresiones aritméticas sobre celdas de la misma tabla:
+
+    ejercicio_actual_formula: "ebit.ejercicio_actual / cifra_negocios.ejercicio_actual * 100"
+    formula: "(ejercicio_actual - ejercicio_anterior) / ejercicio_anterior * 100"
+
+`fila.columna` referencia una celda de otra fila y un nombre simple, una
+columna de la fila actual. Solo se admiten números, referencias, paréntesis y
+los operadores + - * /; cualquier otra construcción (llamadas, atributos de
+objetos, índices...) se rechaza al compilar. Una división entre 0 o con un
+valor que falta da NaN (celda vacía), nunca una excepción.
+
+Cada expresión se compila una sola vez (caché por texto) a código Python
+sobre un diccionario de valores, que pueden ser números o arrays de numpy:
+la misma fórmula se evalúa así de una vez para todas las filas de una tabla.
+"""
+import ast
+from functools import lru_cache
+from graphlib import CycleError, TopologicalSorter
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+import numpy as np
+
+# Columnas de una fila con fórmula propia: <columna>_formula
+ROW_FORMULA_SUFFIX = "_formula"
+
+_ALLOWED_BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div)
+_ALLOWED_UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+
+class FormulaError(ValueError):
+    """Fórmula no válida (sintaxis no admitida, referencia mal formada o ciclo)."""
+
+
+def _safe_divide(numerator, denominator):
+    """División que devuelve NaN cuando el divisor es 0 (escalares o arrays)."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(denominator == 0, np.nan, numerator / denominator)
+    return result if result.ndim else float(result)
+
+
+class _ReferenceRewriter(ast.NodeTransformer):
+    """
+    Valida el árbol de la expresión y sustituye referencias y divisiones.
+
+    Cada referencia pasa a ser _v["fila.columna"] (o _v["columna"]) y cada
+    división, una llamada a _safe_divide.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.references = set()
+
+    def _reject(self, node: ast.AST):
+        raise FormulaError(
+            f"Construcción no admitida en la fórmula '{self.expression}': {type(node).__name__}"
+        )
+
+    def _lookup(self, key: str, node: ast.AST) -> ast.AST:
+        self.references.add(key)
+        return ast.copy_location(
+            ast.Subscript(value=ast.Name(id="_v", ctx=ast.Load()), slice=ast.Constant(key), ctx=ast.Load()),
+            node
+        )
+
+    def visit_Expression(self, node: ast.Expression) -> ast.AST:
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        if not isinstance(node.op, _ALLOWED_BINARY_OPERATORS):
+            self._reject(node.op)
+        left, right = self.visit(node.left), self.visit(node.right)
+        if isinstance(node.op, ast.Div):
+            return ast.copy_location(
+                ast.Call(func=ast.Name(id="_safe_divide", ctx=ast.Load()), args=[left, right], keywords=[]),
+                node
+            )
+        node.left, node.right = left, right
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        if not isinstance(node.op, _ALLOWED_UNARY_OPERATORS):
+            self._reject(node.op)
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            self._reject(node)
+        return node
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        return self._lookup(node.id, node)
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        if not isinstance(node.value, ast.Name):
+            self._reject(node)
+        return self._lookup(f"{node.value.id}.{node.attr}", node)
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        self._reject(node)
+
+
+class Formula:
+    """Expresión compilada con las referencias que necesita."""
+
+    __slots__ = ("expression", "references", "_code")
+
+    def __init__(self, expression: str, references: FrozenSet[str], code):
+        self.expression = expression
+        self.references = references
+        self._code = code
+
+    def evaluate(self, values: Dict[str, Any]):
+        """
+        Evalúa la fórmula.
+
+        Args:
+            values: {referencia: valor}; los valores pueden ser números, None
+                o arrays de numpy (evaluación de muchas filas a la vez)
+
+        Returns:
+            float o array de numpy; NaN donde el resultado no está definido
+        """
+        return eval(self._code, {"__builtins__": {}, "_safe_divide": _safe_divide}, {
+            "_v": {key: _as_number(values.get(key)) for key in self.references}
+        })
+
+    def __repr__(self) -> str:
+        return f"Formula({self.expression!r})"
+
+
+def _as_number(value):
+    """Convierte un valor de entrada a float o array de floats (NaN si falta)."""
+    if isinstance(value, np.ndarray):
+        return value.astype(float, copy=False)
+    if value is None or value == "" or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+@lru_cache(maxsize=None)
+def compile_formula(expression: str) -> Formula:
+    """
+    Compila una expresión de tablas.yaml (una sola vez por texto).
+
+    Raises:
+        FormulaError: Si la expresión no es válida
+    """
+    try:
+        tree = ast.parse(str(expression).strip(), mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"Error de sintaxis en la fórmula '{expression}': {e.msg}")
+
+    rewriter = _ReferenceRewriter(expression)
+    tree = ast.fix_missing_locations(rewriter.visit(tree))
+    return Formula(expression, frozenset(rewriter.references), compile(tree, "<formula>", "eval"))
+
+
+class FormulaGraph:
+    """
+    Fórmulas de una tabla ordenadas por dependencias.
+
+    Los nodos son celdas "fila.columna"; las referencias que no son nodos son
+    entradas (valores introducidos por el usuario).
+    """
+
+    def __init__(self, formulas: Dict[str, str]):
+        """
+        Args:
+            formulas: {"fila.columna": expresión}
+
+        Raises:
+            FormulaError: Si alguna expresión no es válida o hay dependencias circulares
+        """
+        self.formulas: Dict[str, Formula] = {
+            node: compile_formula(expression) for node, expression in formulas.items()
+        }
+
+        sorter = TopologicalSorter({
+            node: [ref for ref in formula.references if ref in self.formulas]
+            for node, formula in self.formulas.items()
+        })
+        try:
+            self.order: Tuple[str, ...] = tuple(sorter.static_order())
+        except CycleError as e:
+            raise FormulaError(f"Dependencia circular entre fórmulas: {' -> '.join(e.args[1])}")
+
+        self.inputs: FrozenSet[str] = frozenset(
+            ref for formula in self.formulas.values() for ref in formula.references
+            if ref not in self.formulas
+        )
+
+    def __len__(self) -> int:
+        return len(self.formulas)
+
+    def evaluate(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Evalúa todas las fórmulas en orden de dependencias.
+
+        Args:
+            values: Valores de las entradas {"fila.columna": valor}
+
+        Returns:
+            {"fila.columna": resultado} de cada nodo
+        """
+        scope = dict(values)
+        results = {}
+        for node in self.order:
+            results[node] = scope[node] = self.formulas[node].evaluate(scope)
+        return results
+
+
+def _same_value(a, b) -> bool:
+    """Compara dos valores de celda considerando iguales dos NaN."""
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        try:
+            return np.array_equal(np.asarray(a, dtype=float), np.asarray(b, dtype=float), equal_nan=True)
+        except (TypeError, ValueError):
+            return False
+    a, b = _as_number(a), _as_number(b)
+    return a == b or (np.isnan(a) and np.isnan(b))
+
+
+class FormulaEvaluator:
+    """
+    Evaluación incremental de un FormulaGraph.
+
+    Guarda las entradas y resultados de la última evaluación y solo recalcula
+    los nodos con alguna referencia cambiada (directamente o a través de otro
+    nodo cuyo resultado ha cambiado). Pensado para la UI, que vuelve a
+    evaluar la tabla en cada interacción.
+    """
+
+    def __init__(self, graph: FormulaGraph):
+        self.graph = graph
+        self._inputs: Dict[str, Any] = {}
+        self._results: Dict[str, Any] = {}
+        # Nodos recalculados en la última llamada a evaluate
+        self.recomputed: List[str] = []
+
+    def evaluate(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Evalúa las fórmulas reutilizando los resultados que no dependen de cambios.
+
+        Args:
+            values: Valores de las entradas {"fila.columna": valor}
+
+        Returns:
+            {"fila.columna": resultado} de cada nodo
+        """
+        changed = {
+            key for key in self.graph.inputs
+            if key not in self._inputs or not _same_value(values.get(key), self._inputs[key])
+        }
+        scope = {key: values.get(key) for key in self.graph.inputs}
+        self.recomputed = []
+
+        for node in self.graph.order:
+            formula = self.graph.formulas[node]
+            if node not in self._results or formula.references & changed:
+                result = formula.evaluate({**scope, **self._results})
+                self.recomputed.append(node)
+                if node not in self._results or not _same_value(result, self._results[node]):
+                    changed.add(node)
+                self._results[node] = result
+
+        self._inputs = scope
+        return dict(self._results)
+
+
+def _row_formulas(table_cfg: dict) -> Tuple[Tuple[str, str], ...]:
+    """Fórmulas de las filas calculadas: (("fila.columna", expresión), ...)."""
+    formulas = []
+    for row_cfg in table_cfg.get("rows", []):
+        for key, expression in row_cfg.items():
+            if key.endswith(ROW_FORMULA_SUFFIX) and key != ROW_FORMULA_SUFFIX:
+                column = key[:-len(ROW_FORMULA_SUFFIX)]
+                formulas.append((f"{row_cfg['id']}.{column}", expression))
+    return tuple(formulas)
+
+
+@lru_cache(maxsize=None)
+def _graph_for(formulas: Tuple[Tuple[str, str], ...]) -> FormulaGraph:
+    return FormulaGraph(dict(formulas))
+
+
+def table_formula_graph(table_cfg: dict) -> FormulaGraph:
+    """
+    Grafo de las fórmulas de filas (<columna>_formula) de una tabla.
+
+    Se construye una sola vez por conjunto de fórmulas, de modo que validar la
+    configuración al cargarla deja el grafo listo para TableBuilder y la UI.
+
+    Raises:
+        FormulaError: Si alguna fórmula no es válida
+    """
+    return _graph_for(_row_formulas(table_cfg))
+
+
+def column_formulas(table_cfg: dict) -> Dict[str, Formula]:
+    """
+    Fórmulas de columna (clave formula) compiladas: {id_columna: Formula}.
+
+    Se evalúan con arrays de las columnas de la tabla, una vez para todas las filas.
+    """
+    return {
+        col["id"]: compile_formula(col["formula"])
+        for col in table_cfg.get("columns", [])
+        if col.get("formula")
+    }
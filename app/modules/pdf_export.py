@@ -0,0 +1,723 @@
+"""
+Conversión de .docx a PDF con un pool de procesos de LibreOffice (soffice).
+
+Arrancar `soffice --headless --convert-to pdf` en frío por cada documento
+cuesta varios segundos: crear el perfil de usuario, cargar la aplicación y,
+por último, convertir. El pool mantiene un número acotado de soffice
+residentes (`--headless --accept=pipe,...`), cada uno con su propio perfil
+(dos soffice no pueden compartirlo), y les reparte las conversiones: el
+cliente UNO carga el documento en un proceso ya arrancado y lo exporta.
+
+El cliente necesita los bindings de Python de LibreOffice (módulo `uno`,
+paquete python3-uno en Linux). Sin ellos el pool está desactivado y el
+registro pasa a SofficeCliConverter: un `soffice --convert-to` por
+documento, de uno en uno.
+
+Un worker cuyo proceso ha muerto se reinicia con un perfil nuevo antes de
+convertir; si una conversión falla o supera el tiempo máximo, el proceso se
+termina y la conversión se reintenta una vez en uno nuevo. Cada resultado
+indica el tiempo de espera en cola y el de conversión.
+
+LibreOffice es el primero de los conversores del registro (ConverterRegistry),
+que se resuelve una sola vez por proceso sin accesos a red: si no está
+instalado se usan docx2pdf (Microsoft Word) o pandoc, en ese orden.
+"""
+import atexit
+import importlib.util
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:  # LibreOffice sin bindings de Python (lo habitual en pip)
+    uno = None
+    PropertyValue = None
+
+# Rutas habituales de soffice cuando no está en el PATH
+SOFFICE_CANDIDATES = (
+    "soffice",
+    "libreoffice",
+    "/Applications/LibreOffice.app/Contents/MacOS/soffice",
+    r"C:\Program Files\LibreOffice\program\soffice.exe",
+    r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+)
+
+# Procesos de LibreOffice del pool compartido
+DEFAULT_POOL_SIZE = 2
+
+# Segundos máximos que se espera a que un soffice residente acepte conexiones
+STARTUP_TIMEOUT = 60
+
+# Segundos máximos por conversión
+CONVERSION_TIMEOUT = 180
+
+
+def find_soffice() -> Optional[str]:
+    """Devuelve la ruta del ejecutable de LibreOffice, o None si no está instalado."""
+    for candidate in SOFFICE_CANDIDATES:
+        path = shutil.which(candidate)
+        if path:
+            return path
+        if os.path.isabs(candidate) and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+class PdfConversion:
+    """Resultado de una conversión del pool."""
+
+    def __init__(
+        self,
+        pdf_bytes: bytes,
+        queue_wait: float,
+        conversion: float,
+        worker_id: int,
+        attempts: int,
+        backend: str = "soffice"
+    ):
+        """
+        Args:
+            pdf_bytes: Documento PDF
+            queue_wait: Segundos esperando un worker libre
+            conversion: Segundos de conversión (incluye reinicios y reintentos)
+            worker_id: Worker que hizo la conversión
+            attempts: Intentos necesarios (2 si hubo que reiniciar el worker)
+            backend: Conversor del registro que generó el PDF
+        """
+        self.pdf_bytes = pdf_bytes
+        self.queue_wait = queue_wait
+        self.conversion = conversion
+        self.worker_id = worker_id
+        self.attempts = attempts
+        self.backend = backend
+
+    @property
+    def timings(self) -> dict:
+        """Tiempos con el formato de ReportResult.timings."""
+        return {"pdf_queue_wait": self.queue_wait, "pdf_conversion": self.conversion}
+
+
+class SofficeWorker:
+    """Un soffice residente, con su propio perfil, al que se convierte por UNO."""
+
+    def __init__(self, worker_id: int, soffice_path: str, timeout: float):
+        """
+        Args:
+            worker_id: Número del worker dentro del pool
+            soffice_path: Ejecutable de LibreOffice
+            timeout: Segundos máximos por conversión
+        """
+        self.worker_id = worker_id
+        self.soffice_path = soffice_path
+        self.timeout = timeout
+        self.profile_dir: Optional[Path] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.pipe_name = f"pt_soffice_{os.getpid()}_{worker_id}"
+        self._desktop = None
+        self.conversions = 0
+
+    @property
+    def started(self) -> bool:
+        return self.profile_dir is not None
+
+    def is_alive(self) -> bool:
+        """True si el soffice residente sigue en marcha y conectado."""
+        return self.process is not None and self.process.poll() is None and self._desktop is not None
+
+    def start(self):
+        """
+        Crea el perfil del worker, arranca soffice escuchando en su pipe y se conecta.
+
+        Raises:
+            RuntimeError: Si LibreOffice no arranca o no acepta la conexión UNO
+        """
+        self.profile_dir = Path(tempfile.mkdtemp(prefix=f"pt_soffice_profile_{self.worker_id}_"))
+        try:
+            self.process = subprocess.Popen(
+                [
+                    self.soffice_path,
+                    f"-env:UserInstallation={self.profile_dir.as_uri()}",
+                    "--headless", "--invisible", "--nologo", "--nodefault",
+                    "--norestore", "--nolockcheck",
+                    f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            raise RuntimeError(f"No se pudo ejecutar LibreOffice: {e}")
+        self._desktop = self._connect()
+
+    def _connect(self):
+        """Espera a que el soffice residente acepte conexiones y devuelve su Desktop."""
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext")
+                return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("LibreOffice no aceptó conexiones UNO")
+                time.sleep(0.2)
+
+    def stop(self):
+        """Termina el proceso y borra el perfil."""
+        self._desktop = None
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+            self.process = None
+        if self.profile_dir is not None:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def restart(self):
+        """Reinicia el worker con un perfil nuevo."""
+        self.stop()
+        self.start()
+
+    def convert(self, docx_path: Path, pdf_path: Path):
+        """
+        Convierte un .docx a PDF cargándolo en el soffice residente.
+
+        Raises:
+            RuntimeError: Si la conversión falla o supera el tiempo máximo
+        """
+        def prop(name, value):
+            return PropertyValue(Name=name, Value=value)
+
+        # Si la conversión se cuelga, matar el proceso interrumpe la llamada UNO
+        watchdog = threading.Timer(self.timeout, self.process.kill)
+        watchdog.start()
+        try:
+            document = self._desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(str(docx_path)), "_blank", 0, (prop("Hidden", True),)
+            )
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(str(pdf_path)), (prop("FilterName", "writer_pdf_Export"),)
+                )
+            finally:
+                document.close(True)
+        except Exception as e:
+            raise RuntimeError(f"LibreOffice falló al convertir: {e}")
+        finally:
+            watchdog.cancel()
+
+        if not pdf_path.exists():
+            raise RuntimeError("LibreOffice no generó el PDF")
+        self.conversions += 1
+
+
+class SofficePool:
+    """Pool acotado de SofficeWorker compartible entre hilos."""
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        soffice_path: str = None,
+        timeout: float = CONVERSION_TIMEOUT
+    ):
+        """
+        Args:
+            size: Número máximo de procesos de LibreOffice
+            soffice_path: Ejecutable de LibreOffice (por defecto, find_soffice())
+            timeout: Segundos máximos por conversión (y de espera en cola)
+
+        Raises:
+            RuntimeError: Si LibreOffice o su módulo uno no están instalados
+        """
+        if uno is None:
+            raise RuntimeError(
+                "El pool de LibreOffice necesita los bindings de Python de LibreOffice "
+                "(módulo uno, paquete python3-uno)"
+            )
+        self.soffice_path = soffice_path or find_soffice()
+        if not self.soffice_path:
+            raise RuntimeError(
+                "LibreOffice no está instalado (se necesita soffice para exportar a PDF)"
+            )
+        self.size = size
+        self.timeout = timeout
+
+        self.workers = [SofficeWorker(i, self.soffice_path, timeout) for i in range(size)]
+        self._idle: "queue.Queue[SofficeWorker]" = queue.Queue()
+        for worker in self.workers:
+            self._idle.put(worker)
+
+        self._lock = threading.Lock()
+        self._closed = False
+        self.conversions = 0
+        self.failures = 0
+        self.restarts = 0
+        self.queue_wait_total = 0.0
+        self.conversion_total = 0.0
+
+    def start(self):
+        """
+        Arranca a la vez los workers libres que no están en marcha.
+
+        Raises:
+            RuntimeError: Si algún worker no arranca
+        """
+        workers = []
+        while True:
+            try:
+                workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        errors = []
+
+        def start_worker(worker: SofficeWorker):
+            try:
+                self._ensure_running(worker)
+            except RuntimeError as e:
+                worker.stop()
+                errors.append(e)
+
+        threads = [threading.Thread(target=start_worker, args=(worker,)) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for worker in workers:
+            self._idle.put(worker)
+
+        if errors:
+            raise errors[0]
+
+    def convert(self, docx_bytes: bytes) -> PdfConversion:
+        """
+        Convierte un documento con el primer worker libre.
+
+        Raises:
+            RuntimeError: Si no hay worker libre a tiempo o la conversión falla
+                también tras reiniciar el worker
+        """
+        if self._closed:
+            raise RuntimeError("El pool de LibreOffice está cerrado")
+
+        wait_start = time.perf_counter()
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No hay ningún proceso de LibreOffice libre tras {self.timeout} s")
+        queue_wait = time.perf_counter() - wait_start
+
+        conversion_start = time.perf_counter()
+        try:
+            with tempfile.TemporaryDirectory(prefix="pt_pdf_") as tmp:
+                docx_path = Path(tmp) / "documento.docx"
+                pdf_path = Path(tmp) / "documento.pdf"
+                docx_path.write_bytes(docx_bytes)
+
+                attempts = 0
+                while True:
+                    attempts += 1
+                    try:
+                        self._ensure_running(worker)
+                        worker.convert(docx_path, pdf_path)
+                        break
+                    except RuntimeError:
+                        # Proceso caído o colgado: perfil nuevo y un único reintento
+                        worker.stop()
+                        with self._lock:
+                            if attempts >= 2:
+                                self.failures += 1
+                                raise
+                            self.restarts += 1
+
+                pdf_bytes = pdf_path.read_bytes()
+        finally:
+            self._idle.put(worker)
+
+        conversion = time.perf_counter() - conversion_start
+        with self._lock:
+            self.conversions += 1
+            self.queue_wait_total += queue_wait
+            self.conversion_total += conversion
+
+        return PdfConversion(pdf_bytes, queue_wait, conversion, worker.worker_id, attempts)
+
+    def _ensure_running(self, worker: SofficeWorker):
+        """Arranca el worker si aún no lo está o reinicia el que haya muerto."""
+        if worker.is_alive():
+            return
+        if worker.started:
+            with self._lock:
+                self.restarts += 1
+        worker.restart()
+
+    def stats(self) -> dict:
+        """Contadores y tiempos acumulados del pool."""
+        with self._lock:
+            return {
+                "workers": self.size,
+                "alive": sum(worker.is_alive() for worker in self.workers),
+                "busy": self.size - self._idle.qsize(),
+                "conversions": self.conversions,
+                "failures": self.failures,
+                "restarts": self.restarts,
+                "queue_wait_s": self.queue_wait_total,
+                "conversion_s": self.conversion_total,
+            }
+
+    def shutdown(self):
+        """Termina todos los procesos (espera a que acaben las conversiones en curso)."""
+        self._closed = True
+        for _ in self.workers:
+            self._idle.get().stop()
+
+
+_pool: Optional[SofficePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> SofficePool:
+    """
+    Devuelve el pool compartido por el proceso (se crea en el primer uso).
+
+    Raises:
+        RuntimeError: Si LibreOffice o su módulo uno no están instalados
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SofficePool(size=DEFAULT_POOL_SIZE)
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+class PdfConverter(ABC):
+    """
+    Conversor a PDF del registro.
+
+    probe() solo mira lo que ya está instalado (nunca descarga ni instala
+    nada); health_check() ejecuta la herramienta para confirmar que funciona.
+    Las subclases deben implementar probe() y convert().
+    """
+
+    name = ""
+
+    @abstractmethod
+    def probe(self) -> Optional[str]:
+        """
+        Returns:
+            None si el conversor está disponible, o el motivo por el que no
+        """
+
+    def health_check(self) -> Optional[str]:
+        """Como probe(), pero ejecutando la herramienta si hace falta."""
+        return self.probe()
+
+    @abstractmethod
+    def convert(self, docx_bytes: bytes) -> PdfConversion:
+        """
+        Raises:
+            RuntimeError: Si la conversión falla
+        """
+
+
+def _convert_in_temp_dir(backend: str, docx_bytes: bytes, convert_file) -> PdfConversion:
+    """Ejecuta convert_file(docx_path, pdf_path) en una carpeta temporal."""
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="pt_pdf_") as tmp:
+        docx_path = Path(tmp) / "documento.docx"
+        pdf_path = Path(tmp) / "documento.pdf"
+        docx_path.write_bytes(docx_bytes)
+        try:
+            convert_file(docx_path, pdf_path)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"{backend} falló al convertir: {e}")
+        if not pdf_path.exists():
+            raise RuntimeError(f"{backend} no generó el PDF")
+        pdf_bytes = pdf_path.read_bytes()
+    return PdfConversion(pdf_bytes, 0.0, time.perf_counter() - start, 0, 1, backend)
+
+
+def _soffice_health_check() -> Optional[str]:
+    """Ejecuta `soffice --version` para confirmar que LibreOffice funciona."""
+    soffice_path = find_soffice()
+    if not soffice_path:
+        return "LibreOffice (soffice) no está instalado"
+    try:
+        result = subprocess.run([soffice_path, "--version"], capture_output=True, timeout=STARTUP_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return f"soffice --version falló: {e}"
+    if result.returncode != 0:
+        return f"soffice --version terminó con código {result.returncode}"
+    return None
+
+
+class SofficeConverter(PdfConverter):
+    """LibreOffice a través del pool compartido de soffice residentes (get_pdf_pool)."""
+
+    name = "soffice"
+
+    def probe(self) -> Optional[str]:
+        if not find_soffice():
+            return "LibreOffice (soffice) no está instalado"
+        if uno is None:
+            return "pool desactivado: falta el módulo uno de LibreOffice (python3-uno)"
+        return None
+
+    def health_check(self) -> Optional[str]:
+        # Arranca los workers: la primera conversión ya encuentra el pool caliente
+        reason = self.probe()
+        if reason is not None:
+            return reason
+        try:
+            get_pdf_pool().start()
+        except RuntimeError as e:
+            return str(e)
+        return None
+
+    def convert(self, docx_bytes: bytes) -> PdfConversion:
+        return get_pdf_pool().convert(docx_bytes)
+
+
+class SofficeCliConverter(PdfConverter):
+    """
+    LibreOffice sin pool: un `soffice --convert-to` en frío por documento.
+
+    Se usa cuando el pool no está disponible (sin el módulo uno). Todas las
+    conversiones comparten el perfil de usuario por defecto, así que se hacen
+    de una en una.
+    """
+
+    name = "soffice-cli"
+    _lock = threading.Lock()
+
+    def probe(self) -> Optional[str]:
+        return None if find_soffice() else "LibreOffice (soffice) no está instalado"
+
+    def health_check(self) -> Optional[str]:
+        return _soffice_health_check()
+
+    def convert(self, docx_bytes: bytes) -> PdfConversion:
+        with self._lock:
+            return _convert_in_temp_dir(self.name, docx_bytes, self._convert_file)
+
+    def _convert_file(self, docx_path: Path, pdf_path: Path):
+        soffice_path = find_soffice()
+        if not soffice_path:
+            raise RuntimeError("LibreOffice (soffice) no está instalado")
+        try:
+            result = subprocess.run(
+                [soffice_path, "--headless", "--convert-to", "pdf", "--outdir", str(pdf_path.parent), str(docx_path)],
+                capture_output=True, timeout=CONVERSION_TIMEOUT
+            )
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"LibreOffice superó el tiempo máximo de conversión ({CONVERSION_TIMEOUT} s)")
+        except OSError as e:
+            raise RuntimeError(f"No se pudo ejecutar LibreOffice: {e}")
+        if result.returncode != 0:
+            raise RuntimeError(f"LibreOffice falló al convertir: {result.stderr.decode(errors='replace').strip()}")
+        # --convert-to deja documento.pdf junto al .docx, que es pdf_path
+
+
+class Docx2PdfConverter(PdfConverter):
+    """docx2pdf, que automatiza Microsoft Word (solo Windows y macOS)."""
+
+    name = "docx2pdf"
+
+    def probe(self) -> Optional[str]:
+        if sys.platform not in ("win32", "darwin"):
+            return "docx2pdf necesita Microsoft Word (Windows o macOS)"
+        if importlib.util.find_spec("docx2pdf") is None:
+            return "docx2pdf no está instalado"
+        return None
+
+    def convert(self, docx_bytes: bytes) -> PdfConversion:
+        import docx2pdf
+
+        return _convert_in_temp_dir(
+            self.name, docx_bytes,
+            lambda docx_path, pdf_path: docx2pdf.convert(str(docx_path), str(pdf_path))
+        )
+
+
+class PandocConverter(PdfConverter):
+    """pandoc (vía pypandoc) con weasyprint como motor PDF; pandoc no se descarga."""
+
+    name = "pandoc"
+    PDF_ENGINE = "weasyprint"
+
+    def probe(self) -> Optional[str]:
+        if importlib.util.find_spec("pypandoc") is None:
+            return "pypandoc no está instalado"
+        import pypandoc
+
+        try:
+            pypandoc.get_pandoc_path()
+        except OSError:
+            return "pandoc no está instalado"
+        if not shutil.which(self.PDF_ENGINE):
+            return f"{self.PDF_ENGINE} no está instalado (motor PDF de pandoc)"
+        return None
+
+    def convert(self, docx_bytes: bytes) -> PdfConversion:
+        import pypandoc
+
+        return _convert_in_temp_dir(
+            self.name, docx_bytes,
+            lambda docx_path, pdf_path: pypandoc.convert_file(
+                str(docx_path), "pdf", outputfile=str(pdf_path),
+                extra_args=[f"--pdf-engine={self.PDF_ENGINE}"]
+            )
+        )
+
+
+# Conversores en orden de preferencia (el primero disponible atiende las peticiones)
+CONVERTER_PRIORITY = (SofficeConverter, SofficeCliConverter, Docx2PdfConverter, PandocConverter)
+
+
+class ConverterRegistry:
+    """
+    Conversores a PDF disponibles, resueltos una sola vez.
+
+    discover() comprueba cada conversor de CONVERTER_PRIORITY (sin red) y
+    guarda el resultado; las conversiones van directamente al primero
+    disponible. Si uno falla y su health check también, se marca como no
+    disponible y se prueba el siguiente.
+    """
+
+    def __init__(self, converters: List[PdfConverter] = None):
+        """
+        Args:
+            converters: Conversores en orden de prioridad (por defecto,
+                una instancia de cada clase de CONVERTER_PRIORITY)
+        """
+        self.converters = converters if converters is not None else [cls() for cls in CONVERTER_PRIORITY]
+        # {nombre: None si está disponible o motivo por el que no}
+        self.status: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def discover(self, health_check: bool = True) -> Dict[str, Optional[str]]:
+        """
+        Comprueba qué conversores están disponibles y guarda el resultado.
+
+        Args:
+            health_check: Ejecutar también el health check de los disponibles
+
+        Returns:
+            {nombre: None si está disponible o motivo por el que no}
+        """
+        status = {}
+        for converter in self.converters:
+            try:
+                reason = converter.probe()
+                if reason is None and health_check:
+                    reason = converter.health_check()
+            except Exception as e:
+                reason = f"{type(e).__name__}: {e}"
+            status[converter.name] = reason
+
+        with self._lock:
+            self.status = status
+        return dict(status)
+
+    @property
+    def discovered(self) -> bool:
+        return bool(self.status)
+
+    def available(self) -> List[PdfConverter]:
+        """Conversores disponibles, en orden de prioridad."""
+        with self._lock:
+            return [c for c in self.converters if c.name in self.status and self.status[c.name] is None]
+
+    def convert(self, docx_bytes: bytes) -> PdfConversion:
+        """
+        Convierte con el primer conversor disponible.
+
+        Raises:
+            RuntimeError: Si no hay conversores disponibles o todos fallan
+        """
+        if not self.discovered:
+            self.discover()
+
+        errors = []
+        for converter in self.available():
+            try:
+                return converter.convert(docx_bytes)
+            except RuntimeError as e:
+                errors.append(f"{converter.name}: {e}")
+                reason = converter.health_check()
+                if reason is not None:
+                    with self._lock:
+                        self.status[converter.name] = reason
+
+        if errors:
+            raise RuntimeError("La conversión a PDF falló.\n" + "\n".join(errors))
+
+        with self._lock:
+            reasons = "\n".join(f"• {name}: {reason}" for name, reason in self.status.items())
+        raise RuntimeError(
+            "No se encontró ninguna herramienta para convertir a PDF.\n"
+            f"{reasons}\n\n"
+            "Para exportar a PDF, instala LibreOffice (https://www.libreoffice.org/download/) "
+            "o descarga el archivo Word y guárdalo como PDF desde Word o LibreOffice."
+        )
+
+    def report(self) -> List[dict]:
+        """Filas {backend, priority, available, detail} para mostrar o registrar."""
+        with self._lock:
+            return [
+                {
+                    "backend": converter.name,
+                    "priority": priority,
+                    "available": converter.name in self.status and self.status[converter.name] is None,
+                    "detail": self.status.get(converter.name, "sin comprobar") or "",
+                }
+                for priority, converter in enumerate(self.converters, start=1)
+            ]
+
+
+_registry: Optional[ConverterRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_converter_registry() -> ConverterRegistry:
+    """
+    Devuelve el registro de conversores del proceso, descubierto en la primera llamada.
+
+    La app lo llama al arrancar para que ninguna petición pague las comprobaciones.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ConverterRegistry()
+            _registry.discover()
+        return _registry
+
+
+def convert_docx_to_pdf(docx_bytes: bytes) -> PdfConversion:
+    """
+    Convierte un .docx a PDF con el conversor preferido del registro.
+
+    Raises:
+        RuntimeError: Si no hay conversor disponible o la conversión falla
+    """
+    return get_converter_registry().convert(docx_bytes)
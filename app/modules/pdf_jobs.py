@@ -0,0 +1,143 @@
+"""
+Cola de conversiones a PDF en segundo plano.
+
+La app ofrece el .docx en cuanto se genera y encarga el PDF a esta cola: cada
+trabajo se identifica por el hash SHA-256 del .docx, de modo que pedir otra
+vez el PDF de un documento idéntico (por ejemplo, al volver a generar con los
+mismos datos o en cada rerun de Streamlit) reutiliza el trabajo en curso o ya
+terminado en lugar de convertir de nuevo.
+
+Los trabajos se ejecutan en hilos: la conversión ocurre en procesos externos
+(LibreOffice, Word o pandoc, según ConverterRegistry), así que el hilo solo
+espera.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from modules.pdf_export import DEFAULT_POOL_SIZE, PdfConversion, convert_docx_to_pdf
+
+
+def docx_key(docx_bytes: bytes) -> str:
+    """Clave de un trabajo: hash SHA-256 del contenido del .docx."""
+    return hashlib.sha256(docx_bytes).hexdigest()
+
+
+class PdfJob:
+    """Conversión a PDF encargada a la cola."""
+
+    def __init__(self, key: str, future: Future):
+        """
+        Args:
+            key: Hash del .docx (ver docx_key)
+            future: Future del ThreadPoolExecutor con el PdfConversion
+        """
+        self.key = key
+        self.future = future
+
+    @property
+    def status(self) -> str:
+        """'pending' (en cola o convirtiendo), 'done' o 'error'."""
+        if not self.future.done():
+            return "pending"
+        return "error" if self.future.exception() is not None else "done"
+
+    @property
+    def error(self) -> Optional[str]:
+        """Mensaje del error de conversión, o None si no ha fallado (o no ha terminado)."""
+        if not self.future.done() or self.future.exception() is None:
+            return None
+        return str(self.future.exception())
+
+    def result(self, timeout: float = None) -> PdfConversion:
+        """
+        Espera a que termine la conversión y devuelve su resultado.
+
+        Raises:
+            RuntimeError: Si la conversión ha fallado
+            concurrent.futures.TimeoutError: Si no termina en timeout segundos
+        """
+        return self.future.result(timeout)
+
+
+class PdfJobQueue:
+    """Ejecutor de conversiones a PDF que agrupa las peticiones del mismo .docx."""
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_POOL_SIZE,
+        max_jobs: int = 32,
+        convert: Callable[[bytes], PdfConversion] = convert_docx_to_pdf
+    ):
+        """
+        Args:
+            max_workers: Conversiones simultáneas (por defecto, tantas como
+                procesos tiene el pool de LibreOffice)
+            max_jobs: Trabajos terminados que se conservan (con su PDF) para
+                atender peticiones repetidas
+            convert: Función de conversión .docx -> PdfConversion
+        """
+        self.max_jobs = max_jobs
+        self.convert = convert
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf_job")
+        self._jobs: "OrderedDict[str, PdfJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+
+    def submit(self, docx_bytes: bytes) -> PdfJob:
+        """
+        Encarga la conversión de un .docx, o devuelve el trabajo ya existente.
+
+        Un trabajo pendiente o terminado con éxito para el mismo contenido se
+        reutiliza; uno que falló se vuelve a lanzar.
+
+        Returns:
+            Trabajo de la conversión (no espera a que termine)
+        """
+        key = docx_key(docx_bytes)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != "error":
+                self._jobs.move_to_end(key)
+                self.coalesced += 1
+                return job
+
+            job = PdfJob(key, self._executor.submit(self.convert, docx_bytes))
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            self.submitted += 1
+            self._evict()
+            return job
+
+    def get(self, key: str) -> Optional[PdfJob]:
+        """Devuelve el trabajo de un .docx por su clave, o None si no existe."""
+        with self._lock:
+            return self._jobs.get(key)
+
+    def _evict(self):
+        """Olvida los trabajos terminados más antiguos por encima de max_jobs (con el lock tomado)."""
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        for key in [key for key, job in self._jobs.items() if job.future.done()][:excess]:
+            del self._jobs[key]
+
+    def shutdown(self, wait: bool = True):
+        """Detiene el ejecutor (los trabajos en curso terminan si wait es True)."""
+        self._executor.shutdown(wait=wait)
+
+
+_job_queue: Optional[PdfJobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_pdf_job_queue() -> PdfJobQueue:
+    """Devuelve la cola de conversiones compartida por el proceso."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = PdfJobQueue()
+        return _job_queue
@@ -0,0 +1,299 @@
+"""
+Caché de informes generados indexada por el contenido de la petición.
+
+Pulsar "Generar Informe" varias veces con los mismos datos (por ejemplo, para
+volver a descargar) repite todo el pipeline. La clave de la caché es un hash
+SHA-256 de una representación canónica de todo lo que determina el documento:
+
+- hash de la plantilla, de los bloques condicionales declarados y de las
+  imágenes de fondo (por contenido, no por ruta ni fecha);
+- configuraciones YAML, simple_inputs, condition_inputs, table_inputs y
+  table_format_config serializados como JSON con claves ordenadas;
+- motor de Word y política de compresión.
+
+Los bytes del .docx se guardan en memoria con expulsión LRU limitada por
+tamaño total y, opcionalmente, en una carpeta en disco (también limitada por
+tamaño, expulsando los ficheros usados hace más tiempo).
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Cambiar al modificar el formato de la clave o el pipeline de generación
+CACHE_KEY_VERSION = 1
+
+_file_digests: Dict[str, Tuple[int, int, str]] = {}
+_file_digests_lock = threading.Lock()
+
+
+def file_digest(path: Path) -> Optional[str]:
+    """
+    Hash SHA-256 del contenido de un fichero.
+
+    Se recalcula solo si cambian su fecha de modificación o su tamaño.
+
+    Returns:
+        Hash en hexadecimal, o None si el fichero no existe
+    """
+    path = Path(path).resolve()
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+
+    key = str(path)
+    with _file_digests_lock:
+        cached = _file_digests.get(key)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    with _file_digests_lock:
+        _file_digests[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def _json_default(value):
+    """Serializa los tipos no JSON que pueden llegar en los datos de la UI."""
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise TypeError(f"Tipo no serializable en la clave de caché: {type(value).__name__}")
+
+
+def canonical_json(value) -> str:
+    """
+    Representación JSON canónica (claves ordenadas, sin espacios).
+
+    Raises:
+        TypeError: Si algún valor no tiene representación estable
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def report_cache_key(
+    simple_inputs: dict,
+    condition_inputs: dict,
+    table_inputs: dict,
+    table_format_config: dict,
+    configs: tuple,
+    options
+) -> Optional[str]:
+    """
+    Calcula la clave de caché de una petición de generación.
+
+    Args:
+        simple_inputs: Valores de variables simples
+        condition_inputs: Respuestas de las condiciones
+        table_inputs: Datos de tablas
+        table_format_config: Configuración de formato de tablas
+        configs: Tupla (cfg_simple, cfg_cond, cfg_tab)
+        options: ReportOptions de la generación
+
+    Returns:
+        Hash hexadecimal, o None si la petición no se puede cachear (datos no
+        serializables o plantilla inexistente)
+    """
+    template_digest = file_digest(options.template_path)
+    if template_digest is None:
+        return None
+
+    cfg_cond = configs[1]
+    block_digests = {
+        cond["word_file"]: file_digest(options.config_dir.parent / cond["word_file"])
+        for cond in cfg_cond.get("conditions", [])
+        if cond.get("word_file")
+    }
+
+    image_digests = [
+        file_digest(path) if path else None
+        for path in (options.first_page_image_path, options.last_page_image_path)
+    ]
+
+    policy = options.compression_policy
+    try:
+        payload = canonical_json({
+            "version": CACHE_KEY_VERSION,
+            "template": template_digest,
+            "blocks": block_digests,
+            "images": image_digests,
+            "engine": options.engine_class.__name__,
+            "compression": vars(policy) if policy is not None else None,
+            "configs": list(configs),
+            "simple_inputs": simple_inputs,
+            "condition_inputs": condition_inputs,
+            "table_inputs": table_inputs,
+            "table_format_config": table_format_config,
+        })
+    except (TypeError, ValueError):
+        return None
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """Caché LRU de documentos generados, limitada por tamaño en memoria y en disco."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        cache_dir: Path = None,
+        max_disk_bytes: int = 512 * 1024 * 1024
+    ):
+        """
+        Args:
+            max_bytes: Tamaño máximo total de los documentos en memoria
+            cache_dir: Carpeta para guardar también los documentos en disco
+                (None para usar solo memoria)
+            max_disk_bytes: Tamaño máximo total de los documentos en disco
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def size_bytes(self) -> int:
+        """Tamaño total de los documentos en memoria."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        disk_path = self._disk_path(key)
+        return key in self._entries or (disk_path is not None and disk_path.exists())
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return self.cache_dir / f"{key}.docx" if self.cache_dir is not None else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Devuelve el documento guardado para una clave.
+
+        Los documentos encontrados solo en disco se vuelven a cargar en memoria.
+
+        Returns:
+            Bytes del .docx, o None si no está en caché
+        """
+        with self._lock:
+            doc_bytes = self._entries.get(key)
+            if doc_bytes is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return doc_bytes
+
+        disk_path = self._disk_path(key)
+        if disk_path is not None:
+            try:
+                doc_bytes = disk_path.read_bytes()
+                os.utime(disk_path)
+            except OSError:
+                doc_bytes = None
+
+        with self._lock:
+            if doc_bytes is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store_in_memory(key, doc_bytes)
+            return doc_bytes
+
+    def put(self, key: str, doc_bytes: bytes):
+        """Guarda un documento (en memoria y, si se configuró, en disco)."""
+        with self._lock:
+            self._store_in_memory(key, doc_bytes)
+
+        if self.cache_dir is not None and len(doc_bytes) <= self.max_disk_bytes:
+            disk_path = self._disk_path(key)
+            tmp_path = disk_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(doc_bytes)
+            os.replace(tmp_path, disk_path)
+            self._evict_disk()
+
+    def _store_in_memory(self, key: str, doc_bytes: bytes):
+        """Añade una entrada y expulsa las menos usadas (con el lock tomado)."""
+        if len(doc_bytes) > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+
+        self._entries[key] = doc_bytes
+        self._size += len(doc_bytes)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _evict_disk(self):
+        """Borra los ficheros usados hace más tiempo hasta respetar max_disk_bytes."""
+        files = []
+        for path in self.cache_dir.glob("*.docx"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda item: item[0]):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def invalidate(self, key: Optional[str] = None):
+        """Elimina un documento de la caché (o todos si no se indica clave)."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._size = 0
+            else:
+                doc_bytes = self._entries.pop(key, None)
+                if doc_bytes is not None:
+                    self._size -= len(doc_bytes)
+
+        if self.cache_dir is None:
+            return
+        paths = self.cache_dir.glob("*.docx") if key is None else [self._disk_path(key)]
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+_report_cache = ReportCache()
+
+
+def get_report_cache() -> ReportCache:
+    """Devuelve la caché de informes compartida por el proceso (solo memoria)."""
+    return _report_cache
@@ -0,0 +1,260 @@
+"""
+Generación de informes sin dependencia de Streamlit.
+
+Contiene los pasos 1-13 del pipeline de `app.py` (tablas, contexto, motor de
+Word y limpieza final) para poder llamarlos desde la app, la generación por
+lotes o los benchmarks. No muestra mensajes ni lee st.session_state: todo lo
+que necesita llega en los argumentos y en ReportOptions.
+"""
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from modules.config_loader import ConfigLoader
+from modules.conditions import validate_conditions
+from modules.docx_package import CompressionPolicy
+from modules.pdf_export import convert_docx_to_pdf
+from modules.report_cache import ReportCache, report_cache_key
+from modules.simple_vars import validate_simple_vars
+from modules.tables import TableBuilder
+from modules.utils import build_full_context
+from modules.streaming_word_engine import StreamingWordEngine
+from modules.xml_word_engine_adapter import XMLWordEngineAdapter as WordEngine
+
+DEFAULT_CONFIG_DIR = Path(__file__).resolve().parent.parent / "config"
+
+
+class ReportOptions:
+    """Opciones de generación que en la app venían de la sesión o de rutas fijas."""
+
+    def __init__(
+        self,
+        config_dir: Path = None,
+        template_path: Path = None,
+        configs: tuple = None,
+        first_page_image_path: Path = None,
+        last_page_image_path: Path = None,
+        compression_policy: CompressionPolicy = None,
+        streaming: bool = False,
+        result_cache: ReportCache = None
+    ):
+        """
+        Args:
+            config_dir: Carpeta con los YAML (por defecto, app/config)
+            template_path: Plantilla Word (por defecto, config_dir/Plantilla.docx)
+            configs: Tupla (cfg_simple, cfg_cond, cfg_tab) ya cargada; si es None
+                se obtiene de la caché de ConfigLoader
+            first_page_image_path: Imagen de fondo de la primera página
+            last_page_image_path: Imagen de fondo de la última página
+            compression_policy: Política de compresión del .docx
+            streaming: Usar StreamingWordEngine (memoria acotada para plantillas
+                muy grandes) en lugar de XMLWordEngineAdapter
+            result_cache: Caché de documentos generados; si se indica, una
+                petición idéntica a una anterior devuelve el mismo .docx sin
+                volver a generarlo
+        """
+        self.config_dir = Path(config_dir) if config_dir else DEFAULT_CONFIG_DIR
+        self.template_path = Path(template_path) if template_path else self.config_dir / "Plantilla.docx"
+        self.configs = configs
+        self.first_page_image_path = first_page_image_path
+        self.last_page_image_path = last_page_image_path
+        self.compression_policy = compression_policy
+        self.streaming = streaming
+        self.result_cache = result_cache
+
+    @property
+    def engine_class(self) -> type:
+        """Motor de Word que se usa para generar el informe."""
+        return StreamingWordEngine if self.streaming else WordEngine
+
+    def load_configs(self) -> tuple:
+        """Devuelve (cfg_simple, cfg_cond, cfg_tab)."""
+        if self.configs is None:
+            return ConfigLoader(self.config_dir).load_all_configs(cached=True)
+        return self.configs
+
+
+class ReportResult:
+    """Resultado de generate_report."""
+
+    def __init__(
+        self,
+        doc_bytes: bytes,
+        timings: Dict[str, float],
+        engine: Optional[WordEngine],
+        cached: bool = False
+    ):
+        """
+        Args:
+            doc_bytes: Documento .docx generado
+            timings: {etapa: segundos}, en el orden de ejecución
+            engine: Motor usado (para get_pdf_bytes u otras exportaciones);
+                None si el documento viene de la caché de informes
+            cached: True si el documento se ha recuperado de la caché
+        """
+        self.doc_bytes = doc_bytes
+        self.timings = timings
+        self.engine = engine
+        self.cached = cached
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.timings.values())
+
+    @property
+    def engine_metrics(self) -> list:
+        """Filas de EngineMetrics.report() del motor (vacía si vino de la caché)."""
+        return self.engine.metrics.report() if self.engine is not None else []
+
+    def get_pdf_bytes(self) -> bytes:
+        """
+        Convierte el documento a PDF con el pool de LibreOffice.
+
+        Funciona con cualquier motor y con informes recuperados de la caché.
+        Añade a timings la espera en cola (pdf_queue_wait) y la conversión
+        (pdf_conversion).
+
+        Raises:
+            RuntimeError: Si LibreOffice no está instalado o la conversión falla
+        """
+        conversion = convert_docx_to_pdf(self.doc_bytes)
+        self.timings.update(conversion.timings)
+        return conversion.pdf_bytes
+
+
+def validate_report_inputs(
+    cfg_simple: dict,
+    cfg_cond: dict,
+    simple_inputs: dict,
+    condition_inputs: dict
+) -> List[str]:
+    """
+    Valida variables simples y condiciones antes de generar.
+
+    Returns:
+        Lista de errores (vacía si todo es válido)
+    """
+    errors = validate_simple_vars(cfg_simple, simple_inputs)
+    errors.extend(validate_conditions(cfg_cond, condition_inputs))
+    return errors
+
+
+def report_filename(simple_inputs: dict, extension: str = "docx") -> str:
+    """Nombre de descarga del informe: Informe_PT_<compañía>_<ejercicio>.<ext>"""
+    nombre_empresa = simple_inputs.get("nombre_compania", "Empresa")
+    ejercicio = simple_inputs.get("ejercicio_completo", "2023")
+    return f"Informe_PT_{nombre_empresa.replace(' ', '_')}_{ejercicio}.{extension}"
+
+
+def generate_report(
+    simple_inputs: dict,
+    condition_inputs: dict,
+    table_inputs: dict,
+    table_format_config: dict,
+    options: ReportOptions = None
+) -> ReportResult:
+    """
+    Genera el informe Word completo.
+
+    Args:
+        simple_inputs: Valores de variables simples
+        condition_inputs: Respuestas de las condiciones
+        table_inputs: Datos de tablas
+        table_format_config: Configuración de formato de tablas
+        options: Opciones de generación (por defecto, ReportOptions())
+
+    Returns:
+        ReportResult con los bytes del .docx y el tiempo de cada etapa
+
+    Raises:
+        FileNotFoundError: Si no existe la plantilla.
+    """
+    options = options or ReportOptions()
+    timings = {}
+
+    def _stage(name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        return result
+
+    cfg_simple, cfg_cond, cfg_tab = _stage("load_configs", options.load_configs)
+
+    # 0. Devolver el documento de una petición idéntica anterior
+    cache_key = None
+    if options.result_cache is not None:
+        cache_key = _stage(
+            "result_cache_key",
+            report_cache_key,
+            simple_inputs, condition_inputs, table_inputs, table_format_config,
+            (cfg_simple, cfg_cond, cfg_tab), options
+        )
+        if cache_key is not None:
+            cached_bytes = _stage("result_cache_get", options.result_cache.get, cache_key)
+            if cached_bytes is not None:
+                return ReportResult(cached_bytes, timings, None, cached=True)
+
+    # 1. Construir tablas
+    table_builder = TableBuilder(cfg_tab, simple_inputs)
+    tables_data = _stage("build_tables", table_builder.build_all_tables, table_inputs)
+
+    # 2. Construir contexto completo
+    context, docs_to_insert = _stage(
+        "build_context",
+        build_full_context,
+        cfg_simple, cfg_cond, cfg_tab, simple_inputs, condition_inputs, table_inputs
+    )
+
+    # 3. Cargar plantilla y crear motor de Word
+    if not options.template_path.exists():
+        raise FileNotFoundError(f"Plantilla no encontrada: {options.template_path}")
+
+    engine = _stage("load_template", options.engine_class, options.template_path)
+
+    # 4. Reemplazar variables simples
+    _stage("replace_variables", engine.replace_variables, context)
+
+    # 5. Insertar tablas
+    _stage("insert_tables", engine.insert_tables, tables_data, cfg_tab, table_format_config)
+
+    # 6. Insertar bloques condicionales
+    _stage("insert_conditional_blocks", engine.insert_conditional_blocks, docs_to_insert, options.config_dir)
+
+    # 6.1. Eliminar secciones específicas cuando la condición es "No"
+    if condition_inputs.get("desarrollo_discrepancias_formales", "No") != "Sí":
+        _stage("remove_discrepancias_formales_section", engine.remove_discrepancias_formales_section)
+
+    # 7. Procesar marcadores {salto}
+    _stage("process_salto_markers", engine.process_salto_markers)
+
+    # 8. Procesar índice (tabla de contenidos)
+    _stage("process_table_of_contents", engine.process_table_of_contents)
+
+    # 9. Limpieza final - eliminar TODOS los marcadores << >> y los párrafos
+    # vacíos en un solo recorrido (clean_unused_markers + clean_empty_paragraphs)
+    _stage("clean_document", engine.clean_document)
+
+    # 10. Eliminar líneas vacías al inicio de páginas
+    _stage("remove_empty_lines_at_page_start", engine.remove_empty_lines_at_page_start)
+
+    # 11. Eliminar páginas vacías del documento
+    _stage("remove_empty_pages", engine.remove_empty_pages)
+
+    # 12. Preservar headers y footers
+    _stage("preserve_headers_and_footers", engine.preserve_headers_and_footers)
+
+    # 12.5 Insertar imágenes de fondo si están configuradas
+    for image_path, page_type in (
+        (options.first_page_image_path, "first"),
+        (options.last_page_image_path, "last"),
+    ):
+        if image_path and Path(image_path).exists():
+            _stage("insert_background_image", engine.insert_background_image, Path(image_path), page_type)
+
+    # 13. Obtener el documento como bytes
+    doc_bytes = _stage("get_document_bytes", engine.get_document_bytes, options.compression_policy)
+
+    if cache_key is not None:
+        options.result_cache.put(cache_key, doc_bytes)
+
+    return ReportResult(doc_bytes, timings, engine)
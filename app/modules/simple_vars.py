@@ -3,6 +3,8 @@ Módulo para manejar variables simples.
 """
 from typing import Dict, Any
 
+from modules.config_model import simple_vars_model
+
 
 def get_default_values(cfg_simple: dict) -> dict:
     """
@@ -14,29 +16,7 @@ def get_default_values(cfg_simple: dict) -> dict:
     Returns:
         Diccionario con valores por defecto
     """
-    defaults = {}
-
-    for var in cfg_simple.get("simple_variables", []):
-        var_id = var["id"]
-        var_type = var.get("type", "text")
-
-        # Valores por defecto según el tipo
-        if var_type == "text":
-            defaults[var_id] = ""
-        elif var_type == "long_text":
-            defaults[var_id] = ""
-        elif var_type == "number":
-            defaults[var_id] = 0.0
-        elif var_type == "percent":
-            defaults[var_id] = 0.0
-        elif var_type == "integer":
-            defaults[var_id] = 0
-        elif var_type == "email":
-            defaults[var_id] = ""
-        else:
-            defaults[var_id] = ""
-
-    return defaults
+    return dict(simple_vars_model(cfg_simple).defaults)
 
 
 def validate_simple_vars(cfg_simple: dict, inputs: dict) -> list:
@@ -52,35 +32,16 @@ def validate_simple_vars(cfg_simple: dict, inputs: dict) -> list:
     """
     errors = []
 
-    for var in cfg_simple.get("simple_variables", []):
-        var_id = var["id"]
-        label = var["label"]
-        var_type = var.get("type", "text")
-        marker = var.get("marker")
-        optional = var.get("optional", False)
-
-        value = inputs.get(var_id)
+    for var in simple_vars_model(cfg_simple).variables:
+        value = inputs.get(var.id)
 
         # Si tiene marcador y NO es opcional, es requerido
-        if marker is not None and not optional:
-            if value is None or (isinstance(value, str) and not value.strip()):
-                errors.append(f"El campo '{label}' es requerido")
-                continue
+        if var.required and (value is None or (isinstance(value, str) and not value.strip())):
+            errors.append(var.required_error)
+            continue
 
         # Validar tipos
-        if value is not None and value != "":
-            if var_type == "email":
-                if "@" not in str(value):
-                    errors.append(f"El campo '{label}' debe ser un email válido")
-            elif var_type in ["number", "percent"]:
-                try:
-                    float(value)
-                except (ValueError, TypeError):
-                    errors.append(f"El campo '{label}' debe ser un número")
-            elif var_type == "integer":
-                try:
-                    int(value)
-                except (ValueError, TypeError):
-                    errors.append(f"El campo '{label}' debe ser un número entero")
+        if var.is_valid is not None and value is not None and value != "" and not var.is_valid(value):
+            errors.append(var.type_error)
 
     return errors
@@ -0,0 +1,625 @@
+"""
+Motor de Word en streaming para plantillas muy grandes.
+
+StreamingWordEngine tiene la misma interfaz que XMLWordEngineAdapter, pero no
+carga word/document.xml completo en memoria. Los métodos de cada etapa solo
+registran la operación; get_document_bytes() y save() recorren el XML con
+etree.iterparse y procesan cada elemento de primer nivel del cuerpo (párrafo
+o tabla) junto con lo que se inserta a partir de él (tablas, bloques
+condicionales). Después lo escriben en la salida y lo liberan.
+
+La memoria depende del mayor elemento de primer nivel y de los bloques que se
+insertan, no del tamaño del documento. Del documento completo solo se guarda
+un byte por párrafo (si tiene salto de página), necesario para numerar el
+índice.
+
+Cuando hay que procesar el índice el recorrido se hace en dos pasadas:
+1. Reemplazo de variables, tablas, bloques, secciones eliminadas y {salto}.
+   El resultado va a un fichero temporal y se anotan los saltos de página y la
+   posición de los marcadores numéricos.
+2. Números de página del índice y limpieza final de marcadores y párrafos
+   vacíos, escribiendo ya el document.xml del paquete de salida.
+Sin índice, todo se aplica en una sola pasada.
+
+Las operaciones se aplican siempre en el orden del pipeline de
+generate_report, con la misma semántica que XMLWordEngineAdapter.
+"""
+import re
+import tempfile
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+from modules.docx_package import DEFAULT_COMPRESSION_POLICY, CompressionPolicy
+from modules.engine_metrics import instrumented
+from modules.template_cache import (
+    DOCUMENT_PART,
+    DOCUMENT_RELS_PART,
+    W_NS,
+    BlockFragmentCache,
+    find_story_parts,
+)
+from modules.xml_word_engine_adapter import (
+    INDEXED_MARKER_PATTERN,
+    XMLWordEngineAdapter,
+)
+
+# Marcadores numéricos del índice (<<1>>, <<2>>, ...)
+TOC_MARKER_PATTERN = re.compile(r'<<(\d+)>>')
+NUMERIC_MARKER_PATTERN = re.compile(r'<<\d+>>')
+
+DISCREPANCIAS_FORMALES_TARGETS = [
+    "Anexo IV – Discrepancias formales",
+    "Anexo IV - Discrepancias formales"
+]
+
+# Tamaño a partir del cual el resultado intermedio pasa de memoria a disco
+DEFAULT_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+
+class TocPlan:
+    """
+    Datos del índice reunidos en la primera pasada.
+
+    Replica process_table_of_contents de XMLWordEngineAdapter. Las posiciones
+    son ordinales de los párrafos de primer nivel del cuerpo.
+    """
+
+    def __init__(self):
+        self.page_breaks = bytearray()
+        self.start = None
+        self.end = None
+        # [(posición, título, marcador)] de las entradas entre inicio y fin
+        self.entries = []
+        self.marker_positions: Dict[str, int] = {}
+        self._pending = set()
+
+    def observe(self, position: int, text: str, has_page_break: bool):
+        """Registra un párrafo de primer nivel (en orden de documento)."""
+        self.page_breaks.append(has_page_break)
+
+        if self.end is None:
+            if "<<Indice>>" in text:
+                self.start = position
+                self.entries = []
+            elif "<<fin Indice>>" in text:
+                self.end = position
+                self._pending = {marker for _, _, marker in self.entries}
+            elif self.start is not None and text.strip():
+                match = TOC_MARKER_PATTERN.search(text)
+                if match:
+                    title = TOC_MARKER_PATTERN.sub('', text).strip()
+                    self.entries.append((position, title, f"<<{match.group(1)}>>"))
+            return
+
+        if not self._pending or '<<' not in text:
+            return
+
+        for match in INDEXED_MARKER_PATTERN.finditer(text):
+            marker = match.group(0)
+            if marker in self._pending:
+                self.marker_positions[marker] = position
+                self._pending.discard(marker)
+
+    @property
+    def found(self) -> bool:
+        return self.start is not None and self.end is not None
+
+    def resolve(self) -> dict:
+        """
+        Calcula las operaciones de la segunda pasada.
+
+        Returns:
+            Diccionario con breaks_at_end, breaks_at_start (posiciones que reciben
+            un salto de página), entry_texts ({posición: texto nuevo o None para
+            eliminar la entrada}) y break_before_toc (posición o None)
+        """
+        flags = bytearray(self.page_breaks)
+        breaks_at_end = set()
+        breaks_at_start = set()
+
+        # Fase 1: saltos antes de cada marcador, en el orden del índice
+        for _, _, marker in self.entries:
+            i = self.marker_positions.get(marker)
+            if i is None or flags[i] or (i > 0 and flags[i - 1]):
+                continue
+            if i > 0:
+                breaks_at_end.add(i - 1)
+                flags[i - 1] = 1
+            else:
+                breaks_at_start.add(i)
+                flags[i] = 1
+
+        # Fase 2: página de cada marcador con el acumulado de saltos
+        wanted = set(self.marker_positions.values())
+        page_at = {}
+        page_count = 1
+        for i, has_break in enumerate(flags):
+            page_count += has_break
+            if i in wanted:
+                page_at[i] = page_count
+
+        entry_texts = {}
+        for position, title, marker in self.entries:
+            if marker in self.marker_positions:
+                page_num = page_at[self.marker_positions[marker]]
+                entry_texts[position] = XMLWordEngineAdapter._toc_entry_text(title, page_num)
+            else:
+                entry_texts[position] = None
+
+        return {
+            "breaks_at_end": breaks_at_end,
+            "breaks_at_start": breaks_at_start,
+            "entry_texts": entry_texts,
+            "break_before_toc": self.start - 1 if self.start > 0 else None,
+        }
+
+
+class StreamingWordEngine(XMLWordEngineAdapter):
+    """
+    Motor compatible con XMLWordEngineAdapter que procesa document.xml en streaming.
+
+    Reutiliza las operaciones por párrafo del adaptador. No mantiene el árbol
+    completo ni el índice de marcadores: cada elemento de primer nivel se
+    procesa en un contenedor propio y se escribe en cuanto está listo.
+    """
+
+    def __init__(
+        self,
+        template_path: Path,
+        block_cache: BlockFragmentCache = None,
+        spool_max_size: int = DEFAULT_SPOOL_MAX_SIZE
+    ):
+        """
+        Args:
+            template_path: Ruta a la plantilla Word (.docx)
+            block_cache: Caché de bloques condicionales (por defecto, la del proceso)
+            spool_max_size: Bytes del resultado intermedio que se mantienen en
+                memoria antes de pasar a un fichero temporal
+        """
+        # El índice de marcadores queda vacío: los párrafos se buscan en el
+        # contenedor de cada elemento
+        self._init_engine_state(template_path, block_cache)
+        self.spool_max_size = spool_max_size
+        self.parser = etree.XMLParser(remove_blank_text=False, strip_cdata=False)
+
+        # Headers, footers y notas son pequeños: se procesan en memoria
+        with zipfile.ZipFile(self.template_path, 'r') as zip_ref:
+            names = set(zip_ref.namelist())
+            rels = zip_ref.read(DOCUMENT_RELS_PART) if DOCUMENT_RELS_PART in names else None
+            self.story_trees = {
+                part_name: etree.parse(BytesIO(zip_ref.read(part_name)), self.parser)
+                for part_name in find_story_parts(rels)
+                if part_name in names
+            }
+
+        # Operaciones registradas por las etapas
+        self._replacements = None
+        self._tables: Dict[str, tuple] = {}
+        self._blocks: List[tuple] = []
+        self._remove_discrepancias = False
+        self._process_salto = False
+        self._process_toc = False
+        self._clean_markers = False
+        self._clean_empty = False
+
+    # ------------------------------------------------------------------
+    # Etapas: solo registran la operación
+    # ------------------------------------------------------------------
+
+    @instrumented
+    def replace_variables(self, context: dict):
+        """Registra los reemplazos y los aplica ya a headers, footers y notas."""
+        super().replace_variables(context)
+        self._replacements = self._compile_replacements(context)
+
+    def _iter_story_roots(self):
+        # document.xml se procesa durante el recorrido en streaming
+        for part_name, tree in self.story_trees.items():
+            yield part_name, tree.getroot()
+
+    @instrumented
+    def insert_tables(self, tables_data: dict, cfg_tab: dict, table_format_config: dict = None):
+        """Registra las tablas a insertar (ver XMLWordEngineAdapter.insert_tables)."""
+        for marker, table_data in tables_data.items():
+            self._tables[marker] = (table_data, table_format_config)
+
+    @instrumented
+    def insert_conditional_blocks(self, docs_to_insert: list, config_dir: Path):
+        """Registra los bloques condicionales a insertar."""
+        for doc_info in docs_to_insert:
+            self._blocks.append((doc_info['marker'], Path(config_dir).parent / doc_info['file']))
+
+    @instrumented
+    def remove_discrepancias_formales_section(self):
+        self._remove_discrepancias = True
+
+    @instrumented
+    def process_salto_markers(self):
+        self._process_salto = True
+
+    @instrumented
+    def process_table_of_contents(self):
+        self._process_toc = True
+
+    @instrumented
+    def clean_unused_markers(self):
+        self._clean_markers = True
+
+    @instrumented
+    def clean_empty_paragraphs(self):
+        self._clean_empty = True
+
+    @instrumented
+    def clean_document(self):
+        self._clean_markers = True
+        self._clean_empty = True
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    @instrumented
+    def get_document_bytes(self, compression_policy: CompressionPolicy = None) -> bytes:
+        """
+        Genera el documento y lo devuelve como bytes.
+
+        Args:
+            compression_policy: Compresión por tipo de parte
+        """
+        output = BytesIO()
+        self.save(output, compression_policy)
+        return output.getvalue()
+
+    @instrumented
+    def save(self, output, compression_policy: CompressionPolicy = None):
+        """
+        Genera el documento escribiéndolo directamente en output.
+
+        A diferencia de XMLWordEngineAdapter, las partes de la plantilla se
+        vuelven a comprimir al copiarlas (según la política) porque el paquete
+        se escribe con zipfile a medida que se genera.
+
+        Args:
+            output: Ruta o fichero binario de destino
+            compression_policy: Compresión por tipo de parte
+        """
+        policy = compression_policy or DEFAULT_COMPRESSION_POLICY
+
+        if self._clean_markers:
+            self._remove_all_markers_from_headers_footers()
+
+        with zipfile.ZipFile(self.template_path, 'r') as source, \
+                zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED, compresslevel=policy.xml_level) as target:
+            for info in source.infolist():
+                if info.is_dir():
+                    continue
+
+                if info.filename == DOCUMENT_PART:
+                    with target.open(DOCUMENT_PART, 'w', force_zip64=True) as document_out:
+                        self._write_document(source, document_out)
+                    continue
+
+                if info.filename in self._dirty_story_parts:
+                    data = etree.tostring(
+                        self.story_trees[info.filename],
+                        encoding='UTF-8',
+                        xml_declaration=True,
+                        standalone=True,
+                        pretty_print=False
+                    )
+                else:
+                    data = source.read(info.filename)
+
+                compress_type, compresslevel = policy.settings_for(info.filename)
+                entry = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                entry.external_attr = info.external_attr
+                target.writestr(entry, data, compress_type=compress_type, compresslevel=compresslevel)
+
+    def _write_document(self, source: zipfile.ZipFile, document_out):
+        """Escribe word/document.xml procesado en una o dos pasadas."""
+        if not self._process_toc:
+            with source.open(DOCUMENT_PART) as document_in:
+                _stream_body(document_in, document_out, lambda unit: self._finish(self._build(unit)))
+            return
+
+        toc = TocPlan()
+
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_max_size) as spool:
+            with source.open(DOCUMENT_PART) as document_in:
+                _stream_body(document_in, spool, lambda unit: self._observe_toc(self._build(unit), toc))
+
+            plan = toc.resolve() if toc.found else None
+            position = [0]
+
+            def second_pass(unit):
+                if unit.tag == f'{{{self.w_ns}}}p':
+                    elements = self._apply_toc_plan(unit, position[0], plan, toc)
+                    position[0] += 1
+                else:
+                    if plan is not None and toc.entries:
+                        self._strip_numeric_markers_in(unit)
+                    elements = [unit]
+                return self._finish(elements)
+
+            spool.seek(0)
+            _stream_body(spool, document_out, second_pass)
+
+    # ------------------------------------------------------------------
+    # Operaciones sobre cada elemento de primer nivel
+    # ------------------------------------------------------------------
+
+    def _build(self, unit: etree.Element) -> List[etree.Element]:
+        """
+        Primera fase: variables, tablas, bloques, secciones eliminadas y {salto}.
+
+        Returns:
+            Elementos de primer nivel resultantes, en orden
+        """
+        p_tag = f'{{{self.w_ns}}}p'
+        container = self._container_for(unit)
+
+        # Las vistas solo sirven mientras se procesa el elemento
+        self._paragraph_views.clear()
+
+        if self._replacements is not None:
+            for para in unit.iter(p_tag):
+                self._replace_in_paragraph(para, self._replacements)
+
+        # Las tablas se buscan solo en el contenido de la plantilla (como en el
+        # adaptador, donde se insertan antes que los bloques). El texto del
+        # elemento descarta de una vez los marcadores ausentes
+        text = self._container_text(container)
+        for marker in [m for m in self._tables if m in text]:
+            target_para = self._find_in(container, marker)
+            if target_para is not None:
+                table_data, format_config = self._tables.pop(marker)
+                self._insert_table_after_paragraph(target_para, marker, table_data, format_config)
+
+        # Cada bloque se busca también en los bloques insertados antes que él
+        remaining = []
+        for marker, block_file in self._blocks:
+            target_para = self._find_in(container, marker) if marker in text else None
+            if target_para is None:
+                remaining.append((marker, block_file))
+                continue
+
+            block = self.block_cache.get(block_file)
+            if block is not None:
+                self._insert_block_after_paragraph(target_para, marker, block)
+                text = self._container_text(container)
+        self._blocks = remaining
+
+        if self._remove_discrepancias:
+            for para in list(container.iter(p_tag)):
+                para_text = self._get_paragraph_text(para)
+                if any(target in para_text for target in DISCREPANCIAS_FORMALES_TARGETS):
+                    self._remove_paragraph(para)
+
+        if self._process_salto:
+            for para in list(container.iter(p_tag)):
+                self._process_salto_in_paragraph(para)
+
+        return self._detach_children(container)
+
+    def _container_text(self, container: etree.Element) -> str:
+        """Texto de todos los párrafos del contenedor (un marcador nunca cruza párrafos)."""
+        return '\n'.join(
+            self._get_paragraph_text(para) for para in container.iter(f'{{{self.w_ns}}}p')
+        )
+
+    def _find_in(self, container: etree.Element, marker: str) -> Optional[etree.Element]:
+        """Primer párrafo del contenedor (en orden de documento) que contiene el marcador."""
+        for para in container.iter(f'{{{self.w_ns}}}p'):
+            if marker in self._get_paragraph_text(para):
+                return para
+        return None
+
+    def _observe_toc(self, elements: List[etree.Element], toc: TocPlan) -> List[etree.Element]:
+        """Anota los párrafos de primer nivel para calcular el índice."""
+        position = len(toc.page_breaks)
+        for elem in elements:
+            if elem.tag == f'{{{self.w_ns}}}p':
+                toc.observe(position, self._get_paragraph_text(elem), self._has_page_break_xml(elem))
+                position += 1
+        return elements
+
+    def _apply_toc_plan(
+        self,
+        para: etree.Element,
+        position: int,
+        plan: Optional[dict],
+        toc: TocPlan
+    ) -> List[etree.Element]:
+        """Segunda fase para un párrafo de primer nivel: saltos y entradas del índice."""
+        if plan is None:
+            return [para]
+
+        container = self._container_for(para)
+
+        if not toc.entries:
+            # Índice sin entradas: solo se quitan los marcadores de inicio y fin
+            if position == toc.start:
+                self._remove_marker_from_paragraph(para, "<<Indice>>")
+            if position == toc.end:
+                self._remove_marker_from_paragraph(para, "<<fin Indice>>")
+            return self._detach_children(container)
+
+        if position in plan["breaks_at_end"]:
+            self._insert_page_break_at_end_of_paragraph(para)
+        if position in plan["breaks_at_start"]:
+            self._insert_page_break_at_start_of_paragraph(para)
+
+        if position in plan["entry_texts"]:
+            new_text = plan["entry_texts"][position]
+            if new_text is None:
+                self._remove_paragraph(para)
+                return []
+            self._set_paragraph_text(para, new_text)
+
+        self._strip_numeric_markers_in(para)
+
+        for toc_position, marker in ((toc.start, "<<Indice>>"), (toc.end, "<<fin Indice>>")):
+            if position == toc_position:
+                self._remove_marker_from_paragraph(para, marker)
+                if not self._get_paragraph_text(para).strip():
+                    self._remove_paragraph(para)
+                    return []
+
+        if position == plan["break_before_toc"]:
+            self._insert_page_break_at_end_of_paragraph(para)
+
+        return self._detach_children(container)
+
+    def _strip_numeric_markers_in(self, elem: etree.Element):
+        """
+        Elimina los marcadores numéricos de los párrafos de un elemento.
+
+        Como _remove_numeric_markers_xml: solo se tocan los párrafos cuyo texto
+        contiene un marcador numérico, y en ellos cada nodo de texto por separado.
+        """
+        for para in list(elem.iter(f'{{{self.w_ns}}}p')):
+            if not NUMERIC_MARKER_PATTERN.search(self._get_paragraph_text(para)):
+                continue
+
+            changed = False
+            for text_elem in para.iter(f'{{{self.w_ns}}}t'):
+                if text_elem.text and NUMERIC_MARKER_PATTERN.search(text_elem.text):
+                    text_elem.text = NUMERIC_MARKER_PATTERN.sub('', text_elem.text)
+                    self.metrics.touch()
+                    changed = True
+            if changed:
+                self._invalidate_views(para)
+
+    def _finish(self, elements: List[etree.Element]) -> List[etree.Element]:
+        """Limpieza final (clean_document) de los elementos de primer nivel."""
+        if self._clean_markers or self._clean_empty:
+            kept = []
+            for elem in elements:
+                if elem.tag == f'{{{self.w_ns}}}p':
+                    if self._clean_markers and self._clean_paragraph_markers(elem):
+                        continue
+                    if self._clean_empty and self._is_removable_empty_paragraph(elem):
+                        continue
+                elif self._clean_markers:
+                    for table in elem.iter(f'{{{self.w_ns}}}tbl'):
+                        self._strip_markers_from_table(table)
+                kept.append(elem)
+            elements = kept
+
+        # Las vistas solo sirven mientras se procesa el elemento
+        self._paragraph_views.clear()
+        return elements
+
+    def _container_for(self, unit: etree.Element) -> etree.Element:
+        """
+        Mueve un elemento de primer nivel a un w:body propio.
+
+        El contenedor declara los mismos namespaces que el documento para que
+        lxml no tenga que redeclararlos al mover el elemento.
+        """
+        container = etree.Element(f'{{{self.w_ns}}}body', nsmap=unit.nsmap)
+        container.append(unit)
+        return container
+
+    @staticmethod
+    def _detach_children(container: etree.Element) -> List[etree.Element]:
+        elements = list(container)
+        for elem in elements:
+            container.remove(elem)
+        return elements
+
+    # El índice de marcadores no existe en este motor
+    def _index_paragraph(self, para: etree.Element, para_text: str = None, keep_order: bool = False):
+        pass
+
+    def _index_element(self, elem: etree.Element):
+        pass
+
+
+def _namespace_scope(elem: etree.Element) -> etree.Element:
+    """Elemento vacío con las declaraciones de namespace vigentes en elem."""
+    return etree.Element(elem.tag, nsmap=elem.nsmap)
+
+
+def _serialize(elem: etree.Element, scope: etree.Element) -> bytes:
+    """
+    Serializa un elemento sin repetir las declaraciones de namespace del documento.
+
+    Suelto, lxml escribe en la etiqueta de apertura de un subelemento todas las
+    declaraciones que hereda de sus ancestros. Como hijo de scope (ver
+    _namespace_scope) solo declara las que scope no tiene, que son las que aún
+    no están en la salida. El elemento sale de su árbol.
+    """
+    scope.append(elem)
+    data = etree.tostring(scope, encoding='UTF-8')
+    scope.remove(elem)
+    # scope solo tiene declaraciones (sin texto): su etiqueta de apertura
+    # termina en el primer '>' y la de cierre es la última
+    return data[data.index(b'>') + 1:data.rindex(b'</')]
+
+
+def _open_and_close_tags(tag: str, attrib: dict, nsmap: dict, scope: etree.Element = None) -> tuple:
+    """Etiquetas de apertura y cierre de un elemento contenedor (hijo de scope, si lo hay)."""
+    if scope is None:
+        shell = etree.Element(tag, attrib=dict(attrib), nsmap=nsmap)
+        shell.text = ''
+        data = etree.tostring(shell, encoding='UTF-8')
+    else:
+        own_nsmap = {prefix: uri for prefix, uri in nsmap.items() if scope.nsmap.get(prefix) != uri}
+        shell = etree.SubElement(scope, tag, attrib=dict(attrib), nsmap=own_nsmap)
+        shell.text = ''
+        data = _serialize(shell, scope)
+    close_at = data.rindex(b'</')
+    return data[:close_at], data[close_at:]
+
+
+def _stream_body(source, sink, process_unit):
+    """
+    Copia un document.xml de source a sink procesando el cuerpo elemento a elemento.
+
+    Args:
+        source: Fichero binario con el XML de entrada
+        sink: Fichero binario de salida
+        process_unit: Función que recibe cada hijo de w:body ya completo y
+            devuelve la lista de elementos a escribir en su lugar
+    """
+    body_tag = f'{{{W_NS}}}body'
+    depth = 0
+    root_close = body_close = None
+    root_scope = body_scope = None
+
+    context = etree.iterparse(
+        source, events=('start', 'end'), remove_blank_text=False, strip_cdata=False
+    )
+    for event, elem in context:
+        if event == 'start':
+            depth += 1
+            if depth == 1:
+                sink.write(b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n")
+                root_open, root_close = _open_and_close_tags(elem.tag, elem.attrib, elem.nsmap)
+                sink.write(root_open)
+                root_scope = _namespace_scope(elem)
+            elif depth == 2 and elem.tag == body_tag:
+                body_open, body_close = _open_and_close_tags(elem.tag, elem.attrib, elem.nsmap, root_scope)
+                sink.write(body_open)
+                body_scope = _namespace_scope(elem)
+            continue
+
+        depth -= 1
+        if depth == 2 and elem.getparent().tag == body_tag:
+            for output_elem in process_unit(elem):
+                sink.write(_serialize(output_elem, body_scope))
+            if elem.getparent() is not None:
+                elem.getparent().remove(elem)
+        elif depth == 1:
+            if elem.tag == body_tag:
+                sink.write(body_close)
+                elem.getparent().remove(elem)
+            else:
+                sink.write(_serialize(elem, root_scope))
+        elif depth == 0:
+            sink.write(root_close)
@@ -4,6 +4,94 @@ según las configuraciones del YAML tablas.yaml.
 """
 import re
 from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.formulas import (
+    Formula,
+    FormulaEvaluator,
+    FormulaGraph,
+    column_formulas,
+    compile_formula,
+    table_formula_graph,
+)
+
+
+class TableFrame:
+    """
+    Filas de una tabla en un DataFrame para calcular por columnas.
+
+    Las sumas, los pesos sobre un total y las variaciones entre ejercicios se
+    calculan sobre columnas completas, sin recorrer las filas en Python. Las
+    filas originales no se modifican: los resultados se devuelven con tipos de
+    Python (int, float o None) para el motor de Word y la exportación a JSON.
+    """
+
+    def __init__(self, rows: List[dict], column_ids: List[str]):
+        """
+        Args:
+            rows: Filas de la tabla ({id_columna: valor})
+            column_ids: Columnas que se cargan en el DataFrame
+        """
+        self.rows = rows
+        if rows:
+            self.frame = pd.DataFrame.from_records(rows, columns=column_ids)
+        else:
+            self.frame = pd.DataFrame(columns=column_ids)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def numeric(self, col_id: str) -> pd.Series:
+        """Valores numéricos de una columna; los vacíos y no numéricos quedan como NaN."""
+        if col_id not in self.frame:
+            return pd.Series(float("nan"), index=self.frame.index)
+        return pd.to_numeric(self.frame[col_id], errors="coerce")
+
+    def sums(self, col_ids: List[str]) -> Dict[str, Any]:
+        """Total de cada columna (los valores vacíos cuentan como 0)."""
+        return {col_id: self.numeric(col_id).fillna(0).sum().item() for col_id in col_ids}
+
+    def evaluate(self, formula: Formula) -> List[Optional[float]]:
+        """
+        Evalúa una fórmula de columna para todas las filas a la vez.
+
+        Returns:
+            Lista alineada con las filas; None donde el resultado no está definido
+        """
+        result = formula.evaluate({
+            ref: self.numeric(ref).to_numpy(dtype=float) for ref in formula.references
+        })
+        return [None if np.isnan(value) else float(value) for value in np.broadcast_to(result, (len(self),))]
+
+    def variation(self, current_col: str, previous_col: str) -> List[Optional[float]]:
+        """
+        Variación porcentual (actual - anterior) / anterior * 100 de cada fila.
+
+        Returns:
+            Lista alineada con las filas; None si falta algún valor o el
+            anterior es 0
+        """
+        return self.evaluate(compile_formula(f"({current_col} - {previous_col}) / {previous_col} * 100"))
+
+    @staticmethod
+    def percent_of(totals: Dict[str, Any], references: Dict[str, Any]) -> Dict[str, Optional[float]]:
+        """
+        Peso de cada total sobre su referencia, en porcentaje.
+
+        Args:
+            totals: {id_columna: total}
+            references: {id_columna: valor de referencia}
+
+        Returns:
+            {id_columna: porcentaje}; None si la referencia falta o es 0
+        """
+        col_ids = list(totals)
+        values = pd.to_numeric(pd.Series([totals[c] for c in col_ids], index=col_ids), errors="coerce")
+        bases = pd.to_numeric(pd.Series([references.get(c) for c in col_ids], index=col_ids), errors="coerce")
+        result = values / bases.where(bases != 0) * 100
+        return {col_id: None if pd.isna(value) else float(value) for col_id, value in result.items()}
 
 
 class TableBuilder:
@@ -149,43 +237,32 @@ class TableBuilder:
         )
 
         data = table_inputs.get("partidas_contables", {})
+        rows_cfg = cfg.get("rows", [])
+        year_columns = ["ejercicio_actual", "ejercicio_anterior"]
 
-        rows = []
-        for row_cfg in cfg.get("rows", []):
-            row_id = row_cfg["id"]
-            label = row_cfg["label"]
-            input_mode = row_cfg.get("input_mode", "manual")
-
-            row_data = {"partida": label}
-
-            if input_mode == "manual":
-                vals = data.get(row_id, {})
-                ea = vals.get("ejercicio_actual")
-                ep = vals.get("ejercicio_anterior")
-            else:  # calculated
-                # Calcular según fórmulas
-                vals = data.get(row_id, {})
-                ea = vals.get("ejercicio_actual")
-                ep = vals.get("ejercicio_anterior")
-
-                # Nota: las fórmulas se evaluarán después con acceso a otras filas
-                # Por simplicidad, aquí asumimos que ya vienen calculadas del UI
-
-            row_data["ejercicio_actual"] = ea
-            row_data["ejercicio_anterior"] = ep
-
-            # Calcular variación si está configurado
-            if row_cfg.get("calculate_variacion", False):
-                if ea is not None and ep is not None and ep != 0:
-                    variacion = ((ea - ep) / ep) * 100
-                    row_data["variacion"] = variacion
-                else:
-                    row_data["variacion"] = None
-            else:
-                row_data["variacion"] = None
+        # Filas calculadas: fórmulas de tablas.yaml en orden de dependencias.
+        # Si una fórmula no da resultado (faltan datos) se usa el valor recibido
+        calculated = table_formula_graph(cfg).evaluate({
+            f"{row_id}.{col_id}": vals.get(col_id)
+            for row_id, vals in data.items() for col_id in year_columns
+        })
 
+        rows = []
+        for row_cfg in rows_cfg:
+            vals = data.get(row_cfg["id"], {})
+            row_data = {"partida": row_cfg["label"]}
+            for col_id in year_columns:
+                value = calculated.get(f"{row_cfg['id']}.{col_id}")
+                row_data[col_id] = vals.get(col_id) if value is None or np.isnan(value) else value
             rows.append(row_data)
 
+        # Columnas con fórmula (variación): una evaluación para todas las filas,
+        # que solo se muestra en las filas con calculate_<columna>
+        frame = TableFrame(rows, year_columns)
+        for col_id, formula in column_formulas(cfg).items():
+            for row_data, row_cfg, value in zip(rows, rows_cfg, frame.evaluate(formula)):
+                row_data[col_id] = value if row_cfg.get(f"calculate_{col_id}", False) else None
+
         return {marker: {
             "table_id": "partidas_contables",
             "headers": {
@@ -222,42 +299,49 @@ class TableBuilder:
                     cleaned.append(row)
             rows = cleaned
 
-        # Calcular totales
+        frame = TableFrame(rows, [col["id"] for col in cfg["columns"]])
+        partidas = table_inputs.get("partidas_contables", {})
+
+        # Calcular totales y pesos. value_type (tablas.yaml) indica cómo se
+        # formatean las columnas calculadas de cada fila de footer
         footer_rows = []
+        footer_column_types = []
+        totals = {}
         for footer_cfg in cfg.get("footer_rows", []):
+            value_type = footer_cfg.get("value_type")
             if footer_cfg["row_type"] == "sum":
-                sum_row = {"tipo_operacion": footer_cfg["label"]}
-
-                for col_id in footer_cfg["sum_columns"]:
-                    total = sum(row.get(col_id, 0) or 0 for row in rows)
-                    sum_row[col_id] = total
-
-                footer_rows.append(sum_row)
+                totals = frame.sums(footer_cfg["sum_columns"])
+                footer_rows.append({"tipo_operacion": footer_cfg["label"], **totals})
+                footer_column_types.append({col_id: value_type for col_id in totals} if value_type else {})
 
             elif footer_cfg["row_type"] == "percent_of_total":
-                # Calcular pesos como porcentaje del total
                 peso_row = {"tipo_operacion": footer_cfg["label"]}
+                col_ids = footer_cfg.get("sum_columns", list(totals))
+                column_totals = {col_id: totals.get(col_id, 0) for col_id in col_ids}
+
+                # Referencia de cada columna: la partida contable indicada en
+                # reference_rows o, sin ella, la suma de los totales de la fila
+                reference_rows = footer_cfg.get("reference_rows")
+                if reference_rows:
+                    references = {
+                        col_id: partidas.get(reference_rows.get(col_id), {}).get("ejercicio_actual")
+                        for col_id in col_ids
+                    }
+                else:
+                    grand_total = sum(value or 0 for value in column_totals.values())
+                    references = {col_id: grand_total for col_id in col_ids}
 
-                # Obtener los totales del footer anterior
-                if footer_rows:
-                    total_row = footer_rows[0]
-
-                    for col_id in footer_cfg.get("sum_columns", footer_cfg.get("columns", [])):
-                        total = total_row.get(col_id, 0)
-                        if total != 0:
-                            # Aquí podríamos calcular pesos, pero necesitaríamos un total de referencia
-                            # Por simplicidad, dejamos vacío o calculamos después
-                            peso_row[col_id] = ""
-                        else:
-                            peso_row[col_id] = ""
-
+                weights = TableFrame.percent_of(column_totals, references)
+                peso_row.update({col_id: "" if value is None else value for col_id, value in weights.items()})
                 footer_rows.append(peso_row)
+                footer_column_types.append({col_id: value_type for col_id in col_ids} if value_type else {})
 
         return {marker: {
             "table_id": "operaciones_vinculadas",
             "columns": cfg.get("columns", []),
             "rows": rows,
-            "footer_rows": footer_rows
+            "footer_rows": footer_rows,
+            "footer_column_types": footer_column_types
         }}
 
     def build_cumplimiento_table(self, table_id: str, table_inputs: dict) -> dict:
@@ -292,23 +376,62 @@ def calculate_formulas(rows_data: List[dict], formulas: dict) -> List[dict]:
     Calcula las fórmulas de las filas calculadas.
 
     Args:
-        rows_data: Lista de filas con datos
-        formulas: Diccionario con fórmulas a evaluar
+        rows_data: Lista de filas con datos (cada una con su "id")
+        formulas: Diccionario {"fila.columna": expresión} con las fórmulas a evaluar
 
     Returns:
-        Lista de filas con valores calculados
+        Lista de filas con valores calculados (None si la fórmula no da resultado)
+
+    Raises:
+        FormulaError: Si alguna fórmula no es válida
     """
     # Crear un diccionario de acceso rápido por id de fila
-    rows_by_id = {}
-    for row in rows_data:
-        if "id" in row:
-            rows_by_id[row["id"]] = row
-
-    # Evaluar fórmulas
-    for row in rows_data:
-        if "formula" in row:
-            # Aquí se evaluaría la fórmula
-            # Por simplicidad, esto se manejará en el UI
-            pass
+    rows_by_id = {row["id"]: row for row in rows_data if "id" in row}
+
+    values = {
+        f"{row_id}.{col_id}": value
+        for row_id, row in rows_by_id.items()
+        for col_id, value in row.items() if col_id != "id"
+    }
+    results = FormulaGraph(formulas).evaluate(values)
+
+    for node, value in results.items():
+        row_id, col_id = node.split(".", 1)
+        if row_id in rows_by_id:
+            rows_by_id[row_id][col_id] = None if np.isnan(value) else value
 
     return rows_data
+
+
+def calculate_partidas_rows(cfg: dict, data: dict, evaluator: FormulaEvaluator = None) -> dict:
+    """
+    Calcula las filas calculadas de partidas contables (OM, NCP...) como la UI.
+
+    Las fórmulas de tablas.yaml ya dan el porcentaje (* 100). Si una fórmula no
+    da resultado (denominador cero o faltan datos) la fila se muestra con 0,
+    y TableBuilder conserva ese valor recibido de la UI al generar el informe.
+
+    Args:
+        cfg: Configuración de partidas_contables en tablas.yaml
+        data: {fila: {columna: valor}} de las filas manuales
+        evaluator: FormulaEvaluator del grafo de la tabla, para recalcular solo
+            lo que cambia entre reruns (si es None se evalúa el grafo completo)
+
+    Returns:
+        {fila: {"ejercicio_actual": valor, "ejercicio_anterior": valor}}
+    """
+    values = {
+        f"{row_id}.{col_id}": value
+        for row_id, row_values in data.items() for col_id, value in row_values.items()
+    }
+    results = (evaluator or table_formula_graph(cfg)).evaluate(values)
+
+    calculated = {}
+    for row_cfg in cfg.get("rows", []):
+        if row_cfg.get("input_mode") != "calculated":
+            continue
+        calculated[row_cfg["id"]] = {}
+        for col_id in ("ejercicio_actual", "ejercicio_anterior"):
+            value = results.get(f"{row_cfg['id']}.{col_id}")
+            calculated[row_cfg["id"]][col_id] = 0 if value is None or np.isnan(value) else value
+    return calculated
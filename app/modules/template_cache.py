@@ -0,0 +1,363 @@
+"""
+Cachés de plantillas Word (.docx) y de bloques condicionales compartidas por
+todo el proceso.
+
+Cada plantilla se descomprime y se parsea una sola vez: la caché guarda el árbol
+de word/document.xml ya parseado, los árboles de headers, footers y notas
+(descubiertos en word/_rels/document.xml.rels), los bytes del resto de partes
+del paquete y las entradas originales del zip aún comprimidas (para
+reempaquetar sin recomprimir lo que no cambia).
+Cada generación recibe una copia profunda del árbol (operación en C de lxml,
+mucho más barata que descomprimir y volver a parsear), de modo que varios
+usuarios de la app Streamlit pueden generar informes a la vez sin repetir el
+trabajo ni compartir estado mutable.
+
+Los bloques de condiciones/*.docx se guardan de la misma forma: el cuerpo ya
+parseado y sin sectPr, listo para copiarse en cada informe.
+"""
+import hashlib
+import posixpath
+import threading
+import zipfile
+from collections import OrderedDict
+from copy import deepcopy
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+from modules.docx_package import RawZipEntry, read_raw_entries
+
+DOCUMENT_PART = 'word/document.xml'
+DOCUMENT_RELS_PART = 'word/_rels/document.xml.rels'
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+# Tipos de relación (último segmento del atributo Type) de las partes con texto
+# propio fuera de document.xml
+STORY_RELATIONSHIP_TYPES = ('header', 'footer', 'footnotes', 'endnotes')
+
+
+def find_story_parts(rels_xml: Optional[bytes]) -> List[str]:
+    """
+    Obtiene las partes de headers, footers y notas referenciadas por document.xml.
+
+    Args:
+        rels_xml: Contenido de word/_rels/document.xml.rels (None si no existe)
+
+    Returns:
+        Nombres de parte dentro del paquete (ej: 'word/header1.xml'), en el
+        orden en que aparecen las relaciones y sin duplicados
+    """
+    if not rels_xml:
+        return []
+
+    part_names = []
+    for rel in etree.fromstring(rels_xml).iter(f'{{{RELS_NS}}}Relationship'):
+        rel_type = rel.get('Type', '').rsplit('/', 1)[-1]
+        target = rel.get('Target')
+        if rel_type not in STORY_RELATIONSHIP_TYPES or not target or rel.get('TargetMode') == 'External':
+            continue
+
+        # Los destinos son relativos a word/ salvo que empiecen por '/'
+        if target.startswith('/'):
+            part_name = target.lstrip('/')
+        else:
+            part_name = posixpath.normpath(posixpath.join(posixpath.dirname(DOCUMENT_PART), target))
+
+        if part_name not in part_names:
+            part_names.append(part_name)
+
+    return part_names
+
+
+class CachedTemplate:
+    """Plantilla descomprimida y parseada. Sus datos no deben modificarse."""
+
+    def __init__(
+        self,
+        path: Path,
+        mtime_ns: int,
+        size: int,
+        sha256: str,
+        raw_entries: List[RawZipEntry],
+        parts: Dict[str, bytes],
+        document_tree: etree._ElementTree,
+        story_trees: Dict[str, etree._ElementTree] = None
+    ):
+        """
+        Args:
+            path: Ruta absoluta de la plantilla
+            mtime_ns: Fecha de modificación del fichero al cargarlo
+            size: Tamaño en bytes del fichero al cargarlo
+            sha256: Hash del contenido del fichero
+            raw_entries: Entradas del zip original (aún comprimidas), en orden
+            parts: Bytes de cada parte excepto word/document.xml
+            document_tree: Árbol parseado de word/document.xml
+            story_trees: Árboles parseados de headers, footers y notas
+                ({nombre de parte: árbol}); sus bytes siguen también en parts
+        """
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+        self.raw_entries = raw_entries
+        self.part_names = [entry.name for entry in raw_entries]
+        self.parts = parts
+        self.document_tree = document_tree
+        self.story_trees = story_trees or {}
+
+        root = document_tree.getroot()
+        w_ns = root.nsmap.get('w', W_NS)
+        self.drawing_count = len(root.findall(f'.//{{{w_ns}}}drawing'))
+        self.section_count = len(root.findall(f'.//{{{w_ns}}}sectPr'))
+
+    def new_document_tree(self) -> etree._ElementTree:
+        """Devuelve una copia independiente del árbol de document.xml."""
+        return deepcopy(self.document_tree)
+
+    def new_story_trees(self) -> Dict[str, etree._ElementTree]:
+        """Devuelve copias independientes de los árboles de headers, footers y notas."""
+        return {name: deepcopy(tree) for name, tree in self.story_trees.items()}
+
+    def new_parts(self) -> Dict[str, bytes]:
+        """Devuelve un diccionario propio (los bytes son inmutables y se comparten)."""
+        return dict(self.parts)
+
+
+class TemplateCache:
+    """Caché de plantillas indexada por ruta + mtime + hash de contenido."""
+
+    def __init__(self, max_entries: int = 8):
+        """
+        Args:
+            max_entries: Número máximo de plantillas distintas en memoria
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.parser = etree.XMLParser(remove_blank_text=False, strip_cdata=False)
+
+    def get(self, template_path: Path) -> CachedTemplate:
+        """
+        Obtiene la plantilla, cargándola solo si no está en caché o ha cambiado.
+
+        Si cambian mtime o tamaño se vuelve a leer el fichero; si su hash coincide
+        con el de la entrada existente (p. ej. solo se tocó la fecha) se reutiliza
+        el árbol ya parseado.
+
+        Raises:
+            FileNotFoundError: Si la plantilla no existe.
+        """
+        path = Path(template_path).resolve()
+        if not path.exists():
+            raise FileNotFoundError(f"Plantilla no encontrada: {template_path}")
+
+        stat = path.stat()
+        key = str(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(key)
+                return entry
+
+            data = path.read_bytes()
+            sha256 = hashlib.sha256(data).hexdigest()
+
+            if entry is not None and entry.sha256 == sha256:
+                entry = CachedTemplate(
+                    path, stat.st_mtime_ns, stat.st_size, sha256,
+                    entry.raw_entries, entry.parts, entry.document_tree, entry.story_trees
+                )
+            else:
+                entry = self._load(path, stat.st_mtime_ns, stat.st_size, sha256, data)
+
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            return entry
+
+    def _load(self, path: Path, mtime_ns: int, size: int, sha256: str, data: bytes) -> CachedTemplate:
+        """Descomprime el paquete y parsea document.xml, headers, footers y notas."""
+        parts = {}
+        document_tree = None
+        raw_entries = read_raw_entries(data)
+
+        for entry in raw_entries:
+            if entry.name == DOCUMENT_PART:
+                document_tree = etree.parse(BytesIO(entry.read()), self.parser)
+            else:
+                parts[entry.name] = entry.read()
+
+        if document_tree is None:
+            raise ValueError(f"La plantilla no contiene {DOCUMENT_PART}: {path}")
+
+        story_trees = {
+            part_name: etree.parse(BytesIO(parts[part_name]), self.parser)
+            for part_name in find_story_parts(parts.get(DOCUMENT_RELS_PART))
+            if part_name in parts
+        }
+
+        return CachedTemplate(path, mtime_ns, size, sha256, raw_entries, parts, document_tree, story_trees)
+
+    def invalidate(self, template_path: Optional[Path] = None):
+        """Elimina una plantilla de la caché (o todas si no se indica ruta)."""
+        with self._lock:
+            if template_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(Path(template_path).resolve()), None)
+
+
+def strip_section_properties(elem: etree.Element, w_ns: str = W_NS):
+    """
+    Remueve recursivamente todas las propiedades de sección (sectPr) de un elemento.
+
+    Las section properties controlan el layout de columnas; si se copian de un
+    bloque condicional romperían el diseño de doble columna del documento principal.
+    """
+    # Si el elemento es un párrafo, buscar sectPr en sus propiedades
+    if elem.tag == f'{{{w_ns}}}p':
+        pPr = elem.find(f'{{{w_ns}}}pPr')
+        if pPr is not None:
+            sectPr = pPr.find(f'{{{w_ns}}}sectPr')
+            if sectPr is not None:
+                pPr.remove(sectPr)
+
+    # Buscar y remover sectPr en el nivel de body (no debería estar aquí, pero por seguridad)
+    for sectPr in elem.findall(f'.//{{{w_ns}}}sectPr'):
+        parent = sectPr.getparent()
+        if parent is not None:
+            parent.remove(sectPr)
+
+
+class CachedBlock:
+    """Cuerpo de un .docx condicional ya parseado y sin sectPr. Solo lectura."""
+
+    def __init__(self, path: Path, mtime_ns: int, size: int, fragments: List[etree.Element]):
+        """
+        Args:
+            path: Ruta absoluta del .docx del bloque
+            mtime_ns: Fecha de modificación del fichero al cargarlo
+            size: Tamaño en bytes del fichero al cargarlo
+            fragments: Elementos hijos de w:body, ya sin propiedades de sección
+        """
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.fragments = fragments
+
+    def new_fragments(self) -> List[etree.Element]:
+        """Devuelve copias independientes de los elementos del bloque."""
+        return [deepcopy(fragment) for fragment in self.fragments]
+
+
+class BlockFragmentCache:
+    """
+    Caché LRU de bloques condicionales (condiciones/*.docx) indexada por ruta + mtime.
+
+    Los mismos ~25 bloques se insertan informe tras informe: cada fichero se
+    descomprime, se parsea y se limpia de sectPr una sola vez.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        """
+        Args:
+            max_entries: Número máximo de bloques en memoria (los menos usados salen primero)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedBlock]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.parser = etree.XMLParser(remove_blank_text=False, strip_cdata=False)
+
+    def get(self, block_path: Path) -> Optional[CachedBlock]:
+        """
+        Obtiene un bloque, cargándolo si no está en caché o si el fichero ha cambiado.
+
+        Returns:
+            El bloque, o None si el fichero no existe o no tiene w:body.
+        """
+        path = Path(block_path).resolve()
+        if not path.exists():
+            return None
+
+        stat = path.stat()
+        key = str(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(key)
+                return entry
+
+            entry = self._load(path, stat.st_mtime_ns, stat.st_size)
+            if entry is None:
+                self._entries.pop(key, None)
+                return None
+
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            return entry
+
+    def _load(self, path: Path, mtime_ns: int, size: int) -> Optional[CachedBlock]:
+        """Lee word/document.xml del bloque y prepara sus elementos."""
+        with zipfile.ZipFile(path, 'r') as zip_ref:
+            block_root = etree.fromstring(zip_ref.read(DOCUMENT_PART), self.parser)
+
+        w_ns = block_root.nsmap.get('w', W_NS)
+        block_body = block_root.find(f'.//{{{w_ns}}}body')
+        if block_body is None:
+            return None
+
+        fragments = list(block_body)
+        for fragment in fragments:
+            strip_section_properties(fragment, w_ns)
+
+        return CachedBlock(path, mtime_ns, size, fragments)
+
+    def warm_from_config(self, cfg_cond: dict, config_dir: Path) -> int:
+        """
+        Precarga todos los bloques declarados en variables_condicionales.yaml.
+
+        Args:
+            cfg_cond: Configuración de condiciones
+            config_dir: Directorio de configuración (los word_file son relativos a su padre)
+
+        Returns:
+            Número de bloques disponibles en caché
+        """
+        loaded = 0
+        for cond in cfg_cond.get("conditions", []):
+            word_file = cond.get("word_file")
+            if word_file and self.get(Path(config_dir).parent / word_file) is not None:
+                loaded += 1
+        return loaded
+
+    def invalidate(self, block_path: Optional[Path] = None):
+        """Elimina un bloque de la caché (o todos si no se indica ruta)."""
+        with self._lock:
+            if block_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(Path(block_path).resolve()), None)
+
+
+_template_cache = TemplateCache()
+_block_cache = BlockFragmentCache()
+
+
+def get_template_cache() -> TemplateCache:
+    """Devuelve la caché de plantillas compartida por el proceso."""
+    return _template_cache
+
+
+def get_block_cache() -> BlockFragmentCache:
+    """Devuelve la caché de bloques condicionales compartida por el proceso."""
+    return _block_cache
@@ -6,6 +6,8 @@ from typing import Dict, List, Any, Tuple
 import json
 from datetime import datetime
 
+from modules.config_model import conditions_model, simple_vars_model
+
 
 def build_simple_context(cfg_simple: dict, simple_inputs: dict) -> dict:
     """
@@ -20,27 +22,13 @@ def build_simple_context(cfg_simple: dict, simple_inputs: dict) -> dict:
     """
     context = {}
 
-    for var in cfg_simple.get("simple_variables", []):
-        var_id = var["id"]
-        marker = var.get("marker")  # puede ser None (ej: ejercicio_anterior)
-
-        value = simple_inputs.get(var_id)
-
-        # Si no hay marcador, lo omitimos en plantilla,
-        # pero el valor estará disponible para tablas
-        if marker and value is not None:
-            # Formatear según el tipo
-            var_type = var.get("type", "text")
-
-            if var_type == "percent" and isinstance(value, (int, float)):
-                # Convertir a porcentaje (ej: 0.35 -> "35%")
-                context[marker] = f"{value * 100:.2f}%"
-            elif var_type == "number" and isinstance(value, (int, float)):
-                # Formatear números con separadores de miles
-                context[marker] = f"{value:,.2f}"
-            else:
-                # Texto, long_text, email, etc.
-                context[marker] = str(value)
+    # Las variables sin marcador se omiten en la plantilla, pero el valor
+    # estará disponible para tablas
+    for var in simple_vars_model(cfg_simple).context_variables:
+        value = simple_inputs.get(var.id)
+        if value is not None:
+            # Formateador según el tipo (porcentaje, número con miles o texto)
+            context[var.marker] = var.format(value)
 
     return context
 
@@ -58,27 +46,16 @@ def build_conditions_context(cfg_cond: dict, condition_inputs: dict) -> Tuple[di
         - context_markers: {marker: ""} para limpiar si es "No"
         - docs_to_insert: lista de {marker, file} para insertar bloques Word
     """
-    context_markers = {}
-    docs_to_insert = []
-
-    for cond in cfg_cond.get("conditions", []):
-        cond_id = cond["id"]
-        marker = cond["marker"]
-        word_file = cond["word_file"]
-
-        answer = condition_inputs.get(cond_id, "No")
-
-        if answer == "Sí":
-            # Marcar para insertar el bloque de Word
-            docs_to_insert.append({
-                "marker": marker,
-                "file": word_file
-            })
-            # Dejar el marcador vacío por ahora (se reemplazará con el bloque)
-            context_markers[marker] = ""
-        else:
-            # Limpieza: borrar el marcador
-            context_markers[marker] = ""
+    model = conditions_model(cfg_cond)
+
+    # Limpieza: todos los marcadores se vacían; los "Sí" se reemplazarán
+    # después con el bloque Word
+    context_markers = dict(model.cleared_markers)
+    docs_to_insert = [
+        {"marker": cond.marker, "file": cond.word_file}
+        for cond in model.conditions
+        if condition_inputs.get(cond.id, "No") == "Sí"
+    ]
 
     return context_markers, docs_to_insert
 
@@ -203,16 +180,12 @@ def validate_inputs(cfg_simple: dict, simple_inputs: dict) -> List[str]:
     """
     errors = []
 
-    for var in cfg_simple.get("simple_variables", []):
-        var_id = var["id"]
-        label = var["label"]
-
-        # Verificar si es requerido (por defecto, todas son requeridas excepto ejercicio_anterior)
-        if var.get("marker") is not None:  # Si tiene marcador, es requerido
-            value = simple_inputs.get(var_id)
+    # Por defecto, todas las variables con marcador son requeridas
+    for var in simple_vars_model(cfg_simple).marked_variables:
+        value = simple_inputs.get(var.id)
 
-            if value is None or (isinstance(value, str) and not value.strip()):
-                errors.append(f"El campo '{label}' es requerido")
+        if value is None or (isinstance(value, str) and not value.strip()):
+            errors.append(var.required_error)
 
     return errors
 
@@ -464,16 +464,19 @@ class WordEngine:
 
         # Llenar filas de footer
         if footer_rows:
+            # value_type de cada fila de footer en tablas.yaml
+            footer_column_types = table_data.get("footer_column_types", [])
             for i, footer_data in enumerate(footer_rows):
                 row_index = 1 + len(rows) + i
                 row = table.rows[row_index]
+                value_types = footer_column_types[i] if i < len(footer_column_types) else {}
 
                 for j, col in enumerate(columns):
                     cell = row.cells[j]
                     col_id = col["id"]
                     value = footer_data.get(col_id, "")
 
-                    col_type = col.get("type", "text")
+                    col_type = value_types.get(col_id, col.get("type", "text"))
                     formatted_value = self._format_cell_value(value, col_type)
 
                     cell.text = formatted_value
@@ -1432,17 +1435,9 @@ class WordEngine:
         """
         Convierte el documento a PDF y retorna los bytes.
 
-        IMPORTANTE: Para exportar a PDF sin aplicaciones externas no es técnicamente posible
-        manteniendo el formato completo del documento (columnas, imágenes, etc.).
-
-        Esta función intenta usar las siguientes opciones en orden:
-        1. LibreOffice (libreoffice/soffice) - Mejor calidad, preserva todo el formato
-        2. docx2pdf - Alternativa si está disponible (requiere Word en Windows)
-
-        Instalación recomendada de LibreOffice:
-        - Linux: sudo apt-get install libreoffice
-        - macOS: brew install libreoffice
-        - Windows: Descargar de https://www.libreoffice.org/download/
+        Usa el conversor preferido del registro de modules.pdf_export
+        (LibreOffice, docx2pdf o pandoc ya instalados), resuelto una sola vez
+        por proceso y sin descargas.
 
         Returns:
             Bytes del documento en formato PDF
@@ -1450,137 +1445,9 @@ class WordEngine:
         Raises:
             RuntimeError: Si ninguna herramienta de conversión está disponible
         """
-        import tempfile
-        import os
-        import subprocess
-        import shutil
-
-        temp_dir = tempfile.mkdtemp()
-
-        try:
-            # Guardar el documento en el directorio temporal
-            docx_path = os.path.join(temp_dir, 'documento.docx')
-            self.doc.save(docx_path)
-
-            # Opción 0: Intentar con pypandoc descargando binarios automáticamente (evita instalaciones manuales)
-            try:
-                import pypandoc
-
-                try:
-                    pypandoc.get_pandoc_path()
-                except OSError:
-                    # Descargar pandoc de forma automática si no está disponible
-                    pypandoc.download_pandoc()
-
-                pdf_path = os.path.join(temp_dir, 'documento.pdf')
-                pypandoc.convert_file(
-                    docx_path,
-                    'pdf',
-                    outputfile=pdf_path,
-                    extra_args=['--pdf-engine=weasyprint']
-                )
-
-                if os.path.exists(pdf_path):
-                    with open(pdf_path, 'rb') as pdf_file:
-                        pdf_bytes = pdf_file.read()
-                    return pdf_bytes
-            except Exception as pandoc_error:
-                # Continuar con otras estrategias sin forzar instalaciones del sistema
-                print(f"Advertencia: pypandoc no pudo convertir a PDF: {pandoc_error}")
-
-            # Opción 1: Intentar con LibreOffice (mejor opción)
-            libreoffice_cmd = None
-            for cmd in ['libreoffice', 'soffice']:
-                if shutil.which(cmd):
-                    libreoffice_cmd = cmd
-                    break
-
-            if libreoffice_cmd:
-                # Convertir DOCX a PDF usando LibreOffice
-                result = subprocess.run(
-                    [
-                        libreoffice_cmd,
-                        '--headless',
-                        '--convert-to',
-                        'pdf',
-                        '--outdir',
-                        temp_dir,
-                        docx_path
-                    ],
-                    capture_output=True,
-                    text=True,
-                    timeout=60  # Timeout de 60 segundos
-                )
-
-                if result.returncode != 0:
-                    raise RuntimeError(
-                        f"LibreOffice falló al convertir el documento: {result.stderr}"
-                    )
-
-                # Leer el PDF generado
-                pdf_path = os.path.join(temp_dir, 'documento.pdf')
-
-                if not os.path.exists(pdf_path):
-                    raise RuntimeError("El archivo PDF no se generó correctamente")
-
-                with open(pdf_path, 'rb') as pdf_file:
-                    pdf_bytes = pdf_file.read()
-
-                return pdf_bytes
-
-            # Opción 2: Intentar con docx2pdf (si está instalado)
-            try:
-                import docx2pdf
-                temp_dir_docx2pdf = tempfile.mkdtemp()
-
-                try:
-                    # Guardar el documento
-                    docx_path_alt = os.path.join(temp_dir_docx2pdf, 'documento.docx')
-                    pdf_path = os.path.join(temp_dir_docx2pdf, 'documento.pdf')
-                    self.doc.save(docx_path_alt)
-
-                    # Convertir usando docx2pdf
-                    docx2pdf.convert(docx_path_alt, pdf_path)
-
-                    # Leer el PDF generado
-                    if os.path.exists(pdf_path):
-                        with open(pdf_path, 'rb') as pdf_file:
-                            pdf_bytes = pdf_file.read()
-                        return pdf_bytes
-                    else:
-                        raise RuntimeError("docx2pdf no generó el archivo PDF")
-
-                finally:
-                    # Limpiar directorio temporal
-                    try:
-                        shutil.rmtree(temp_dir_docx2pdf)
-                    except Exception:
-                        pass
-
-            except ImportError:
-                pass  # docx2pdf no está instalado
-            except Exception as e:
-                # Si docx2pdf falla, continuar al mensaje de error final
-                print(f"Advertencia: docx2pdf falló: {e}")
+        from modules.pdf_export import convert_docx_to_pdf
 
-            # Si llegamos aquí, ninguna opción funcionó
-            raise RuntimeError(
-                "No se encontró ninguna herramienta para convertir a PDF.\n\n"
-                "Para exportar a PDF, instala LibreOffice:\n"
-                "• Linux: sudo apt-get install libreoffice\n"
-                "• macOS: brew install libreoffice\n"
-                "• Windows: Descarga de https://www.libreoffice.org/download/\n\n"
-                "Alternativamente, puedes:\n"
-                "1. Descargar el archivo Word (.docx)\n"
-                "2. Abrirlo en Microsoft Word o LibreOffice\n"
-                "3. Guardar como PDF desde allí"
-            )
-        finally:
-            # Limpiar el directorio temporal principal creado al inicio
-            try:
-                shutil.rmtree(temp_dir)
-            except Exception:
-                pass
+        return convert_docx_to_pdf(self.get_document_bytes()).pdf_bytes
 
     def insert_background_image(self, image_path: Path, page_type: str = "first"):
         """
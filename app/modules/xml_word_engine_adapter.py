@@ -10,85 +10,522 @@ Este módulo proporciona un reemplazo drop-in para WordEngine que:
 USO: Simplemente importa XMLWordEngineAdapter en lugar de WordEngine
 """
 
+from copy import deepcopy
 from pathlib import Path
 from lxml import etree
-import zipfile
-import tempfile
-import shutil
-import os
 import re
-from copy import deepcopy
 from typing import Dict, List, Any, Optional
 
+from modules.docx_package import CompressionPolicy, build_package
+from modules.engine_metrics import EngineMetrics, instrumented
+from modules.pdf_export import convert_docx_to_pdf
+from modules.template_cache import (
+    DOCUMENT_PART,
+    W_NS,
+    BlockFragmentCache,
+    CachedBlock,
+    TemplateCache,
+    get_block_cache,
+    get_template_cache,
+)
+
+
+# Forma de los marcadores que se indexan al cargar la plantilla (<<...>>)
+INDEXED_MARKER_PATTERN = re.compile(r'<<[^<>]+>>')
+
+# Marcadores que elimina la limpieza final (clean_unused_markers / clean_document)
+UNUSED_MARKER_PATTERN = re.compile(r'<<[^>]+>>')
+
+SALTO_PATTERN = re.compile(r'\{salto\}')
+
+# Con hasta tantos marcadores en el contexto, replace_variables visita solo los
+# párrafos que el índice asocia a cada marcador en lugar de recorrer el cuerpo
+INDEXED_REPLACE_MAX_MARKERS = 50
+
+
+class ParagraphView:
+    """
+    Datos derivados de un párrafo (texto y propiedades), calculados una vez.
+
+    El adaptador guarda una vista por elemento w:p y la descarta cuando el
+    párrafo se modifica. Los indicadores valen None hasta que se consultan.
+    """
+
+    __slots__ = ('text', 'node_texts', 'offsets', 'has_page_break', 'has_drawing', 'has_sectPr')
+
+    def __init__(self, node_texts: tuple):
+        """
+        Args:
+            node_texts: Texto de cada w:t del párrafo, en orden ('' si está vacío)
+        """
+        self.node_texts = node_texts
+        self.text = ''.join(node_texts)
+
+        offsets = []
+        position = 0
+        for text in node_texts:
+            offsets.append(position)
+            position += len(text)
+        self.offsets = tuple(offsets)
+
+        self.has_page_break = None
+        self.has_drawing = None
+        self.has_sectPr = None
+
+
+class TablePrototype:
+    """
+    Tabla vacía (tblPr y tblGrid) y filas sin texto de una tabla.
+
+    Las tablas se crean clonándolas con deepcopy y rellenando solo el texto de
+    las celdas, en lugar de construir cada celda nodo a nodo.
+    """
+
+    __slots__ = ('table', 'header_row', 'data_row', 'footer_row')
+
+    def __init__(self, table: etree.Element, header_row: etree.Element, data_row: etree.Element,
+                 footer_row: etree.Element):
+        self.table = table
+        self.header_row = header_row
+        self.data_row = data_row
+        self.footer_row = footer_row
+
 
 class XMLWordEngineAdapter:
     """
     Adaptador que reemplaza WordEngine usando manipulación XML directa.
     Compatible con la interfaz existente de WordEngine.
     """
+
+    # Prototipos de tablas compartidos por todas las instancias (ver _table_prototype)
+    _table_prototypes: Dict[tuple, TablePrototype] = {}
     
-    def __init__(self, template_path: Path):
+    def __init__(
+        self,
+        template_path: Path,
+        template_cache: TemplateCache = None,
+        block_cache: BlockFragmentCache = None
+    ):
         """
         Inicializa el motor con una plantilla.
         
         Args:
             template_path: Ruta a la plantilla Word (.docx)
+            template_cache: Caché de plantillas a usar (por defecto, la del proceso)
+            block_cache: Caché de bloques condicionales (por defecto, la del proceso)
         """
-        self.template_path = Path(template_path)
-        
-        if not self.template_path.exists():
-            raise FileNotFoundError(f"Plantilla no encontrada: {template_path}")
-        
-        # Extraer plantilla
-        self.temp_dir = tempfile.mkdtemp()
-        with zipfile.ZipFile(self.template_path, 'r') as zip_ref:
-            zip_ref.extractall(self.temp_dir)
+        self._init_engine_state(template_path, block_cache)
         
-        # Cargar document.xml
-        self.doc_xml_path = Path(self.temp_dir) / 'word' / 'document.xml'
-        self.parser = etree.XMLParser(remove_blank_text=False, strip_cdata=False)
-        self.tree = etree.parse(str(self.doc_xml_path), self.parser)
+        # Obtener la plantilla ya descomprimida y parseada desde la caché
+        cache = template_cache or get_template_cache()
+        self._template = cache.get(self.template_path)
+
+        # Copia propia de document.xml y del resto de partes del paquete
+        self.tree = self._template.new_document_tree()
         self.root = self.tree.getroot()
+        self.parts = self._template.new_parts()
+
+        # Headers, footers y notas ya parseados; solo se serializan al empaquetar
+        # los que se hayan modificado
+        self.story_trees = self._template.new_story_trees()
         
         # Namespaces
         self.ns = self.root.nsmap
-        self.w_ns = self.ns.get('w', 'http://schemas.openxmlformats.org/wordprocessingml/2006/main')
-        self.xml_ns = 'http://www.w3.org/XML/1998/namespace'
+        self.w_ns = self.ns.get('w', self.w_ns)
         
         # Contadores para debug
-        self._initial_drawings = len(self.root.findall(f'.//{{{self.w_ns}}}drawing'))
-        self._initial_sections = len(self.root.findall(f'.//{{{self.w_ns}}}sectPr'))
+        self._initial_drawings = self._template.drawing_count
+        self._initial_sections = self._template.section_count
+
+        # Índice marcador -> párrafos, construido una sola vez y mantenido al mutar
+        self._build_marker_index()
+
+    def _init_engine_state(self, template_path: Path, block_cache: BlockFragmentCache = None):
+        """
+        Inicializa el estado que comparten este motor y StreamingWordEngine.
+
+        Los atributos que usan las operaciones heredadas por el motor en
+        streaming se crean aquí, de modo que ambos constructores los tienen.
+
+        Raises:
+            FileNotFoundError: Si la plantilla no existe
+        """
+        self.template_path = Path(template_path)
+        
+        if not self.template_path.exists():
+            raise FileNotFoundError(f"Plantilla no encontrada: {template_path}")
+
+        self.block_cache = block_cache or get_block_cache()
+
+        # document.xml y las demás partes del documento; los asigna cada motor
+        self.tree = None
+        self.root = None
+        self.story_trees = {}
+        self._dirty_story_parts = set()
+
+        # Namespaces
+        self.w_ns = W_NS
+        self.xml_ns = 'http://www.w3.org/XML/1998/namespace'
 
         # Configuraciones especiales para tablas específicas
         self.special_table_behaviors = {
             "<<Tabla de cumplimiento formal MF>>": {"column_break_before": True}
         }
+
+        # Tiempo, párrafos leídos y nodos modificados por método (ver engine_metrics)
+        self.metrics = EngineMetrics()
+
+        # Vistas de párrafo (texto y propiedades) en caché hasta que se modifican
+        self._paragraph_views: Dict[etree.Element, ParagraphView] = {}
+
+        # Índice de marcadores vacío (ver _build_marker_index)
+        self._marker_index: Dict[str, List[etree.Element]] = {}
+        self._paragraph_markers: Dict[etree.Element, List[tuple]] = {}
+        self._unordered_markers = set()
     
+    @instrumented
     def replace_variables(self, context: dict):
-        """Reemplaza variables <<marcador>> incluso cuando se dividen en múltiples runs."""
+        """
+        Reemplaza variables <<marcador>> incluso cuando se dividen en múltiples runs.
+
+        Todos los marcadores del contexto se compilan en una única expresión regular,
+        de modo que cada párrafo se recorre una sola vez y todas sus coincidencias se
+        aplican en la misma pasada sobre los nodos de texto. Los headers, footers y
+        notas se procesan en la misma pasada que el cuerpo.
+
+        Con pocos marcadores (INDEXED_REPLACE_MAX_MARKERS), todos con la forma
+        <<...>>, del cuerpo solo se visitan los párrafos que el índice asocia a
+        cada marcador: en la plantilla real la mayoría de párrafos no tiene
+        ninguno y recorrerlos todos cuesta más que el propio reemplazo.
+        """
+        replacements = self._compile_replacements(context)
+        if replacements is None:
+            return
+
+        values = replacements[0]
+        use_index = (
+            len(values) <= INDEXED_REPLACE_MAX_MARKERS
+            and all(INDEXED_MARKER_PATTERN.fullmatch(marker) for marker in values)
+        )
+
+        for part_name, root in self._iter_story_roots():
+            if part_name == DOCUMENT_PART and use_index:
+                paragraphs = self._indexed_paragraphs(values)
+            else:
+                paragraphs = root.iter(f'{{{self.w_ns}}}p')
+
+            for para in paragraphs:
+                if not self._replace_in_paragraph(para, replacements):
+                    continue
+
+                if part_name == DOCUMENT_PART:
+                    self._index_paragraph(para)
+                else:
+                    self._dirty_story_parts.add(part_name)
+
+    @staticmethod
+    def _compile_replacements(context: dict) -> Optional[tuple]:
+        """
+        Prepara los valores del contexto para replace_variables.
+
+        Returns:
+            (valores {marcador: texto}, patrón con todos los marcadores), o None
+            si no hay ningún valor que reemplazar
+        """
         context_filtered = {
             k: v for k, v in context.items()
             if v is not None and v != "" and str(v).strip()
         }
 
         if not context_filtered:
+            return None
+
+        values = {marker: str(value) for marker, value in context_filtered.items()}
+
+        # Un único patrón con todos los marcadores (los más largos primero para
+        # que un marcador que sea prefijo de otro no gane la alternancia)
+        markers_pattern = re.compile('|'.join(
+            re.escape(marker) for marker in sorted(values, key=len, reverse=True)
+        ))
+
+        return values, markers_pattern
+
+    def _replace_in_paragraph(self, para: etree.Element, replacements: tuple) -> bool:
+        """
+        Aplica los reemplazos a un párrafo.
+
+        Returns:
+            True si el párrafo ha cambiado
+        """
+        values, markers_pattern = replacements
+
+        para_text = self._get_paragraph_text(para)
+        if not para_text:
+            return False
+
+        matches = [
+            (match.start(), match.end(), values[match.group(0)])
+            for match in markers_pattern.finditer(para_text)
+        ]
+
+        if not matches:
+            return False
+
+        self._splice_matches_in_text_nodes(self._collect_text_nodes(para), matches)
+        return True
+
+    def _iter_story_roots(self):
+        """
+        Recorre las raíces XML con texto del documento.
+
+        Yields:
+            (nombre de parte, elemento raíz), empezando por word/document.xml y
+            siguiendo con headers, footers y notas
+        """
+        yield DOCUMENT_PART, self.root
+        for part_name, tree in self.story_trees.items():
+            yield part_name, tree.getroot()
+
+    def _collect_text_nodes(self, para: etree.Element) -> List[tuple]:
+        """
+        Obtiene los nodos w:t de un párrafo con su desplazamiento en el texto completo.
+
+        Returns:
+            Lista de tuplas (elemento, texto, inicio)
+        """
+        view = self._paragraph_view(para)
+        return list(zip(para.iter(f'{{{self.w_ns}}}t'), view.node_texts, view.offsets))
+
+    def _paragraph_view(self, para: etree.Element) -> ParagraphView:
+        """Devuelve la vista en caché del párrafo, creándola si no existe."""
+        view = self._paragraph_views.get(para)
+        if view is None:
+            self.metrics.scan()
+            view = ParagraphView(tuple(
+                text_elem.text or '' for text_elem in para.iter(f'{{{self.w_ns}}}t')
+            ))
+            self._paragraph_views[para] = view
+        return view
+
+    def _invalidate_views(self, elem: etree.Element):
+        """
+        Descarta las vistas afectadas por un cambio en elem.
+
+        Se invalidan el propio elemento (si es un párrafo) y los párrafos que lo
+        contienen, ya que su texto incluye el de los cuadros de texto anidados.
+        """
+        views = self._paragraph_views
+        if not views:
             return
 
-        paragraphs = self.root.findall(f'.//{{{self.w_ns}}}p')
+        views.pop(elem, None)
+        for para in elem.iterancestors(f'{{{self.w_ns}}}p'):
+            views.pop(para, None)
+
+    def _discard_views(self, elem: etree.Element):
+        """Elimina de la caché las vistas de los párrafos de un elemento borrado."""
+        for para in elem.iter(f'{{{self.w_ns}}}p'):
+            self._paragraph_views.pop(para, None)
 
-        for para in paragraphs:
+    def _splice_matches_in_text_nodes(self, text_nodes: List[tuple], matches: List[tuple]):
+        """
+        Aplica varios reemplazos sobre los nodos de texto de un párrafo en una sola pasada.
+
+        Cada coincidencia (inicio, fin, valor) puede abarcar varios runs: el valor se
+        escribe en el nodo donde empieza el marcador, los nodos intermedios se vacían
+        y el nodo final conserva el texto posterior al marcador.
+
+        Args:
+            text_nodes: Resultado de _collect_text_nodes
+            matches: Coincidencias ordenadas y sin solapamiento sobre el texto completo
+        """
+        match_idx = 0
+
+        for text_elem, text, node_start in text_nodes:
+            node_end = node_start + len(text)
+            pos = node_start
+            pieces = []
+            touched = False
+
+            while match_idx < len(matches):
+                match_start, match_end, value = matches[match_idx]
+                if match_start >= node_end:
+                    break
+
+                touched = True
+                if match_start >= pos:
+                    # El marcador empieza en este nodo
+                    pieces.append(text[pos - node_start:match_start - node_start])
+                    pieces.append(value)
+
+                if match_end > node_end:
+                    # El marcador continúa en los nodos siguientes
+                    pos = node_end
+                    break
+
+                pos = match_end
+                match_idx += 1
+
+            if touched:
+                pieces.append(text[pos - node_start:])
+                self._set_text_with_preserve(text_elem, ''.join(pieces))
+
+    @instrumented
+    def _build_marker_index(self):
+        """
+        Construye el índice de marcadores <<...>> recorriendo el documento una vez.
+
+        - self._marker_index: {marcador: [párrafos]} en orden de documento
+        - self._paragraph_markers: {párrafo: [(marcador, inicio, fin)]} con los
+          desplazamientos del marcador en el texto concatenado de los runs
+          (los mismos que devuelve _collect_text_nodes)
+        """
+        self._marker_index: Dict[str, List[etree.Element]] = {}
+        self._paragraph_markers: Dict[etree.Element, List[tuple]] = {}
+        # Marcadores cuya lista de párrafos puede no estar en orden de documento
+        self._unordered_markers = set()
+
+        for para in self.root.iter(f'{{{self.w_ns}}}p'):
+            self._index_paragraph(para, keep_order=True)
+
+    def _index_paragraph(self, para: etree.Element, para_text: str = None, keep_order: bool = False):
+        """
+        Actualiza las entradas del índice de un párrafo tras modificar su texto.
+
+        Args:
+            para: Párrafo a (re)indexar
+            para_text: Texto actual del párrafo, si ya se conoce
+            keep_order: True cuando el párrafo se indexa en orden de documento
+        """
+        if para_text is None:
             para_text = self._get_paragraph_text(para)
 
-            if not para_text:
+        locations = []
+        if '<<' in para_text:
+            locations = [
+                (match.group(0), match.start(), match.end())
+                for match in INDEXED_MARKER_PATTERN.finditer(para_text)
+            ]
+
+        old_markers = {loc[0] for loc in self._paragraph_markers.get(para, ())}
+        new_markers = {loc[0] for loc in locations}
+
+        for marker in old_markers - new_markers:
+            self._discard_from_marker_index(marker, para)
+
+        for marker in new_markers - old_markers:
+            paras = self._marker_index.setdefault(marker, [])
+            if paras and not keep_order:
+                self._unordered_markers.add(marker)
+            paras.append(para)
+
+        if locations:
+            self._paragraph_markers[para] = locations
+        else:
+            self._paragraph_markers.pop(para, None)
+
+    def _index_element(self, elem: etree.Element):
+        """Indexa todos los párrafos de un elemento recién insertado."""
+        for para in elem.iter(f'{{{self.w_ns}}}p'):
+            # Sin '<' en ningún nodo de texto no puede haber marcadores: se evita
+            # construir la vista del párrafo (p. ej. celdas de tablas insertadas)
+            if para not in self._paragraph_markers and '<' not in ''.join(para.itertext()):
                 continue
+            self._index_paragraph(para)
+
+    def _unindex_element(self, elem: etree.Element):
+        """Elimina del índice todos los párrafos de un elemento que se va a borrar."""
+        for para in elem.iter(f'{{{self.w_ns}}}p'):
+            for marker in {loc[0] for loc in self._paragraph_markers.pop(para, ())}:
+                self._discard_from_marker_index(marker, para)
+
+    def _discard_from_marker_index(self, marker: str, para: etree.Element):
+        """Quita un párrafo de la lista de un marcador."""
+        paras = self._marker_index.get(marker)
+        if not paras:
+            return
 
-            for marker, value in context_filtered.items():
-                value_str = str(value)
+        paras[:] = [p for p in paras if p is not para]
+        if not paras:
+            del self._marker_index[marker]
+            self._unordered_markers.discard(marker)
 
-                while marker in para_text:
-                    self._replace_marker_in_paragraph_xml(para, marker, value_str)
-                    para_text = self._get_paragraph_text(para)
-    
+    def _is_in_document(self, elem: etree.Element) -> bool:
+        """Comprueba que un elemento sigue colgando de la raíz del documento."""
+        while elem is not None:
+            if elem is self.root:
+                return True
+            elem = elem.getparent()
+        return False
+
+    def _indexed_paragraphs(self, markers) -> List[etree.Element]:
+        """Párrafos del documento que el índice asocia a alguno de los marcadores (sin repetir)."""
+        paragraphs = {}
+        for marker in markers:
+            for para in self._marker_index.get(marker, ()):
+                paragraphs[para] = None
+        return [para for para in paragraphs if self._is_in_document(para)]
+
+    def _find_paragraph_with_marker(self, marker: str) -> Optional[etree.Element]:
+        """
+        Devuelve el primer párrafo (en orden de documento) que contiene el marcador.
+
+        Usa el índice de marcadores; solo recorre el documento completo si el texto
+        buscado no tiene la forma <<...>>.
+        """
+        return self._find_paragraphs_with_markers([marker]).get(marker)
+
+    def _find_paragraphs_with_markers(self, markers) -> Dict[str, etree.Element]:
+        """
+        Versión en bloque de _find_paragraph_with_marker.
+
+        Los marcadores que necesitan recorrer el documento (sin la forma <<...>>
+        o con varias apariciones aún sin ordenar) se resuelven todos juntos en
+        un único recorrido.
+
+        Returns:
+            {marcador: primer párrafo que lo contiene}; sin los marcadores no encontrados
+        """
+        found = {}
+        text_markers = []
+        to_order = {}
+
+        for marker in markers:
+            if not INDEXED_MARKER_PATTERN.fullmatch(marker):
+                text_markers.append(marker)
+                continue
+
+            candidates = [
+                para for para in self._marker_index.get(marker, ())
+                if self._is_in_document(para)
+            ]
+            if len(candidates) > 1 and marker in self._unordered_markers:
+                to_order[marker] = candidates
+            elif candidates:
+                found[marker] = candidates[0]
+
+        if not text_markers and not to_order:
+            return found
+
+        positions = {para: None for candidates in to_order.values() for para in candidates}
+        for pos, para in enumerate(self.root.iter(f'{{{self.w_ns}}}p')):
+            if para in positions:
+                positions[para] = pos
+            if text_markers:
+                para_text = self._get_paragraph_text(para)
+                for marker in [m for m in text_markers if m in para_text]:
+                    found[marker] = para
+                    text_markers.remove(marker)
+
+        for marker, candidates in to_order.items():
+            candidates.sort(key=lambda para: positions[para])
+            self._marker_index[marker] = candidates
+            self._unordered_markers.discard(marker)
+            found[marker] = candidates[0]
+
+        return found
+
+    @instrumented
     def insert_tables(self, tables_data: dict, cfg_tab: dict, table_format_config: dict = None):
         """
         Inserta tablas en los marcadores correspondientes.
@@ -98,39 +535,44 @@ class XMLWordEngineAdapter:
             cfg_tab: Configuración de tablas
             table_format_config: Configuración de formato (opcional)
         """
+        # Todos los marcadores se localizan antes de insertar ninguna tabla
+        targets = self._find_paragraphs_with_markers(tables_data)
+
         for marker, table_data in tables_data.items():
-            self._insert_table_at_marker(marker, table_data, table_format_config)
-    
-    def _insert_table_at_marker(self, marker: str, table_data: dict, format_config: dict = None):
-        """Inserta una tabla en la posición del marcador."""
-        # Buscar párrafo con el marcador
-        target_para = None
-        all_paras = self.root.findall(f'.//{{{self.w_ns}}}p')
-        
-        for para in all_paras:
-            para_text = self._get_paragraph_text(para)
-            if marker in para_text:
-                target_para = para
-                break
+            target_para = targets.get(marker)
+            if target_para is None:
+                # El marcador solo puede estar en una tabla insertada antes
+                target_para = self._find_paragraph_with_marker(marker)
+            if target_para is None:
+                continue
 
-        if target_para is None:
-            return
+            self._insert_table_after_paragraph(target_para, marker, table_data, table_format_config)
 
+    def _insert_table_after_paragraph(
+        self,
+        target_para: etree.Element,
+        marker: str,
+        table_data: dict,
+        format_config: dict = None
+    ):
+        """Inserta la tabla tras el párrafo del marcador y limpia el marcador."""
         # Aplicar comportamientos especiales antes de insertar la tabla
         self._apply_pre_table_behavior(marker, target_para)
 
         # Crear tabla XML
         table_elem = self._create_table_xml(table_data, format_config)
 
-        # Insertar tabla
+        # Insertar tabla (addnext no recorre los hermanos del párrafo)
         parent = target_para.getparent()
-        para_pos = list(parent).index(target_para)
-        parent.insert(para_pos + 1, table_elem)
+        target_para.addnext(table_elem)
+        self._index_element(table_elem)
 
         # Insertar un párrafo de separación después de la tabla para evitar que
         # quede pegada al contenido siguiente
         spacer_para = self._create_spacing_paragraph()
-        parent.insert(para_pos + 2, spacer_para)
+        table_elem.addnext(spacer_para)
+        self._invalidate_views(parent)
+        self.metrics.touch(2)
 
         # Limpiar marcador
         self._remove_marker_from_paragraph(target_para, marker)
@@ -161,8 +603,9 @@ class XMLWordEngineAdapter:
         br = etree.SubElement(run, f'{{{self.w_ns}}}br')
         br.set(f'{{{self.w_ns}}}type', 'column')
 
-        para_index = list(parent).index(para)
-        parent.insert(para_index, column_break_para)
+        para.addprevious(column_break_para)
+        self._invalidate_views(parent)
+        self.metrics.touch()
     
     def _create_table_xml(self, table_data: dict, format_config: dict = None) -> etree.Element:
         """Crea elemento de tabla XML con formato."""
@@ -171,36 +614,10 @@ class XMLWordEngineAdapter:
         footer_rows = table_data.get('footer_rows', [])
         headers = table_data.get('headers', {})
         
-        # Crear tabla
-        tbl = etree.Element(f'{{{self.w_ns}}}tbl')
-        
-        # Propiedades de tabla
-        tbl_pr = etree.SubElement(tbl, f'{{{self.w_ns}}}tblPr')
-        
-        # Estilo
-        tbl_style = etree.SubElement(tbl_pr, f'{{{self.w_ns}}}tblStyle')
-        tbl_style.set(f'{{{self.w_ns}}}val', 'TableGrid')
-        
-        # Ancho
-        tbl_w = etree.SubElement(tbl_pr, f'{{{self.w_ns}}}tblW')
-        tbl_w.set(f'{{{self.w_ns}}}w', '5000')
-        tbl_w.set(f'{{{self.w_ns}}}type', 'pct')
-        
-        # Bordes
-        tbl_borders = etree.SubElement(tbl_pr, f'{{{self.w_ns}}}tblBorders')
-        for border_type in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
-            border = etree.SubElement(tbl_borders, f'{{{self.w_ns}}}{border_type}')
-            border.set(f'{{{self.w_ns}}}val', 'single')
-            border.set(f'{{{self.w_ns}}}sz', '4')
-            border.set(f'{{{self.w_ns}}}space', '0')
-            border.set(f'{{{self.w_ns}}}color', 'auto')
-        
-        # Grid
-        tbl_grid = etree.SubElement(tbl, f'{{{self.w_ns}}}tblGrid')
-        for _ in range(len(columns)):
-            grid_col = etree.SubElement(tbl_grid, f'{{{self.w_ns}}}gridCol')
-            grid_col.set(f'{{{self.w_ns}}}w', str(5000 // len(columns)))
-        
+        # Tabla con tblPr y tblGrid y filas vacías desde el prototipo de la tabla
+        prototype = self._table_prototype(table_data)
+        tbl = deepcopy(prototype.table)
+
         # Fila de encabezados
         header_values = []
         for col in columns:
@@ -212,35 +629,31 @@ class XMLWordEngineAdapter:
                 header_text = col.get("header", "")
             header_values.append(header_text)
         
-        header_row = self._create_table_row(header_values, is_header=True)
-        tbl.append(header_row)
+        tbl.append(self._create_table_row(prototype.header_row, header_values))
         
-        # Filas de datos
+        # Filas de datos, formateadas según el tipo de cada columna
+        column_types = [(col['id'], col.get('type', 'text')) for col in columns]
         for row_data in rows:
-            cell_values = []
-            for col in columns:
-                col_id = col['id']
-                value = row_data.get(col_id, '')
-                
-                # Formatear según tipo
-                col_type = col.get('type', 'text')
-                formatted_value = self._format_cell_value(value, col_type)
-                cell_values.append(formatted_value)
-            
-            data_row = self._create_table_row(cell_values, is_header=False)
-            tbl.append(data_row)
+            cell_values = [
+                self._format_cell_value(row_data.get(col_id, ''), col_type)
+                for col_id, col_type in column_types
+            ]
+            tbl.append(self._create_table_row(prototype.data_row, cell_values))
         
-        # Filas de footer
-        for footer_data in footer_rows:
+        # Filas de footer; footer_column_types (value_type de cada fila en
+        # tablas.yaml) sustituye el tipo de sus columnas calculadas
+        footer_column_types = table_data.get('footer_column_types', [])
+        for i, footer_data in enumerate(footer_rows):
+            value_types = footer_column_types[i] if i < len(footer_column_types) else {}
             cell_values = []
             for col in columns:
                 col_id = col['id']
                 value = footer_data.get(col_id, '')
-                formatted_value = self._format_cell_value(value, col.get('type', 'text'))
+                col_type = value_types.get(col_id, col.get('type', 'text'))
+                formatted_value = self._format_cell_value(value, col_type)
                 cell_values.append(formatted_value)
             
-            footer_row = self._create_table_row(cell_values, is_header=False, is_bold=True)
-            tbl.append(footer_row)
+            tbl.append(self._create_table_row(prototype.footer_row, cell_values))
         
         return tbl
     
@@ -265,11 +678,75 @@ class XMLWordEngineAdapter:
         except (ValueError, TypeError):
             return str(value)
     
-    def _create_table_row(self, cell_values: List[str], is_header: bool = False, is_bold: bool = False) -> etree.Element:
-        """Crea fila de tabla."""
+    def _create_table_row(self, row_prototype: etree.Element, cell_values: List[str]) -> etree.Element:
+        """Crea fila de tabla (copia del prototipo con el texto de cada celda)."""
+        tr = deepcopy(row_prototype)
+        for t, value in zip(tr.iter(f'{{{self.w_ns}}}t'), cell_values):
+            t.text = value
+        return tr
+
+    def _table_prototype(self, table_data: dict) -> TablePrototype:
+        """
+        Prototipo de una tabla (por table_id y columnas), construido una sola vez.
+
+        La clave incluye el namespace w del documento, así que el prototipo de
+        una plantilla no se reutiliza en otra que declare un namespace distinto.
+        """
+        columns = table_data.get('columns', [])
+        key = (self.w_ns, table_data.get('table_id'), tuple(col.get('id') for col in columns))
+        prototype = self._table_prototypes.get(key)
+        if prototype is None:
+            prototype = self._table_prototypes[key] = self._build_table_prototype(columns)
+        return prototype
+
+    def _build_table_prototype(self, columns: List[dict]) -> TablePrototype:
+        """Construye la tabla vacía y las filas de cabecera, datos y pie de sus columnas."""
+        n_columns = len(columns)
+        return TablePrototype(
+            table=self._build_table_shell(n_columns),
+            header_row=self._build_table_row(n_columns, is_header=True, is_bold=False),
+            data_row=self._build_table_row(n_columns, is_header=False, is_bold=False),
+            footer_row=self._build_table_row(n_columns, is_header=False, is_bold=True),
+        )
+
+    def _build_table_shell(self, n_columns: int) -> etree.Element:
+        """Construye la tabla vacía: estilo, ancho, bordes y rejilla."""
+        tbl = etree.Element(f'{{{self.w_ns}}}tbl')
+        
+        # Propiedades de tabla
+        tbl_pr = etree.SubElement(tbl, f'{{{self.w_ns}}}tblPr')
+        
+        # Estilo
+        tbl_style = etree.SubElement(tbl_pr, f'{{{self.w_ns}}}tblStyle')
+        tbl_style.set(f'{{{self.w_ns}}}val', 'TableGrid')
+        
+        # Ancho
+        tbl_w = etree.SubElement(tbl_pr, f'{{{self.w_ns}}}tblW')
+        tbl_w.set(f'{{{self.w_ns}}}w', '5000')
+        tbl_w.set(f'{{{self.w_ns}}}type', 'pct')
+        
+        # Bordes
+        tbl_borders = etree.SubElement(tbl_pr, f'{{{self.w_ns}}}tblBorders')
+        for border_type in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
+            border = etree.SubElement(tbl_borders, f'{{{self.w_ns}}}{border_type}')
+            border.set(f'{{{self.w_ns}}}val', 'single')
+            border.set(f'{{{self.w_ns}}}sz', '4')
+            border.set(f'{{{self.w_ns}}}space', '0')
+            border.set(f'{{{self.w_ns}}}color', 'auto')
+        
+        # Grid
+        tbl_grid = etree.SubElement(tbl, f'{{{self.w_ns}}}tblGrid')
+        for _ in range(n_columns):
+            grid_col = etree.SubElement(tbl_grid, f'{{{self.w_ns}}}gridCol')
+            grid_col.set(f'{{{self.w_ns}}}w', str(5000 // n_columns))
+
+        return tbl
+
+    def _build_table_row(self, n_columns: int, is_header: bool, is_bold: bool) -> etree.Element:
+        """Construye una fila con n celdas vacías (sombreado, alineación y formato de run)."""
         tr = etree.Element(f'{{{self.w_ns}}}tr')
         
-        for value in cell_values:
+        for _ in range(n_columns):
             tc = etree.SubElement(tr, f'{{{self.w_ns}}}tc')
             
             # Propiedades de celda
@@ -299,7 +776,7 @@ class XMLWordEngineAdapter:
             
             # Texto
             t = etree.SubElement(r, f'{{{self.w_ns}}}t')
-            t.text = value
+            t.text = ''
             t.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
         
         return tr
@@ -313,6 +790,7 @@ class XMLWordEngineAdapter:
         text.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
         return para
     
+    @instrumented
     def insert_conditional_blocks(self, docs_to_insert: list, config_dir: Path):
         """Inserta bloques condicionales desde archivos Word."""
         for doc_info in docs_to_insert:
@@ -335,71 +813,50 @@ class XMLWordEngineAdapter:
             marker: Marcador donde insertar el bloque
             block_file: Archivo Word a insertar
         """
-        if not block_file.exists():
-            return
-
-        block_temp = tempfile.mkdtemp()
-        try:
-            with zipfile.ZipFile(block_file, 'r') as zip_ref:
-                zip_ref.extractall(block_temp)
-
-            block_xml_path = Path(block_temp) / 'word' / 'document.xml'
-            block_tree = etree.parse(str(block_xml_path), self.parser)
-            block_root = block_tree.getroot()
-
-            block_body = block_root.find(f'.//{{{self.w_ns}}}body')
-            if block_body is None:
-                return
+        # Buscar párrafo con marcador
+        target_para = self._find_paragraph_with_marker(marker)
 
-            # Obtener todos los elementos del cuerpo del documento
-            block_elements = list(block_body)
-
-            # Buscar párrafo con marcador
-            target_para = None
-            all_paras = self.root.findall(f'.//{{{self.w_ns}}}p')
-
-            for para in all_paras:
-                para_text = self._get_paragraph_text(para)
-                if marker in para_text:
-                    target_para = para
-                    break
-
-            if target_para is None:
-                return
-
-            # Insertar elementos REMOVIENDO section properties para preservar columnas
-            parent = target_para.getparent()
-            para_pos = list(parent).index(target_para)
-
-            for i, elem in enumerate(block_elements):
-                # Hacer copia profunda del elemento
-                elem_copy = deepcopy(elem)
-
-                # CRÍTICO: Remover sectPr (propiedades de sección) para preservar columnas
-                # Las section properties incluyen configuración de columnas, márgenes, etc.
-                # Si las copiamos, romperán el diseño de doble columna del documento principal
-                self._remove_section_properties_from_element(elem_copy)
+        if target_para is None:
+            return
 
-                # Insertar el elemento limpio
-                parent.insert(para_pos + 1 + i, elem_copy)
+        # Cuerpo del bloque ya parseado y sin sectPr (desde la caché de bloques)
+        block = self.block_cache.get(block_file)
+        if block is None:
+            return
 
-            # Limpiar el marcador del párrafo original sin eliminarlo
-            # (para preservar cualquier configuración de sección que pueda tener)
-            self._remove_marker_from_paragraph(target_para, marker)
+        self._insert_block_after_paragraph(target_para, marker, block)
 
-            # Si el párrafo quedó vacío después de limpiar el marcador, eliminarlo
-            # únicamente cuando no contiene propiedades de sección. Estos párrafos
-            # suelen guardar la configuración de columnas del documento y removerlos
-            # rompe el diseño de doble columna.
-            para_text_after = self._get_paragraph_text(target_para).strip()
-            has_section = self._paragraph_has_section_break_xml(target_para)
+    def _insert_block_after_paragraph(self, target_para: etree.Element, marker: str, block: CachedBlock):
+        """Inserta los elementos del bloque tras el párrafo del marcador y limpia el marcador."""
+        # Insertar elementos REMOVIENDO section properties para preservar columnas
+        # (la caché ya los eliminó: las section properties incluyen configuración
+        # de columnas, márgenes, etc. y romperían el diseño de doble columna)
+        parent = target_para.getparent()
+        previous = target_para
+
+        for elem_copy in block.new_fragments():
+            # Insertar el elemento limpio a continuación del anterior
+            previous.addnext(elem_copy)
+            previous = elem_copy
+            self._index_element(elem_copy)
+            self.metrics.touch()
+        self._invalidate_views(parent)
+
+        # Limpiar el marcador del párrafo original sin eliminarlo
+        # (para preservar cualquier configuración de sección que pueda tener)
+        self._remove_marker_from_paragraph(target_para, marker)
 
-            if (not para_text_after) and (not has_section):
-                parent.remove(target_para)
+        # Si el párrafo quedó vacío después de limpiar el marcador, eliminarlo
+        # únicamente cuando no contiene propiedades de sección. Estos párrafos
+        # suelen guardar la configuración de columnas del documento y removerlos
+        # rompe el diseño de doble columna.
+        para_text_after = self._get_paragraph_text(target_para).strip()
+        has_section = self._paragraph_has_section_break_xml(target_para)
 
-        finally:
-            shutil.rmtree(block_temp, ignore_errors=True)
+        if (not para_text_after) and (not has_section):
+            self._remove_paragraph(target_para)
 
+    @instrumented
     def remove_discrepancias_formales_section(self):
         """Elimina títulos y entradas del índice de Discrepancias formales."""
         targets = [
@@ -408,31 +865,6 @@ class XMLWordEngineAdapter:
         ]
         self._remove_paragraphs_containing_text(targets)
 
-    def _remove_section_properties_from_element(self, elem: etree.Element):
-        """
-        Remueve recursivamente todas las propiedades de sección (sectPr) de un elemento.
-
-        Esto es CRÍTICO para preservar el diseño de doble columna del documento principal.
-        Las section properties controlan el layout de columnas, y si se copian del documento
-        de condición, romperán el diseño del documento principal.
-
-        Args:
-            elem: Elemento XML del cual remover sectPr
-        """
-        # Si el elemento es un párrafo, buscar sectPr en sus propiedades
-        if elem.tag == f'{{{self.w_ns}}}p':
-            pPr = elem.find(f'{{{self.w_ns}}}pPr')
-            if pPr is not None:
-                sectPr = pPr.find(f'{{{self.w_ns}}}sectPr')
-                if sectPr is not None:
-                    pPr.remove(sectPr)
-
-        # Buscar y remover sectPr en el nivel de body (no debería estar aquí, pero por seguridad)
-        for sectPr in elem.findall(f'.//{{{self.w_ns}}}sectPr'):
-            parent = sectPr.getparent()
-            if parent is not None:
-                parent.remove(sectPr)
-
     def _remove_paragraphs_containing_text(self, targets: List[str]):
         """Elimina párrafos cuyo texto contiene cualquiera de los objetivos dados."""
         if not targets:
@@ -449,17 +881,15 @@ class XMLWordEngineAdapter:
                 paras_to_remove.append(para)
 
         for para in paras_to_remove:
-            parent = para.getparent()
-            if parent is not None:
-                parent.remove(para)
+            self._remove_paragraph(para)
     
     # Métodos simplificados/stub para compatibilidad
+    @instrumented
     def process_salto_markers(self):
         """
         Procesa los marcadores {salto} insertando saltos de página y eliminando el marcador.
         Implementación completa usando XML directo.
         """
-        salto_pattern = re.compile(r'\{salto\}')
         body = self.root.find(f'.//{{{self.w_ns}}}body')
         if body is None:
             return
@@ -468,45 +898,59 @@ class XMLWordEngineAdapter:
         all_paras = body.findall(f'.//{{{self.w_ns}}}p')
 
         for para in all_paras:
-            para_text = self._get_paragraph_text(para)
+            self._process_salto_in_paragraph(para)
+
+    def _process_salto_in_paragraph(self, para: etree.Element):
+        """Sustituye los {salto} de un párrafo por saltos de página."""
+        salto_pattern = SALTO_PATTERN
 
-            if salto_pattern.search(para_text):
-                # Procesar cada elemento de texto que contiene {salto}
-                for text_elem in para.findall(f'.//{{{self.w_ns}}}t'):
-                    if text_elem.text and '{salto}' in text_elem.text:
-                        # Dividir el texto en antes y después del {salto}
-                        parts = text_elem.text.split('{salto}', 1)
-
-                        if len(parts) == 2:
-                            before_salto = parts[0]
-                            after_salto = parts[1]
-
-                            # Actualizar el texto antes del salto
-                            text_elem.text = before_salto
-
-                            # Obtener el run padre
-                            run = text_elem.getparent()
-
-                            # Crear un nuevo run con el salto de página
-                            new_run = etree.Element(f'{{{self.w_ns}}}r')
-                            br = etree.SubElement(new_run, f'{{{self.w_ns}}}br')
-                            br.set(f'{{{self.w_ns}}}type', 'page')
-
-                            # Insertar el nuevo run después del run actual
-                            para_index = list(para).index(run)
-                            para.insert(para_index + 1, new_run)
-
-                            # Si hay texto después del salto, crear otro run
-                            if after_salto:
-                                after_run = etree.Element(f'{{{self.w_ns}}}r')
-                                after_text = etree.SubElement(after_run, f'{{{self.w_ns}}}t')
-                                after_text.text = after_salto
-                                after_text.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
-                                para.insert(para_index + 2, after_run)
-                        else:
-                            # Solo eliminar el marcador
-                            text_elem.text = salto_pattern.sub('', text_elem.text)
+        para_text = self._get_paragraph_text(para)
+        if not salto_pattern.search(para_text):
+            return
 
+        # Procesar cada elemento de texto que contiene {salto}
+        for text_elem in para.findall(f'.//{{{self.w_ns}}}t'):
+            if text_elem.text and '{salto}' in text_elem.text:
+                # Dividir el texto en antes y después del {salto}
+                parts = text_elem.text.split('{salto}', 1)
+
+                if len(parts) == 2:
+                    before_salto = parts[0]
+                    after_salto = parts[1]
+
+                    # Actualizar el texto antes del salto
+                    text_elem.text = before_salto
+                    self.metrics.touch(2)
+
+                    # Obtener el run padre
+                    run = text_elem.getparent()
+
+                    # Crear un nuevo run con el salto de página
+                    new_run = etree.Element(f'{{{self.w_ns}}}r')
+                    br = etree.SubElement(new_run, f'{{{self.w_ns}}}br')
+                    br.set(f'{{{self.w_ns}}}type', 'page')
+
+                    # Insertar el nuevo run después del run actual
+                    para_index = list(para).index(run)
+                    para.insert(para_index + 1, new_run)
+
+                    # Si hay texto después del salto, crear otro run
+                    if after_salto:
+                        after_run = etree.Element(f'{{{self.w_ns}}}r')
+                        after_text = etree.SubElement(after_run, f'{{{self.w_ns}}}t')
+                        after_text.text = after_salto
+                        after_text.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
+                        para.insert(para_index + 2, after_run)
+                        self.metrics.touch()
+                else:
+                    # Solo eliminar el marcador
+                    text_elem.text = salto_pattern.sub('', text_elem.text)
+                    self.metrics.touch()
+
+        self._invalidate_views(para)
+        self._index_paragraph(para)
+
+    @instrumented
     def process_table_of_contents(self):
         """
         Procesa el índice (tabla de contenidos) del documento usando marcadores numéricos.
@@ -515,6 +959,9 @@ class XMLWordEngineAdapter:
         (<<1>>, <<2>>, etc.), inserta saltos de página antes de ellos, calcula los números
         de página y actualiza el índice. También inserta un salto de página antes del índice.
         """
+        if "<<Indice>>" not in self._marker_index or "<<fin Indice>>" not in self._marker_index:
+            return
+
         body = self.root.find(f'.//{{{self.w_ns}}}body')
         if body is None:
             return
@@ -568,18 +1015,31 @@ class XMLWordEngineAdapter:
             self._remove_marker_from_paragraph(all_paras[toc_end_idx], "<<fin Indice>>")
             return
 
-        # Fase 1: Buscar cada marcador en el documento e insertar saltos de página
+        # Un único recorrido tras el índice localiza la primera aparición de todos
+        # los marcadores numéricos (los saltos insertados no cambian el texto)
+        marker_positions = self._locate_markers_after(
+            all_paras, toc_end_idx, {entry['marker'] for entry in toc_entries}
+        )
+        page_breaks = [self._has_page_break_xml(para) for para in all_paras]
+
+        # Fase 1: Insertar saltos de página antes de cada marcador
         for entry in toc_entries:
-            marker = entry['marker']
-            self._insert_page_break_before_marker_xml(marker, toc_end_idx, all_paras)
+            position = marker_positions.get(entry['marker'])
+            if position is not None:
+                self._insert_page_break_before_position(position, all_paras, page_breaks)
 
-        # Fase 2: Calcular números de página para cada marcador
+        # Fase 2: Calcular números de página con el acumulado de saltos
         marker_to_page = {}
+        page_count = 1
+        page_at = []
+        for has_break in page_breaks:
+            page_count += has_break
+            page_at.append(page_count)
+
         for entry in toc_entries:
-            marker = entry['marker']
-            page_num = self._find_marker_page_number_xml(marker, toc_end_idx, all_paras)
-            if page_num is not None:
-                marker_to_page[marker] = page_num
+            position = marker_positions.get(entry['marker'])
+            if position is not None:
+                marker_to_page[entry['marker']] = page_at[position]
 
         # Fase 3: Actualizar el índice con los números de página
         for entry in toc_entries:
@@ -588,14 +1048,7 @@ class XMLWordEngineAdapter:
             marker = entry['marker']
 
             if marker in marker_to_page:
-                page_num = marker_to_page[marker]
-
-                clean_title = re.sub(r'[\.\s]+\d+$', '', title).strip()
-                dots_length = max(3, 80 - len(clean_title) - len(str(page_num)) - 2)
-                dots = '.' * dots_length
-
-                new_text = f"{clean_title} {dots} {page_num}"
-                self._set_paragraph_text(para, new_text)
+                self._set_paragraph_text(para, self._toc_entry_text(title, marker_to_page[marker]))
             else:
                 # Entrada sin página -> eliminar del índice
                 self._remove_paragraph(para)
@@ -621,89 +1074,91 @@ class XMLWordEngineAdapter:
             prev_para = all_paras[toc_start_idx - 1]
             self._insert_page_break_at_end_of_paragraph(prev_para)
 
-    def _insert_page_break_before_marker_xml(self, marker: str, toc_end_idx: int, all_paras: list):
+    @staticmethod
+    def _toc_entry_text(title: str, page_num: int) -> str:
+        """Texto de una entrada del índice: título, puntos de relleno y página."""
+        clean_title = re.sub(r'[\.\s]+\d+$', '', title).strip()
+        dots_length = max(3, 80 - len(clean_title) - len(str(page_num)) - 2)
+        dots = '.' * dots_length
+
+        return f"{clean_title} {dots} {page_num}"
+
+    def _locate_markers_after(self, all_paras: list, start_idx: int, markers: set) -> Dict[str, int]:
         """
-        Busca un marcador numérico en el documento e inserta un salto de página antes de él.
+        Busca en un solo recorrido la primera aparición de cada marcador.
 
         Args:
-            marker: Marcador numérico a buscar (ej: "<<1>>")
-            toc_end_idx: Índice del final del índice (para empezar búsqueda después)
             all_paras: Lista de todos los párrafos
+            start_idx: Índice a partir del cual buscar (excluido)
+            markers: Marcadores de la forma <<...>> a localizar (ej: {"<<1>>", "<<2>>"})
+
+        Returns:
+            Diccionario {marcador: índice del párrafo}; los no encontrados no aparecen
         """
-        for i in range(toc_end_idx + 1, len(all_paras)):
-            para = all_paras[i]
-            para_text = self._get_paragraph_text(para)
+        positions = {}
+        pending = set(markers)
 
-            if marker in para_text:
-                # Verificar si ya hay un salto de página
-                has_page_break = self._has_page_break_xml(para)
-
-                # También verificar el párrafo anterior
-                if i > 0 and not has_page_break:
-                    prev_para = all_paras[i - 1]
-                    has_page_break = self._has_page_break_xml(prev_para)
-
-                # Si no tiene salto de página, insertar uno
-                if not has_page_break:
-                    if i > 0:
-                        # Insertar al final del párrafo anterior
-                        prev_para = all_paras[i - 1]
-                        self._insert_page_break_at_end_of_paragraph(prev_para)
-                    else:
-                        # Insertar al inicio del párrafo actual
-                        self._insert_page_break_at_start_of_paragraph(para)
-
-                # Solo procesar la primera ocurrencia
+        for i in range(start_idx + 1, len(all_paras)):
+            if not pending:
                 break
 
-    def _find_marker_page_number_xml(self, marker: str, start_search_idx: int, all_paras: list) -> Optional[int]:
+            para_text = self._get_paragraph_text(all_paras[i])
+            if '<<' not in para_text:
+                continue
+
+            for match in INDEXED_MARKER_PATTERN.finditer(para_text):
+                marker = match.group(0)
+                if marker in pending:
+                    positions[marker] = i
+                    pending.discard(marker)
+
+        return positions
+
+    def _insert_page_break_before_position(self, i: int, all_paras: list, page_breaks: list):
         """
-        Encuentra el número de página donde aparece un marcador numérico.
+        Inserta un salto de página antes del párrafo i si no hay ya uno en él o en el anterior.
 
         Args:
-            marker: Marcador numérico a buscar (ej: "<<1>>")
-            start_search_idx: Índice desde donde empezar la búsqueda
+            i: Índice del párrafo que debe empezar página
             all_paras: Lista de todos los párrafos
-
-        Returns:
-            Número de página donde se encuentra el marcador, o None si no se encuentra
+            page_breaks: Indicador de salto por párrafo (se actualiza al insertar)
         """
-        page_count = self._calculate_page_count_until_idx(all_paras, start_search_idx)
-
-        for i in range(start_search_idx + 1, len(all_paras)):
-            para = all_paras[i]
-
-            # Verificar si hay un salto de página en este párrafo
-            if self._has_page_break_xml(para):
-                page_count += 1
-
-            # Verificar si este párrafo contiene el marcador
-            para_text = self._get_paragraph_text(para)
-            if marker in para_text:
-                return page_count
+        # Verificar si ya hay un salto de página (en el párrafo o en el anterior)
+        if page_breaks[i] or (i > 0 and page_breaks[i - 1]):
+            return
 
-        return None
+        if i > 0:
+            # Insertar al final del párrafo anterior
+            self._insert_page_break_at_end_of_paragraph(all_paras[i - 1])
+            page_breaks[i - 1] = True
+        else:
+            # Insertar al inicio del párrafo actual
+            self._insert_page_break_at_start_of_paragraph(all_paras[i])
+            page_breaks[i] = True
 
     def _remove_numeric_markers_xml(self):
         """Elimina todos los marcadores numéricos (<<1>>, <<2>>, etc.) del documento."""
         marker_pattern = re.compile(r'<<\d+>>')
 
-        for text_elem in self.root.findall(f'.//{{{self.w_ns}}}t'):
-            if text_elem.text and marker_pattern.search(text_elem.text):
-                text_elem.text = marker_pattern.sub('', text_elem.text)
-
-    def _calculate_page_count_until_idx(self, all_paras: list, end_idx: int) -> int:
-        """Calcula el número de página acumulado hasta un índice de párrafo dado."""
-        page_count = 1
-
-        if end_idx is None:
-            return page_count
-
-        for i in range(0, min(end_idx + 1, len(all_paras))):
-            if self._has_page_break_xml(all_paras[i]):
-                page_count += 1
+        # Solo los párrafos indexados con algún marcador numérico
+        paragraphs = {
+            para: None
+            for marker, paras in self._marker_index.items()
+            if marker_pattern.fullmatch(marker)
+            for para in paras
+        }
 
-        return page_count
+        self.metrics.scan(len(paragraphs))
+        for para in list(paragraphs):
+            changed = False
+            for text_elem in para.iter(f'{{{self.w_ns}}}t'):
+                if text_elem.text and marker_pattern.search(text_elem.text):
+                    text_elem.text = marker_pattern.sub('', text_elem.text)
+                    self.metrics.touch()
+                    changed = True
+            if changed:
+                self._invalidate_views(para)
+                self._index_paragraph(para)
 
     def _has_page_break_xml(self, para: etree.Element) -> bool:
         """
@@ -715,6 +1170,12 @@ class XMLWordEngineAdapter:
         Returns:
             True si el párrafo contiene un salto de página, False en caso contrario
         """
+        view = self._paragraph_view(para)
+        if view.has_page_break is None:
+            view.has_page_break = self._compute_has_page_break(para)
+        return view.has_page_break
+
+    def _compute_has_page_break(self, para: etree.Element) -> bool:
         # Considerar saltos de página explícitos
         if self._paragraph_has_section_page_break(para):
             return True
@@ -738,6 +1199,8 @@ class XMLWordEngineAdapter:
 
         # Agregar al final del párrafo
         para.append(new_run)
+        self._invalidate_views(para)
+        self.metrics.touch()
 
     def _insert_page_break_at_start_of_paragraph(self, para: etree.Element):
         """Inserta un salto de página al inicio de un párrafo."""
@@ -748,6 +1211,8 @@ class XMLWordEngineAdapter:
 
         # Insertar al inicio del párrafo
         para.insert(0, new_run)
+        self._invalidate_views(para)
+        self.metrics.touch()
 
     def _set_paragraph_text(self, para: etree.Element, new_text: str):
         """Establece el texto de un párrafo, reemplazando todo el contenido de texto."""
@@ -763,6 +1228,7 @@ class XMLWordEngineAdapter:
                 run = text_elem.getparent()
                 if run is not None:
                     run.remove(text_elem)
+                    self.metrics.touch()
         else:
             # No hay elementos de texto, crear uno nuevo
             run = para.find(f'.//{{{self.w_ns}}}r')
@@ -773,6 +1239,10 @@ class XMLWordEngineAdapter:
             text_elem = etree.SubElement(run, f'{{{self.w_ns}}}t')
             self._set_text_with_preserve(text_elem, new_text)
 
+        self._invalidate_views(para)
+        self._index_paragraph(para, new_text)
+
+    @instrumented
     def clean_unused_markers(self):
         """
         Elimina TODOS los marcadores << >> del documento generado.
@@ -786,105 +1256,82 @@ class XMLWordEngineAdapter:
         o que tengan configuración de sección (sectPr), para preservar el diseño
         de doble columna y otros elementos visuales.
         """
-        marker_pattern = re.compile(r'<<[^>]+>>')
         body = self.root.find(f'.//{{{self.w_ns}}}body')
         if body is None:
             return
 
-        paras_to_delete = []
-        all_paras = body.findall(f'{{{self.w_ns}}}p')
-
-        for para in all_paras:
-            para_text = self._get_paragraph_text(para)
-
-            if marker_pattern.search(para_text):
-                # Proteger párrafos con configuración de sección (columnas, etc.)
-                if self._paragraph_has_section_break_xml(para):
-                    # Solo eliminar el marcador, preservar el párrafo
-                    for text_elem in para.findall(f'.//{{{self.w_ns}}}t'):
-                        if text_elem.text:
-                            text_elem.text = marker_pattern.sub('', text_elem.text)
-                    continue
-
-                # Proteger párrafos con imágenes o dibujos
-                if self._has_drawing_or_image_xml(para):
-                    # Solo eliminar el marcador, preservar el párrafo
-                    for text_elem in para.findall(f'.//{{{self.w_ns}}}t'):
-                        if text_elem.text:
-                            text_elem.text = marker_pattern.sub('', text_elem.text)
-                    continue
-
-                # Verificar si el párrafo solo contiene marcador y elementos decorativos
-                text_without_markers = marker_pattern.sub('', para_text).strip()
-                # Eliminar puntuación común, números, guiones, viñetas
-                text_cleaned = re.sub(r'^[\d\.\-\)\(\s•·◦▪▫○●\*]+$', '', text_without_markers)
-
-                if not text_cleaned:
-                    # El párrafo solo contiene marcador + elementos decorativos
-                    paras_to_delete.append(para)
-                else:
-                    # Hay contenido real, solo eliminar el marcador
-                    for text_elem in para.findall(f'.//{{{self.w_ns}}}t'):
-                        if text_elem.text:
-                            text_elem.text = marker_pattern.sub('', text_elem.text)
+        # Se recorren todos los párrafos de primer nivel (su texto ya está en
+        # caché) en lugar del índice, para cubrir también marcadores que el
+        # índice no reconoce (ej: <<a<b>>)
+        paras_to_delete = [
+            para for para in body.iterchildren(f'{{{self.w_ns}}}p')
+            if self._clean_paragraph_markers(para)
+        ]
 
         # Eliminar los párrafos marcados
         for para in paras_to_delete:
-            body.remove(para)
+            self._remove_paragraph(para)
 
         # Segunda pasada: eliminar cualquier marcador restante en tablas, headers y footers
         # Esto asegura que TODOS los marcadores << >> sean eliminados del documento
         self._remove_all_markers_from_tables()
         self._remove_all_markers_from_headers_footers()
 
+    def _clean_paragraph_markers(self, para: etree.Element) -> bool:
+        """
+        Aplica a un párrafo la limpieza de clean_unused_markers.
+
+        Quita los marcadores del texto salvo que el párrafo solo contenga
+        marcadores y elementos decorativos, en cuyo caso no lo modifica.
+
+        Returns:
+            True si el párrafo debe eliminarse
+        """
+        para_text = self._get_paragraph_text(para)
+
+        if not UNUSED_MARKER_PATTERN.search(para_text):
+            return False
+
+        # Proteger párrafos con configuración de sección (columnas, etc.) y
+        # párrafos con imágenes o dibujos: solo se elimina el marcador
+        if not self._paragraph_has_section_break_xml(para) and not self._has_drawing_or_image_xml(para):
+            # Verificar si el párrafo solo contiene marcador y elementos decorativos
+            text_without_markers = UNUSED_MARKER_PATTERN.sub('', para_text).strip()
+            # Eliminar puntuación común, números, guiones, viñetas
+            text_cleaned = re.sub(r'^[\d\.\-\)\(\s•·◦▪▫○●\*]+$', '', text_without_markers)
+
+            if not text_cleaned:
+                # El párrafo solo contiene marcador + elementos decorativos
+                return True
+
+        for text_elem in para.findall(f'.//{{{self.w_ns}}}t'):
+            if text_elem.text:
+                text_elem.text = UNUSED_MARKER_PATTERN.sub('', text_elem.text)
+                self.metrics.touch()
+        self._invalidate_views(para)
+        self._index_paragraph(para)
+        return False
+
     def _remove_all_markers_from_tables(self):
         """Elimina todos los marcadores << >> de todas las tablas del documento."""
-        marker_pattern = re.compile(r'<<[^>]+>>')
-
-        # Buscar todas las tablas en el documento
-        for table in self.root.findall(f'.//{{{self.w_ns}}}tbl'):
-            # Buscar todos los elementos de texto en la tabla
-            for text_elem in table.findall(f'.//{{{self.w_ns}}}t'):
-                if text_elem.text and marker_pattern.search(text_elem.text):
-                    text_elem.text = marker_pattern.sub('', text_elem.text)
+        for table in self.root.iter(f'{{{self.w_ns}}}tbl'):
+            self._strip_markers_from_table(table)
 
     def _remove_all_markers_from_headers_footers(self):
-        """Elimina todos los marcadores << >> de headers y footers."""
-        marker_pattern = re.compile(r'<<[^>]+>>')
-
-        # Headers y footers están en archivos separados dentro del documento
-        # Buscar en header*.xml y footer*.xml
-        header_footer_paths = [
-            Path(self.temp_dir) / 'word' / 'header1.xml',
-            Path(self.temp_dir) / 'word' / 'header2.xml',
-            Path(self.temp_dir) / 'word' / 'header3.xml',
-            Path(self.temp_dir) / 'word' / 'footer1.xml',
-            Path(self.temp_dir) / 'word' / 'footer2.xml',
-            Path(self.temp_dir) / 'word' / 'footer3.xml',
-        ]
+        """
+        Elimina todos los marcadores << >> de headers, footers y notas.
 
-        for hf_path in header_footer_paths:
-            if hf_path.exists():
-                try:
-                    tree = etree.parse(str(hf_path), self.parser)
-                    root = tree.getroot()
-
-                    # Eliminar marcadores de todos los elementos de texto
-                    for text_elem in root.findall(f'.//{{{self.w_ns}}}t'):
-                        if text_elem.text and marker_pattern.search(text_elem.text):
-                            text_elem.text = marker_pattern.sub('', text_elem.text)
-
-                    # Guardar el archivo modificado
-                    tree.write(
-                        str(hf_path),
-                        encoding='UTF-8',
-                        xml_declaration=True,
-                        standalone=True,
-                        pretty_print=False
-                    )
-                except Exception:
-                    # Si hay algún error, continuar con el siguiente
-                    pass
+        Las partes se descubren en document.xml.rels al cargar la plantilla y ya
+        están parseadas en self.story_trees; solo se marcan como modificadas las
+        que cambian, para copiar el resto sin recomprimir al reempaquetar.
+        """
+        for part_name, tree in self.story_trees.items():
+            for text_elem in tree.iter(f'{{{self.w_ns}}}t'):
+                if text_elem.text and UNUSED_MARKER_PATTERN.search(text_elem.text):
+                    text_elem.text = UNUSED_MARKER_PATTERN.sub('', text_elem.text)
+                    self._invalidate_views(text_elem)
+                    self.metrics.touch()
+                    self._dirty_story_parts.add(part_name)
 
     def _paragraph_has_section_break_xml(self, para: etree.Element) -> bool:
         """
@@ -896,13 +1343,12 @@ class XMLWordEngineAdapter:
         Returns:
             True si el párrafo tiene sectPr, False en caso contrario
         """
-        # Buscar elemento sectPr en las propiedades del párrafo
-        pPr = para.find(f'{{{self.w_ns}}}pPr')
-        if pPr is not None:
-            sectPr = pPr.find(f'{{{self.w_ns}}}sectPr')
-            if sectPr is not None:
-                return True
-        return False
+        view = self._paragraph_view(para)
+        if view.has_sectPr is None:
+            # Buscar elemento sectPr en las propiedades del párrafo
+            pPr = para.find(f'{{{self.w_ns}}}pPr')
+            view.has_sectPr = pPr is not None and pPr.find(f'{{{self.w_ns}}}sectPr') is not None
+        return view.has_sectPr
 
     def _paragraph_has_section_page_break(self, para: etree.Element) -> bool:
         """Detecta si una sección obliga a iniciar una nueva página."""
@@ -930,6 +1376,12 @@ class XMLWordEngineAdapter:
         Returns:
             True si el párrafo contiene elementos gráficos, False en caso contrario
         """
+        view = self._paragraph_view(para)
+        if view.has_drawing is None:
+            view.has_drawing = self._compute_has_drawing_or_image(para)
+        return view.has_drawing
+
+    def _compute_has_drawing_or_image(self, para: etree.Element) -> bool:
         # Buscar elementos de dibujo (drawing)
         if para.find(f'.//{{{self.w_ns}}}drawing') is not None:
             return True
@@ -947,130 +1399,134 @@ class XMLWordEngineAdapter:
 
         return False
     
+    @instrumented
     def remove_empty_lines_at_page_start(self):
         """Elimina líneas vacías al inicio de páginas - stub."""
         pass
     
+    @instrumented
     def clean_empty_paragraphs(self):
         """Limpia párrafos vacíos - implementación simplificada."""
         body = self.root.find(f'.//{{{self.w_ns}}}body')
         if body is None:
             return
 
-        paras_to_remove = []
-        for para in body.findall(f'{{{self.w_ns}}}p'):
-            text = self._get_paragraph_text(para)
-            normalized_text = text.replace('\u00A0', '')
-            if not normalized_text.strip():
-                if '\u00A0' in text:
-                    continue  # Preservar párrafos separadores con espacios duros
-                # Verificar que no tiene imágenes
-                has_drawing = para.find(f'.//{{{self.w_ns}}}drawing') is not None
-                # No eliminar párrafos que contengan propiedades de sección, ya que
-                # suelen almacenar configuraciones de columnas/márgenes que deben
-                # preservarse para mantener el diseño del documento.
-                has_section = self._paragraph_has_section_break_xml(para)
-
-                if not has_drawing and not has_section:
-                    paras_to_remove.append(para)
+        paras_to_remove = [
+            para for para in body.findall(f'{{{self.w_ns}}}p')
+            if self._is_removable_empty_paragraph(para)
+        ]
         
         for para in paras_to_remove:
             body.remove(para)
+            self._discard_views(para)
+        self.metrics.touch(len(paras_to_remove))
+
+    def _is_removable_empty_paragraph(self, para: etree.Element) -> bool:
+        """Indica si clean_empty_paragraphs debe eliminar el párrafo."""
+        text = self._get_paragraph_text(para)
+        normalized_text = text.replace('\u00A0', '')
+        if normalized_text.strip():
+            return False
+        if '\u00A0' in text:
+            return False  # Preservar párrafos separadores con espacios duros
+        # Verificar que no tiene imágenes
+        if para.find(f'.//{{{self.w_ns}}}drawing') is not None:
+            return False
+        # No eliminar párrafos que contengan propiedades de sección, ya que
+        # suelen almacenar configuraciones de columnas/márgenes que deben
+        # preservarse para mantener el diseño del documento.
+        return not self._paragraph_has_section_break_xml(para)
+
+    @instrumented
+    def clean_document(self):
+        """
+        Limpieza final en un solo recorrido del cuerpo del documento.
+
+        Equivale a llamar a clean_unused_markers y después a clean_empty_paragraphs,
+        pero visita cada párrafo de primer nivel una sola vez: primero se quitan
+        sus marcadores (o se descarta si solo contenía marcadores y elementos
+        decorativos) y, si queda vacío, se elimina. Tablas, headers y footers se
+        limpian en el mismo recorrido.
+        """
+        body = self.root.find(f'.//{{{self.w_ns}}}body')
+        if body is None:
+            return
+
+        # Se comprueba el texto de cada párrafo (ya en caché) y de cada tabla en
+        # lugar del índice, para cubrir también marcadores que el índice no
+        # reconoce (ej: <<a<b>>)
+        paras_to_delete = []
+        for child in body:
+            if child.tag == f'{{{self.w_ns}}}p':
+                if self._clean_paragraph_markers(child) or self._is_removable_empty_paragraph(child):
+                    paras_to_delete.append(child)
+            else:
+                for table in child.iter(f'{{{self.w_ns}}}tbl'):
+                    self._strip_markers_from_table(table)
+
+        for para in paras_to_delete:
+            self._remove_paragraph(para)
+
+        self._remove_all_markers_from_headers_footers()
+
+    def _strip_markers_from_table(self, table: etree.Element):
+        """Elimina los marcadores << >> de los textos de una tabla."""
+        changed_paras = {}
+        for text_elem in table.iter(f'{{{self.w_ns}}}t'):
+            if text_elem.text and UNUSED_MARKER_PATTERN.search(text_elem.text):
+                text_elem.text = UNUSED_MARKER_PATTERN.sub('', text_elem.text)
+                self.metrics.touch()
+                para = next(text_elem.iterancestors(f'{{{self.w_ns}}}p'), None)
+                if para is not None:
+                    changed_paras[para] = None
+
+        for para in changed_paras:
+            self._invalidate_views(para)
+            self._index_paragraph(para)
     
+    @instrumented
     def remove_empty_pages(self):
         """Elimina páginas vacías - stub."""
         pass  # Difícil de implementar en XML puro
     
+    @instrumented
     def preserve_headers_and_footers(self):
         """Preserva headers y footers - no necesario (ya se preservan)."""
         pass
     
+    @instrumented
     def insert_background_image(self, image_path: Path, page_type: str = "first"):
         """Inserta imagen de fondo - stub."""
         pass  # Las imágenes ya se preservan automáticamente
     
     def _get_paragraph_text(self, para: etree.Element) -> str:
         """Obtiene texto completo de un párrafo."""
-        texts = []
-        for text_elem in para.findall(f'.//{{{self.w_ns}}}t'):
-            if text_elem.text:
-                texts.append(text_elem.text)
-        return ''.join(texts)
+        return self._paragraph_view(para).text
 
     def _remove_marker_from_paragraph(self, para: etree.Element, marker: str):
         """Elimina todas las instancias de un marcador en un párrafo."""
         if para is None or not marker:
             return
 
-        para_text = self._get_paragraph_text(para)
-
-        while marker in para_text:
-            self._replace_marker_in_paragraph_xml(para, marker, '')
-            para_text = self._get_paragraph_text(para)
-
-    def _replace_marker_in_paragraph_xml(self, para: etree.Element, marker: str, value: str):
-        """Reemplaza un marcador dentro de un párrafo preservando los runs existentes."""
-        text_nodes = []
-        current_pos = 0
-
-        for text_elem in para.findall(f'.//{{{self.w_ns}}}t'):
-            text = text_elem.text or ''
-            start = current_pos
-            end = start + len(text)
-            text_nodes.append({'element': text_elem, 'text': text, 'start': start, 'end': end})
-            current_pos = end
-
-        if not text_nodes:
-            return
-
-        full_text = ''.join(node['text'] for node in text_nodes)
-
-        if marker not in full_text:
-            return
-
-        marker_start = full_text.index(marker)
-        marker_end = marker_start + len(marker)
-        inserted = False
-        value = value or ''
-
-        for node in text_nodes:
-            text_elem = node['element']
-            text = node['text']
-            start = node['start']
-            end = node['end']
-
-            if end <= marker_start or start >= marker_end:
-                # Nodo fuera del marcador
-                continue
-
-            before = ''
-            after = ''
-
-            if start < marker_start < end:
-                before = text[:marker_start - start]
+        text_nodes = self._collect_text_nodes(para)
+        para_text = ''.join(text for _, text, _ in text_nodes)
 
-            if start < marker_end < end:
-                after = text[marker_end - start:]
+        # Desplazamientos ya conocidos por el índice (validados contra el texto actual)
+        matches = [
+            (start, end, '')
+            for indexed_marker, start, end in self._paragraph_markers.get(para, ())
+            if indexed_marker == marker and para_text[start:end] == marker
+        ]
 
-            if start <= marker_start and end >= marker_end:
-                replacement = before + value + after
-                self._set_text_with_preserve(text_elem, replacement)
-                inserted = True
-            elif start <= marker_start < end:
-                self._set_text_with_preserve(text_elem, before + value)
-                inserted = True
-            elif start < marker_end <= end:
-                self._set_text_with_preserve(text_elem, after)
-            else:
-                # El nodo está completamente dentro del marcador
-                self._set_text_with_preserve(text_elem, '')
+        if not matches:
+            start = para_text.find(marker)
+            while start != -1:
+                matches.append((start, start + len(marker), ''))
+                start = para_text.find(marker, start + len(marker))
 
-        if not inserted:
-            first_node = next((n for n in text_nodes if n['end'] > marker_start), None)
-            if first_node:
-                text_elem = first_node['element']
-                current_text = text_elem.text or ''
-                self._set_text_with_preserve(text_elem, current_text + value)
+        if matches:
+            self._splice_matches_in_text_nodes(text_nodes, matches)
+            self._index_paragraph(para)
 
     def _set_text_with_preserve(self, text_elem: etree.Element, new_text: str):
         """Actualiza el texto garantizando xml:space cuando sea necesario."""
@@ -1078,6 +1534,8 @@ class XMLWordEngineAdapter:
             new_text = ''
 
         text_elem.text = new_text
+        self._invalidate_views(text_elem)
+        self.metrics.touch()
 
         needs_preserve = (
             new_text.startswith(' ') or
@@ -1097,52 +1555,69 @@ class XMLWordEngineAdapter:
         if para is None:
             return
 
+        self._unindex_element(para)
+
+        self._discard_views(para)
+
         parent = para.getparent()
         if parent is not None:
             parent.remove(para)
+            self._invalidate_views(parent)
+            self.metrics.touch()
     
-    def get_document_bytes(self) -> bytes:
-        """Retorna el documento como bytes."""
-        # Guardar XML
-        self.tree.write(
-            str(self.doc_xml_path),
+    @instrumented
+    def get_document_bytes(self, compression_policy: CompressionPolicy = None) -> bytes:
+        """
+        Retorna el documento como bytes.
+
+        Args:
+            compression_policy: Compresión por tipo de parte (por defecto, XML con
+                deflate y las imágenes ya comprimidas sin recomprimir)
+        """
+        # Serializar XML
+        document_xml = etree.tostring(
+            self.tree,
             encoding='UTF-8',
             xml_declaration=True,
             standalone=True,
             pretty_print=False
         )
         
-        # Reempaquetar
-        temp_output = tempfile.mktemp(suffix='.docx')
-        try:
-            with zipfile.ZipFile(temp_output, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-                for root_dir, dirs, files in os.walk(self.temp_dir):
-                    for file in files:
-                        file_path = Path(root_dir) / file
-                        arcname = file_path.relative_to(self.temp_dir)
-                        zip_out.write(file_path, arcname)
-            
-            # Verificar preservación
-            final_drawings = len(self.root.findall(f'.//{{{self.w_ns}}}drawing'))
-            final_sections = len(self.root.findall(f'.//{{{self.w_ns}}}sectPr'))
-            
-            if final_drawings < self._initial_drawings or final_sections < self._initial_sections:
-                print(f"⚠️  ADVERTENCIA: Se perdieron elementos")
-                print(f"   Imágenes: {self._initial_drawings} → {final_drawings}")
-                print(f"   Secciones: {self._initial_sections} → {final_sections}")
-            
-            # Leer bytes
-            with open(temp_output, 'rb') as f:
-                return f.read()
-        finally:
-            if Path(temp_output).exists():
-                Path(temp_output).unlink()
+        # Reempaquetar en memoria: solo se comprimen las partes modificadas, el
+        # resto se copia desde el zip de la plantilla sin recomprimir
+        modified_parts = {DOCUMENT_PART: document_xml}
+        for part_name, data in self.parts.items():
+            if self._template.parts.get(part_name) is not data:
+                modified_parts[part_name] = data
+
+        for part_name in self._dirty_story_parts:
+            modified_parts[part_name] = etree.tostring(
+                self.story_trees[part_name],
+                encoding='UTF-8',
+                xml_declaration=True,
+                standalone=True,
+                pretty_print=False
+            )
+
+        doc_bytes = build_package(self._template.raw_entries, modified_parts, compression_policy)
+
+        # Verificar preservación
+        final_drawings = len(self.root.findall(f'.//{{{self.w_ns}}}drawing'))
+        final_sections = len(self.root.findall(f'.//{{{self.w_ns}}}sectPr'))
+        
+        if final_drawings < self._initial_drawings or final_sections < self._initial_sections:
+            print(f"⚠️  ADVERTENCIA: Se perdieron elementos")
+            print(f"   Imágenes: {self._initial_drawings} → {final_drawings}")
+            print(f"   Secciones: {self._initial_sections} → {final_sections}")
+        
+        return doc_bytes
     
+    @instrumented
     def get_pdf_bytes(self) -> bytes:
-        """Stub para compatibilidad - lanza RuntimeError como el original."""
-        raise RuntimeError("Conversión a PDF no disponible en XMLWordEngine")
-    
-    def __del__(self):
-        """Limpia directorio temporal."""
-        if hasattr(self, 'temp_dir') and Path(self.temp_dir).exists():
-            shutil.rmtree(self.temp_dir, ignore_errors=True)
+        """
+        Convierte el documento actual a PDF con el pool de LibreOffice.
+
+        Raises:
+            RuntimeError: Si LibreOffice no está instalado o la conversión falla
+        """
+        return convert_docx_to_pdf(self.get_document_bytes()).pdf_bytes
@@ -2,6 +2,7 @@
 UI principal que orquesta todas las secciones de la aplicación.
 """
 import streamlit as st
+import pandas as pd
 from pathlib import Path
 import json
 import hashlib
@@ -10,8 +11,12 @@ from ui.sections_simple_vars import render_simple_vars_section
 from ui.sections_conditions import render_conditions_section
 from ui.sections_tables import render_tables_section
 from ui.sections_table_format import render_table_format_section
+from modules.pdf_jobs import get_pdf_job_queue
 from modules.utils import export_data_to_json, import_data_from_json, generate_filename
 
+# Segundos entre comprobaciones del PDF en segundo plano (st.fragment)
+PDF_POLL_SECONDS = 2
+
 
 def render_main_ui(cfg_simple: dict, cfg_cond: dict, cfg_tab: dict):
     """
@@ -378,6 +383,11 @@ def render_generation_section():
             type="primary",
             use_container_width=True
         )
+        st.checkbox(
+            "Mostrar métricas de generación",
+            key="show_generation_metrics",
+            help="Tiempo, párrafos leídos y nodos XML modificados por cada etapa"
+        )
 
     if generate_button:
         return True
@@ -403,6 +413,126 @@ def show_success_message():
     st.success("✅ ¡Informe generado correctamente!")
 
 
+def show_generation_metrics(stage_timings: dict, engine_metrics: list):
+    """
+    Muestra las métricas de la última generación.
+
+    Args:
+        stage_timings: {etapa: segundos} del pipeline (ReportResult.timings)
+        engine_metrics: Filas de EngineMetrics.report() del motor de Word
+    """
+    with st.expander("⏱️ Métricas de generación", expanded=True):
+        total = sum(stage_timings.values())
+        st.markdown(f"**Tiempo total:** {total * 1000:.1f} ms")
+
+        st.markdown("**Etapas del pipeline**")
+        st.dataframe(
+            pd.DataFrame([
+                {"Etapa": stage, "ms": round(seconds * 1000, 2)}
+                for stage, seconds in stage_timings.items()
+            ]),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        st.markdown("**Motor de Word**")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Método": row["method"],
+                    "Llamadas": row["calls"],
+                    "ms": round(row["seconds"] * 1000, 2),
+                    "Párrafos leídos": row["paragraphs_scanned"],
+                    "Nodos modificados": row["nodes_touched"],
+                }
+                for row in engine_metrics
+            ]),
+            use_container_width=True,
+            hide_index=True
+        )
+
+
+def render_report_downloads(report: dict):
+    """
+    Muestra las descargas del último informe generado.
+
+    El Word se ofrece al momento; el PDF se convierte en segundo plano
+    (PdfJobQueue) y su botón aparece cuando termina el trabajo.
+
+    Args:
+        report: Informe guardado en st.session_state.generated_report
+            (doc_bytes, docx_name, pdf_name, pdf_job_key)
+    """
+    show_success_message()
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.download_button(
+            label="📥 Descargar Word (.docx)",
+            data=report["doc_bytes"],
+            file_name=report["docx_name"],
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            type="primary",
+            use_container_width=True
+        )
+
+    with col2:
+        job = _pdf_job(report)
+        if job.status == "pending" and hasattr(st, "fragment"):
+            _wait_for_pdf(report)
+        else:
+            _render_pdf_status(job, report)
+
+
+def _pdf_job(report: dict):
+    """Trabajo de conversión a PDF del informe (se vuelve a encargar si ya se olvidó)."""
+    job_queue = get_pdf_job_queue()
+    job = job_queue.get(report["pdf_job_key"])
+    if job is None:
+        job = job_queue.submit(report["doc_bytes"])
+    return job
+
+
+def _render_pdf_status(job, report: dict):
+    """Botón de descarga del PDF, o estado de su conversión."""
+    if job.status == "done":
+        st.download_button(
+            label="📑 Descargar PDF",
+            data=job.result().pdf_bytes,
+            file_name=report["pdf_name"],
+            mime="application/pdf",
+            type="secondary",
+            use_container_width=True
+        )
+    elif job.status == "error":
+        # Si falla la conversión a PDF, mostrar mensaje informativo
+        st.warning(
+            f"⚠️ No se pudo generar el PDF: {job.error}\n\n"
+            "Puedes descargar el archivo Word y convertirlo manualmente."
+        )
+    else:
+        # Sin st.fragment (Streamlit < 1.37) el usuario comprueba a mano
+        st.info("⏳ Generando PDF en segundo plano...")
+        st.button("🔄 Comprobar PDF", use_container_width=True)
+
+
+def _wait_for_pdf(report: dict):
+    """
+    Espera el PDF refrescando solo este fragmento cada PDF_POLL_SECONDS.
+
+    Al terminar el trabajo se vuelve a ejecutar la app completa, que ya
+    muestra el botón de descarga (o el error) sin seguir refrescando.
+    """
+    if _pdf_job(report).status != "pending":
+        st.rerun()
+    st.info("⏳ Generando PDF en segundo plano...")
+
+
+if hasattr(st, "fragment"):
+    _wait_for_pdf = st.fragment(run_every=PDF_POLL_SECONDS)(_wait_for_pdf)
+
+
 def show_processing_spinner(message: str = "Generando informe..."):
     """
     Muestra un spinner de procesamiento.
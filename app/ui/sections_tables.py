@@ -5,6 +5,9 @@ import streamlit as st
 import pandas as pd
 from typing import Dict, List
 
+from modules.formulas import FormulaEvaluator, table_formula_graph
+from modules.tables import calculate_partidas_rows
+
 
 def render_tables_section(cfg_tab: dict, simple_inputs: dict) -> tuple:
     """
@@ -408,41 +411,15 @@ def render_partidas_contables(cfg_tab: dict, simple_inputs: dict) -> dict:
             "ejercicio_anterior": ep
         }
 
-    # Calcular las filas calculadas
-    calculated_rows = [row for row in cfg["rows"] if row.get("input_mode") == "calculated"]
-
-    for row_cfg in calculated_rows:
-        row_id = row_cfg["id"]
-        label = row_cfg["label"]
+    # Calcular las filas calculadas con las fórmulas de tablas.yaml. El
+    # evaluador se guarda en la sesión para recalcular solo lo que cambia
+    graph = table_formula_graph(cfg)
+    evaluator = st.session_state.get("partidas_formula_evaluator")
+    if evaluator is None or evaluator.graph is not graph:
+        evaluator = FormulaEvaluator(graph)
+        st.session_state.partidas_formula_evaluator = evaluator
 
-        # Obtener valores necesarios para el cálculo
-        if row_id == "operating_margin_om":
-            ebit_ea = data.get("ebit", {}).get("ejercicio_actual", 0)
-            ebit_ep = data.get("ebit", {}).get("ejercicio_anterior", 0)
-            cn_ea = data.get("cifra_negocios", {}).get("ejercicio_actual", 1)
-            cn_ep = data.get("cifra_negocios", {}).get("ejercicio_anterior", 1)
-
-            om_ea = (ebit_ea / cn_ea * 100) if cn_ea != 0 else 0
-            om_ep = (ebit_ep / cn_ep * 100) if cn_ep != 0 else 0
-
-            data[row_id] = {
-                "ejercicio_actual": om_ea,
-                "ejercicio_anterior": om_ep
-            }
-
-        elif row_id == "net_cost_plus_ncp":
-            ebit_ea = data.get("ebit", {}).get("ejercicio_actual", 0)
-            ebit_ep = data.get("ebit", {}).get("ejercicio_anterior", 0)
-            tco_ea = data.get("total_costes_operativos", {}).get("ejercicio_actual", 1)
-            tco_ep = data.get("total_costes_operativos", {}).get("ejercicio_anterior", 1)
-
-            ncp_ea = (ebit_ea / tco_ea * 100) if tco_ea != 0 else 0
-            ncp_ep = (ebit_ep / tco_ep * 100) if tco_ep != 0 else 0
-
-            data[row_id] = {
-                "ejercicio_actual": ncp_ea,
-                "ejercicio_anterior": ncp_ep
-            }
+    data.update(calculate_partidas_rows(cfg, data, evaluator))
 
     return data
 
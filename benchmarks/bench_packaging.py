@@ -0,0 +1,124 @@
+"""
+Benchmark del reempaquetado .docx (XMLWordEngineAdapter.get_document_bytes).
+
+Compara, sobre config/Plantilla.docx, el empaquetado anterior (escribir en el
+directorio temporal y volver a deflatear todas las partes con os.walk) con el
+empaquetado en memoria y distintas políticas de compresión. También se mide
+una variante de la plantilla con la imagen deflateada, para ver el efecto de
+almacenar sin comprimir las imágenes ya comprimidas.
+
+Uso:
+    python benchmarks/bench_packaging.py [--repeat 10]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.docx_package import CompressionPolicy
+from modules.xml_word_engine_adapter import XMLWordEngineAdapter
+
+
+def legacy_package(temp_dir: str, engine: XMLWordEngineAdapter) -> bytes:
+    """Empaquetado anterior: document.xml a disco, os.walk y ZIP_DEFLATED para todo."""
+    engine.tree.write(
+        str(Path(temp_dir) / 'word' / 'document.xml'),
+        encoding='UTF-8',
+        xml_declaration=True,
+        standalone=True,
+        pretty_print=False
+    )
+
+    temp_output = tempfile.mktemp(suffix='.docx')
+    try:
+        with zipfile.ZipFile(temp_output, 'w', zipfile.ZIP_DEFLATED) as zip_out:
+            for root_dir, dirs, files in os.walk(temp_dir):
+                for file in files:
+                    file_path = Path(root_dir) / file
+                    zip_out.write(file_path, file_path.relative_to(temp_dir))
+        with open(temp_output, 'rb') as f:
+            return f.read()
+    finally:
+        if Path(temp_output).exists():
+            Path(temp_output).unlink()
+
+
+def _measure(label: str, package_fn, repeat: int, baseline: tuple = None) -> tuple:
+    best = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(package_fn())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    line = f"  {label:<44} {best * 1000:8.2f} ms {size:>10,} bytes"
+    if baseline:
+        line += (
+            f" | ahorro {(baseline[0] - best) * 1000:7.2f} ms,"
+            f" {baseline[1] - size:>8,} bytes"
+        )
+    print(line)
+    return best, size
+
+
+def _deflated_copy(template_path: Path, target: Path) -> Path:
+    """Copia de la plantilla con TODAS las partes deflateadas (imágenes incluidas)."""
+    with zipfile.ZipFile(template_path) as src, zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            dst.writestr(info.filename, src.read(info))
+    return target
+
+
+def run(template_path: Path, repeat: int):
+    print(f"{template_path.name}:")
+    engine = XMLWordEngineAdapter(template_path)
+
+    # El motor anterior extraía la plantilla en __init__: no se cuenta aquí
+    temp_dir = tempfile.mkdtemp()
+    try:
+        with zipfile.ZipFile(template_path, 'r') as zip_ref:
+            zip_ref.extractall(temp_dir)
+        baseline = _measure("anterior (temp dir + deflate de todo)",
+                            lambda: legacy_package(temp_dir, engine), repeat)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    _measure("en memoria, política por defecto",
+             lambda: engine.get_document_bytes(), repeat, baseline)
+    _measure("en memoria, XML nivel 1",
+             lambda: engine.get_document_bytes(CompressionPolicy(xml_level=1)), repeat, baseline)
+    _measure("en memoria, XML nivel 9",
+             lambda: engine.get_document_bytes(CompressionPolicy(xml_level=9)), repeat, baseline)
+    _measure("en memoria, recodificar partes de plantilla",
+             lambda: engine.get_document_bytes(CompressionPolicy(recompress_template_parts=True)),
+             repeat, baseline)
+    _measure("en memoria, imágenes deflateadas",
+             lambda: engine.get_document_bytes(CompressionPolicy(
+                 store_precompressed=False, recompress_template_parts=True)),
+             repeat, baseline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="Repeticiones por medida")
+    args = parser.parse_args()
+
+    template_path = APP_DIR / "config" / "Plantilla.docx"
+    run(template_path, args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run(_deflated_copy(template_path, Path(tmp) / "Plantilla_deflate.docx"), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
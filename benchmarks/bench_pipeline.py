@@ -0,0 +1,431 @@
+"""
+Benchmark del pipeline completo de generación para los dos motores de Word.
+
+Ejecuta las etapas de `generate_report` (cargar plantilla, reemplazar
+variables, tablas, bloques condicionales, saltos, índice, limpieza y
+empaquetado) con XMLWordEngineAdapter ("xml"), con StreamingWordEngine
+("stream") y con el WordEngine anterior (python-docx, "legacy") sobre:
+
+- plantillas sintéticas de 1k a 50k párrafos con 10-500 marcadores, runs
+  partidos, tablas, índice y bloques de condiciones/*.docx;
+- config/Plantilla.docx con todas las condiciones a "Sí".
+
+Cada medida se ejecuta en un proceso nuevo ("spawn") para que la memoria
+máxima (ru_maxrss, incluye lxml/libxml2) no se contamine entre escenarios, y
+con un límite de tiempo: el motor anterior es cuadrático en algunas etapas y
+en plantillas grandes se registra como "timeout" con las etapas completadas.
+
+Los resultados se guardan en JSON para compararlos entre versiones:
+
+    python benchmarks/bench_pipeline.py --output resultados.json
+    python benchmarks/bench_pipeline.py --quick --compare resultados.json
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import queue
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent / "app"
+for path in (BENCH_DIR, APP_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from synthetic import block_marker_names, build_context, build_docx, table_marker_names
+
+CONFIG_DIR = APP_DIR / "config"
+
+ENGINES = ("xml", "stream", "legacy")
+
+# (nombre, párrafos, marcadores, tablas, bloques, entradas de índice, runs partidos)
+SYNTHETIC_SCENARIOS = [
+    ("sint-1k", 1000, 10, 10, 5, 10, True),
+    ("sint-5k", 5000, 100, 50, 10, 25, True),
+    ("sint-5k-runs-enteros", 5000, 100, 50, 10, 25, False),
+    ("sint-20k", 20000, 250, 100, 20, 50, True),
+    ("sint-50k", 50000, 500, 200, 40, 100, True),
+]
+QUICK_SCENARIOS = ("sint-1k", "sint-5k")
+
+
+def real_inputs(cfg_simple: dict, cfg_cond: dict) -> tuple:
+    """Entradas deterministas para Plantilla.docx con todas las condiciones a "Sí"."""
+    simple_inputs = {}
+    for var in cfg_simple["simple_variables"]:
+        var_type = var.get("type", "text")
+        if var_type == "email":
+            simple_inputs[var["id"]] = "revisor@example.com"
+        elif var_type in ("number", "percent"):
+            simple_inputs[var["id"]] = 12.5
+        else:
+            simple_inputs[var["id"]] = f"Texto {var['id']}"
+    simple_inputs.update(ejercicio_completo="2023", ejercicio_anterior="2022")
+
+    condition_inputs = {cond["id"]: "Sí" for cond in cfg_cond["conditions"]}
+
+    table_inputs = {
+        "operaciones_vinculadas": [
+            {"tipo_operacion": f"Operación {i}", "entidad_vinculada": f"Entidad {i}",
+             "ingreso_local_file": 1000.0 * i, "gasto_local_file": 250.0 * i}
+            for i in range(1, 6)
+        ],
+        "analisis_indirecto_global": {"rango_tnmm": {"min": 1, "lq": 2, "med": 3, "uq": 4, "max": 5}},
+        "analisis_indirecto_operacion_1": {
+            "nombre_operacion": "Servicios", "min": 1, "lq": 2, "med": 3, "uq": 4, "max": 5
+        },
+        "partidas_contables": {
+            "cifra_negocios": {"ejercicio_actual": 1000.0, "ejercicio_anterior": 900.0},
+            "ebit": {"ejercicio_actual": 100.0, "ejercicio_anterior": 80.0},
+            "total_costes_operativos": {"ejercicio_actual": 900.0, "ejercicio_anterior": 820.0},
+        },
+        "cumplimiento_inicial_LF": [{"numero": 1, "seccion": "A", "cumplimiento": "Sí"}],
+        "cumplimiento_formal_MF": [{"requisito": "R", "cumplimiento": "No", "comentario": ""}],
+        "riesgos_pt": [{
+            "numero": 1, "elemento_riesgo": "E", "impacto_compania": "No",
+            "nivel_afectacion_preliminar": "No", "mitigadores": "", "nivel_afectacion_final": "No"
+        }],
+    }
+    return simple_inputs, condition_inputs, table_inputs
+
+
+def _pipeline_inputs(job: dict) -> dict:
+    """Construye los argumentos de cada etapa (en el proceso de medida)."""
+    from modules.config_loader import ConfigLoader
+    from modules.tables import TableBuilder
+    from modules.utils import build_full_context
+
+    cfg_simple, cfg_cond, cfg_tab = ConfigLoader(CONFIG_DIR).load_all_configs()
+
+    if job["kind"] == "real":
+        simple_inputs, condition_inputs, table_inputs = real_inputs(cfg_simple, cfg_cond)
+        tables_data = TableBuilder(cfg_tab, simple_inputs).build_all_tables(table_inputs)
+        context, docs_to_insert = build_full_context(
+            cfg_simple, cfg_cond, cfg_tab, simple_inputs, condition_inputs, table_inputs
+        )
+        return {
+            "context": context, "tables_data": tables_data, "cfg_tab": cfg_tab,
+            "docs_to_insert": docs_to_insert, "remove_discrepancias": False,
+        }
+
+    # Sintético: tablas con el formato de TableBuilder y bloques reales de condiciones/
+    simple_inputs, _, table_inputs = real_inputs(cfg_simple, cfg_cond)
+    sample_table = TableBuilder(cfg_tab, simple_inputs).build_all_tables(table_inputs)[
+        "<<Tabla operaciones vinculadas>>"
+    ]
+    block_files = sorted({
+        cond["word_file"] for cond in cfg_cond["conditions"]
+        if (CONFIG_DIR.parent / cond["word_file"]).exists()
+    })
+    return {
+        "context": build_context(job["markers"]),
+        "tables_data": {marker: sample_table for marker in table_marker_names(job["tables"])},
+        "cfg_tab": cfg_tab,
+        "docs_to_insert": [
+            {"marker": marker, "file": block_files[i % len(block_files)]}
+            for i, marker in enumerate(block_marker_names(job["blocks"]))
+        ],
+        "remove_discrepancias": True,
+    }
+
+
+def _pipeline_stages(engine, inputs: dict) -> list:
+    """Etapas en el orden de generate_report: [(nombre, callable)]."""
+    stages = [
+        ("replace_variables", lambda: engine.replace_variables(inputs["context"])),
+        ("insert_tables", lambda: engine.insert_tables(inputs["tables_data"], inputs["cfg_tab"], {})),
+        ("insert_conditional_blocks",
+         lambda: engine.insert_conditional_blocks(inputs["docs_to_insert"], CONFIG_DIR)),
+    ]
+    if inputs["remove_discrepancias"] and hasattr(engine, "remove_discrepancias_formales_section"):
+        stages.append(("remove_discrepancias_formales_section", engine.remove_discrepancias_formales_section))
+    stages += [
+        ("process_salto_markers", engine.process_salto_markers),
+        ("process_table_of_contents", engine.process_table_of_contents),
+    ]
+    if hasattr(engine, "clean_document"):
+        stages += [
+            ("clean_document", engine.clean_document),
+            ("remove_empty_lines_at_page_start", engine.remove_empty_lines_at_page_start),
+        ]
+    else:
+        stages += [
+            ("clean_unused_markers", engine.clean_unused_markers),
+            ("remove_empty_lines_at_page_start", engine.remove_empty_lines_at_page_start),
+            ("clean_empty_paragraphs", engine.clean_empty_paragraphs),
+        ]
+    stages += [
+        ("remove_empty_pages", engine.remove_empty_pages),
+        ("preserve_headers_and_footers", engine.preserve_headers_and_footers),
+        ("get_document_bytes", engine.get_document_bytes),
+    ]
+    return stages
+
+
+def _max_rss_kb() -> int:
+    """Memoria residente máxima del proceso en KB (None si no está disponible)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux devuelve KB, macOS bytes
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def _measure_job(job: dict, results):
+    """
+    Proceso de medida: ejecuta el pipeline job["repeat"] veces y envía por la
+    cola cada etapa completada, para conservar las medidas si hay timeout.
+    """
+    if job["engine"] == "xml":
+        from modules.template_cache import get_block_cache, get_template_cache
+        from modules.xml_word_engine_adapter import XMLWordEngineAdapter as engine_cls
+    elif job["engine"] == "stream":
+        from modules.template_cache import get_block_cache, get_template_cache
+        from modules.streaming_word_engine import StreamingWordEngine as engine_cls
+    else:
+        from modules.word_engine import WordEngine as engine_cls
+
+    inputs = _pipeline_inputs(job)
+    results.put(("rss_before", _max_rss_kb()))
+
+    def _reset_caches():
+        if job["engine"] != "legacy" and not job["warm"]:
+            get_template_cache().invalidate()
+            get_block_cache().invalidate()
+
+    for iteration in range(job["repeat"]):
+        _reset_caches()
+
+        start = time.perf_counter()
+        engine = engine_cls(job["template"])
+        results.put(("stage", iteration, "load_template", time.perf_counter() - start))
+
+        for name, stage in _pipeline_stages(engine, inputs):
+            start = time.perf_counter()
+            output = stage()
+            results.put(("stage", iteration, name, time.perf_counter() - start))
+        results.put(("size", len(output)))
+        del engine
+
+    if job["tracemalloc"]:
+        # Pasada adicional: tracemalloc ralentiza mucho y no debe afectar a los tiempos
+        _reset_caches()
+        tracemalloc.start()
+        engine = engine_cls(job["template"])
+        for _, stage in _pipeline_stages(engine, inputs):
+            stage()
+        results.put(("tracemalloc_peak", tracemalloc.get_traced_memory()[1]))
+        tracemalloc.stop()
+        del engine
+
+    results.put(("done", _max_rss_kb()))
+
+
+def run_job(job: dict, timeout: float) -> dict:
+    """Ejecuta un escenario/motor en un proceso nuevo y recoge sus medidas."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_measure_job, args=(job, results), daemon=True)
+
+    record = {
+        "scenario": job["scenario"], "engine": job["engine"], "status": "ok",
+        "stages": {}, "total_s": None, "peak_rss_kb": None, "rss_before_kb": None,
+        "tracemalloc_peak_bytes": None, "output_bytes": None,
+    }
+    runs = {}
+    deadline = time.monotonic() + timeout
+    process.start()
+
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                record["status"] = "timeout"
+                break
+            try:
+                message = results.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                if not process.is_alive():
+                    record["status"] = f"error (exit code {process.exitcode})"
+                    break
+                continue
+
+            kind = message[0]
+            if kind == "stage":
+                _, iteration, name, seconds = message
+                runs.setdefault(iteration, {})[name] = seconds
+            elif kind == "rss_before":
+                record["rss_before_kb"] = message[1]
+            elif kind == "size":
+                record["output_bytes"] = message[1]
+            elif kind == "tracemalloc_peak":
+                record["tracemalloc_peak_bytes"] = message[1]
+            elif kind == "done":
+                record["peak_rss_kb"] = message[1]
+                break
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+    # Mejor tiempo de cada etapa entre las repeticiones
+    for stages in runs.values():
+        for name, seconds in stages.items():
+            best = record["stages"].get(name)
+            record["stages"][name] = seconds if best is None else min(best, seconds)
+    if record["status"] == "ok":
+        record["total_s"] = sum(record["stages"].values())
+    record["repetitions"] = len(runs)
+    return record
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+            text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_record(record: dict):
+    total = f"{record['total_s'] * 1000:10.1f} ms" if record["total_s"] is not None else f"{'-':>13}"
+    rss = f"{record['peak_rss_kb'] / 1024:7.1f} MB" if record["peak_rss_kb"] else f"{'-':>10}"
+    slowest = ""
+    if record["stages"]:
+        name, seconds = max(record["stages"].items(), key=lambda item: item[1])
+        slowest = f"{name} ({seconds * 1000:.1f} ms)"
+    print(f"  {record['scenario']:<22} {record['engine']:<7} {record['status']:<8} {total} {rss}  {slowest}")
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """
+    Compara dos ficheros de resultados etapa a etapa.
+
+    Returns:
+        Número de etapas que empeoran más que el umbral (p.ej. 1.2 = +20 %)
+    """
+    previous = {(r["scenario"], r["engine"]): r for r in baseline["results"]}
+    regressions = 0
+
+    print(f"\nComparación con {baseline.get('commit') or 'resultado anterior'} (umbral x{threshold}):")
+    for record in current["results"]:
+        old = previous.get((record["scenario"], record["engine"]))
+        if old is None:
+            continue
+        for name, seconds in record["stages"].items():
+            old_seconds = old["stages"].get(name)
+            # Las etapas de menos de 1 ms son demasiado ruidosas para comparar
+            if not old_seconds or max(seconds, old_seconds) < 0.001:
+                continue
+            ratio = seconds / old_seconds
+            if ratio > threshold:
+                regressions += 1
+                print(
+                    f"  EMPEORA {record['scenario']}/{record['engine']}/{name}: "
+                    f"{old_seconds * 1000:.1f} → {seconds * 1000:.1f} ms (x{ratio:.2f})"
+                )
+        if record["total_s"] and old.get("total_s"):
+            print(
+                f"  {record['scenario']:<22} {record['engine']:<7} total "
+                f"{old['total_s'] * 1000:9.1f} → {record['total_s'] * 1000:9.1f} ms "
+                f"(x{record['total_s'] / old['total_s']:.2f})"
+            )
+
+    print(f"  {regressions} etapas por encima del umbral")
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por escenario (se toma el mejor tiempo)")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--scenarios", nargs="+", default=None,
+                        help="Escenarios a ejecutar (por defecto todos; 'real' = Plantilla.docx)")
+    parser.add_argument("--quick", action="store_true", help=f"Solo {', '.join(QUICK_SCENARIOS)} y real")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Segundos máximos por escenario y motor")
+    parser.add_argument("--warm", action="store_true",
+                        help="Mantener las cachés de plantillas y bloques entre repeticiones")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Pasada adicional para medir el pico del heap de Python")
+    parser.add_argument("--output", type=Path, default=None, help="Fichero JSON de resultados")
+    parser.add_argument("--compare", type=Path, default=None, help="JSON de referencia para comparar")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Umbral de regresión para --compare")
+    args = parser.parse_args(argv)
+
+    selected = set(args.scenarios or [s[0] for s in SYNTHETIC_SCENARIOS] + ["real"])
+    if args.quick:
+        selected &= set(QUICK_SCENARIOS) | {"real"}
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "warm": args.warm,
+        "timeout_s": args.timeout,
+        "scenarios": {},
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        templates = []
+        for name, paragraphs, markers, tables, blocks, toc_entries, split_runs in SYNTHETIC_SCENARIOS:
+            if name not in selected:
+                continue
+            template = build_docx(
+                Path(tmp) / f"{name}.docx", paragraphs, markers,
+                split_runs=split_runs, n_tables=tables, n_blocks=blocks, n_toc_entries=toc_entries
+            )
+            report["scenarios"][name] = {
+                "paragraphs": paragraphs, "markers": markers, "tables": tables,
+                "blocks": blocks, "toc_entries": toc_entries, "split_runs": split_runs,
+            }
+            templates.append((name, "synthetic", template, markers, tables, blocks))
+
+        if "real" in selected:
+            report["scenarios"]["real"] = {"template": "config/Plantilla.docx", "conditions": "todas"}
+            templates.append(("real", "real", CONFIG_DIR / "Plantilla.docx", 0, 0, 0))
+
+        print(f"{'Escenario':<24} {'Motor':<7} {'Estado':<8} {'Total':>13} {'RSS máx':>10}  Etapa más lenta")
+        for name, kind, template, markers, tables, blocks in templates:
+            for engine in args.engines:
+                job = {
+                    "scenario": name, "kind": kind, "engine": engine, "template": str(template),
+                    "markers": markers, "tables": tables, "blocks": blocks,
+                    "repeat": args.repeat, "warm": args.warm, "tracemalloc": args.tracemalloc,
+                }
+                record = run_job(job, args.timeout)
+                report["results"].append(record)
+                _print_record(record)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare(report, baseline, args.threshold) else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Benchmark de XMLWordEngineAdapter.replace_variables.
+
+Compara el motor de una sola pasada (todos los marcadores compilados en una
+expresión regular) con el bucle anterior párrafo × marcador, sobre plantillas
+sintéticas de distinto tamaño y sobre config/Plantilla.docx.
+
+Uso:
+    python benchmarks/bench_replace_variables.py [--repeat 3]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent / "app"
+for path in (BENCH_DIR, APP_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from lxml import etree
+
+from modules.config_loader import ConfigLoader
+from modules.xml_word_engine_adapter import XMLWordEngineAdapter
+from synthetic import build_context, build_docx
+
+SCENARIOS = [
+    # (párrafos, marcadores)
+    (1000, 10),
+    (1000, 100),
+    (5000, 100),
+    (5000, 500),
+]
+
+
+def legacy_replace_marker(engine: XMLWordEngineAdapter, para: etree.Element, marker: str, value: str):
+    """Reemplazo original de un marcador en un párrafo (primera ocurrencia)."""
+    text_nodes = []
+    current_pos = 0
+
+    for text_elem in para.findall(f'.//{{{engine.w_ns}}}t'):
+        text = text_elem.text or ''
+        start = current_pos
+        end = start + len(text)
+        text_nodes.append({'element': text_elem, 'text': text, 'start': start, 'end': end})
+        current_pos = end
+
+    if not text_nodes:
+        return
+
+    full_text = ''.join(node['text'] for node in text_nodes)
+
+    if marker not in full_text:
+        return
+
+    marker_start = full_text.index(marker)
+    marker_end = marker_start + len(marker)
+    inserted = False
+    value = value or ''
+
+    for node in text_nodes:
+        text_elem = node['element']
+        text = node['text']
+        start = node['start']
+        end = node['end']
+
+        if end <= marker_start or start >= marker_end:
+            # Nodo fuera del marcador
+            continue
+
+        before = ''
+        after = ''
+
+        if start < marker_start < end:
+            before = text[:marker_start - start]
+
+        if start < marker_end < end:
+            after = text[marker_end - start:]
+
+        if start <= marker_start and end >= marker_end:
+            replacement = before + value + after
+            engine._set_text_with_preserve(text_elem, replacement)
+            inserted = True
+        elif start <= marker_start < end:
+            engine._set_text_with_preserve(text_elem, before + value)
+            inserted = True
+        elif start < marker_end <= end:
+            engine._set_text_with_preserve(text_elem, after)
+        else:
+            # El nodo está completamente dentro del marcador
+            engine._set_text_with_preserve(text_elem, '')
+
+    if not inserted:
+        first_node = next((n for n in text_nodes if n['end'] > marker_start), None)
+        if first_node:
+            text_elem = first_node['element']
+            current_text = text_elem.text or ''
+            engine._set_text_with_preserve(text_elem, current_text + value)
+
+
+def legacy_replace_variables(engine: XMLWordEngineAdapter, context: dict):
+    """Bucle original: para cada párrafo, cada marcador y cada ocurrencia."""
+    context_filtered = {
+        k: v for k, v in context.items()
+        if v is not None and v != "" and str(v).strip()
+    }
+
+    for para in engine.root.findall(f'.//{{{engine.w_ns}}}p'):
+        para_text = engine._get_paragraph_text(para)
+
+        if not para_text:
+            continue
+
+        for marker, value in context_filtered.items():
+            value_str = str(value)
+
+            while marker in para_text:
+                legacy_replace_marker(engine, para, marker, value_str)
+                para_text = engine._get_paragraph_text(para)
+
+
+def _time_replace(template_path: Path, context: dict, replace_fn, repeat: int):
+    """Devuelve (mejor tiempo en segundos, XML resultante)."""
+    best = None
+    result_xml = None
+
+    for _ in range(repeat):
+        engine = XMLWordEngineAdapter(template_path)
+        start = time.perf_counter()
+        replace_fn(engine, context)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        result_xml = etree.tostring(engine.root)
+
+    return best, result_xml
+
+
+def _report(label: str, template_path: Path, context: dict, repeat: int):
+    legacy_time, legacy_xml = _time_replace(
+        template_path, context, legacy_replace_variables, repeat
+    )
+    new_time, new_xml = _time_replace(
+        template_path, context, lambda engine, ctx: engine.replace_variables(ctx), repeat
+    )
+    speedup = legacy_time / new_time if new_time else float('inf')
+    identical = "sí" if legacy_xml == new_xml else "NO"
+
+    print(
+        f"{label:<28} bucle anterior {legacy_time * 1000:9.1f} ms | "
+        f"una pasada {new_time * 1000:8.1f} ms | x{speedup:6.1f} | "
+        f"salida idéntica: {identical}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por escenario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_paragraphs, n_markers in SCENARIOS:
+            template_path = build_docx(
+                Path(tmp) / f"sintetica_{n_paragraphs}_{n_markers}.docx",
+                n_paragraphs,
+                n_markers,
+            )
+            _report(
+                f"{n_paragraphs} párrafos/{n_markers} marc.",
+                template_path,
+                build_context(n_markers),
+                args.repeat,
+            )
+
+    # Plantilla real con todos los marcadores de variables simples y condiciones
+    config_dir = APP_DIR / "config"
+    cfg_simple, cfg_cond, _ = ConfigLoader(config_dir).load_all_configs()
+    context = {
+        var["marker"]: f"Valor {var['id']}"
+        for var in cfg_simple["simple_variables"] if var.get("marker")
+    }
+    for item in cfg_simple.get("operations", {}).get("items", []):
+        context[item["text_marker"]] = f"Operación {item.get('id', '')}"
+
+    _report("config/Plantilla.docx", config_dir / "Plantilla.docx", context, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
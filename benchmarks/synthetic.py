@@ -0,0 +1,174 @@
+"""
+Generación de plantillas .docx sintéticas para los benchmarks.
+
+Las plantillas se construyen directamente como paquetes OOXML mínimos (sin
+python-docx) para poder generar documentos grandes en poco tiempo.
+"""
+import random
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '</Relationships>'
+)
+
+FILLER_WORDS = (
+    "análisis", "operación", "vinculada", "precio", "mercado", "compañía",
+    "servicio", "margen", "ejercicio", "comparable", "independiente", "grupo",
+)
+
+
+def marker_names(n_markers: int) -> list:
+    """Devuelve la lista de marcadores sintéticos <<Variable i>>."""
+    return [f"<<Variable {i}>>" for i in range(n_markers)]
+
+
+def build_context(n_markers: int) -> dict:
+    """Construye un contexto {marcador: valor} para los marcadores sintéticos."""
+    return {marker: f"Valor {i}" for i, marker in enumerate(marker_names(n_markers))}
+
+
+def _run_xml(text: str) -> str:
+    return f'<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+def _split_into_runs(text: str, rng: random.Random, split_runs: bool) -> str:
+    """Divide un texto en varios runs, cortando opcionalmente dentro de los marcadores."""
+    if not split_runs or len(text) < 4:
+        return _run_xml(text)
+
+    cuts = sorted(rng.sample(range(1, len(text)), k=min(3, len(text) - 1)))
+    pieces = []
+    previous = 0
+    for cut in cuts + [len(text)]:
+        pieces.append(_run_xml(text[previous:cut]))
+        previous = cut
+    return ''.join(pieces)
+
+
+def _table_xml(marker: str) -> str:
+    return (
+        '<w:tbl><w:tblPr><w:tblW w:w="5000" w:type="pct"/></w:tblPr>'
+        '<w:tblGrid><w:gridCol w:w="2500"/><w:gridCol w:w="2500"/></w:tblGrid>'
+        '<w:tr><w:tc><w:p>' + _run_xml(marker) + '</w:p></w:tc>'
+        '<w:tc><w:p>' + _run_xml("celda") + '</w:p></w:tc></w:tr>'
+        '</w:tbl>'
+    )
+
+
+def block_marker_names(n_blocks: int) -> list:
+    """Marcadores de bloques condicionales sintéticos <<Bloque i>>."""
+    return [f"<<Bloque {i}>>" for i in range(n_blocks)]
+
+
+def table_marker_names(n_tables: int) -> list:
+    """Marcadores de las tablas sintéticas <<Tabla i>>."""
+    return [f"<<Tabla {i}>>" for i in range(n_tables)]
+
+
+def build_document_xml(
+    n_paragraphs: int,
+    n_markers: int,
+    split_runs: bool = True,
+    n_tables: int = 0,
+    seed: int = 1234,
+    n_blocks: int = 0,
+    n_toc_entries: int = 0
+) -> str:
+    """
+    Genera el contenido de word/document.xml.
+
+    Args:
+        n_paragraphs: Número de párrafos del cuerpo
+        n_markers: Número de marcadores distintos repartidos por el documento
+        split_runs: Si es True, los párrafos se dividen en varios runs que
+                    cortan los marcadores (como ocurre en plantillas editadas en Word)
+        n_tables: Número de tablas sencillas intercaladas
+        seed: Semilla para que la plantilla sea reproducible
+        n_blocks: Número de párrafos <<Bloque i>> para bloques condicionales
+        n_toc_entries: Entradas de índice (<<Indice>> ... <<fin Indice>>) cuyos
+                       marcadores numéricos <<i>> se reparten por el cuerpo
+    """
+    rng = random.Random(seed)
+    markers = marker_names(n_markers)
+    table_every = max(1, n_paragraphs // n_tables) if n_tables else 0
+    block_every = max(1, n_paragraphs // n_blocks) if n_blocks else 0
+    toc_every = max(1, n_paragraphs // n_toc_entries) if n_toc_entries else 0
+
+    body = []
+    if n_toc_entries:
+        body.append('<w:p>' + _run_xml("<<Indice>>") + '</w:p>')
+        for j in range(1, n_toc_entries + 1):
+            body.append('<w:p>' + _split_into_runs(f"Sección {j} <<{j}>>", rng, split_runs) + '</w:p>')
+        body.append('<w:p>' + _run_xml("<<fin Indice>>") + '</w:p>')
+
+    for i in range(n_paragraphs):
+        if toc_every and i % toc_every == 0 and i // toc_every < n_toc_entries:
+            body.append('<w:p>' + _run_xml(f"<<{i // toc_every + 1}>> Sección {i // toc_every + 1}") + '</w:p>')
+        if block_every and i % block_every == 0 and i // block_every < n_blocks:
+            body.append('<w:p>' + _run_xml(f"<<Bloque {i // block_every}>>") + '</w:p>')
+
+        words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(6, 18))]
+        if markers and i % 3 == 0:
+            words.insert(rng.randint(0, len(words)), markers[i % len(markers)])
+        if markers and i % 7 == 0:
+            words.append(markers[(i * 31) % len(markers)])
+        text = ' '.join(words)
+        body.append('<w:p>' + _split_into_runs(text, rng, split_runs) + '</w:p>')
+
+        if table_every and i % table_every == 0 and i // table_every < n_tables:
+            body.append(_table_xml(f"<<Tabla {i // table_every}>>"))
+
+    body.append(
+        '<w:sectPr><w:pgSz w:w="11906" w:h="16838"/>'
+        '<w:cols w:space="708"/></w:sectPr>'
+    )
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document xmlns:w="{W_NS}"><w:body>'
+        + ''.join(body) +
+        '</w:body></w:document>'
+    )
+
+
+def write_docx(path: Path, document_xml: str, extra_parts: dict = None) -> Path:
+    """Escribe un paquete .docx mínimo con el document.xml indicado."""
+    path = Path(path)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', CONTENT_TYPES)
+        zf.writestr('_rels/.rels', ROOT_RELS)
+        zf.writestr('word/document.xml', document_xml)
+        zf.writestr('word/_rels/document.xml.rels', DOCUMENT_RELS)
+        for name, data in (extra_parts or {}).items():
+            zf.writestr(name, data)
+    return path
+
+
+def build_docx(path: Path, n_paragraphs: int, n_markers: int, **kwargs) -> Path:
+    """Atajo para generar y escribir una plantilla sintética."""
+    return write_docx(path, build_document_xml(n_paragraphs, n_markers, **kwargs))
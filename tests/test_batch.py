@@ -0,0 +1,74 @@
+import json
+import sys
+from pathlib import Path
+import tempfile
+import unittest
+
+from docx import Document
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+import batch
+from modules.config_loader import ConfigLoader
+from modules.utils import export_data_to_json
+
+
+def _export(nombre_compania: str) -> dict:
+    """JSON exportado mínimo y válido para la configuración real."""
+    cfg_simple, _, _ = ConfigLoader(APP_DIR / "config").load_all_configs()
+    simple_inputs = {}
+    for var in cfg_simple["simple_variables"]:
+        var_type = var.get("type", "text")
+        if var_type == "email":
+            simple_inputs[var["id"]] = "revisor@example.com"
+        elif var_type in ("number", "percent"):
+            simple_inputs[var["id"]] = 12.5
+        else:
+            simple_inputs[var["id"]] = f"Texto {var['id']}"
+    simple_inputs.update(nombre_compania=nombre_compania, ejercicio_completo="2023")
+
+    table_inputs = {
+        "operaciones_vinculadas": [
+            {"tipo_operacion": "Servicios", "entidad_vinculada": "Filial",
+             "ingreso_local_file": 1000.0, "gasto_local_file": 0.0}
+        ]
+    }
+    return export_data_to_json(simple_inputs, {}, table_inputs, {})
+
+
+class BatchTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = Path(self.tmp_dir.name) / "json"
+        self.output_dir = Path(self.tmp_dir.name) / "informes"
+        self.input_dir.mkdir()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, name: str, data: dict):
+        with open(self.input_dir / name, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def test_generates_one_report_per_json(self):
+        self._write("a.json", _export("ACME SL"))
+        self._write("b.json", _export("ACME SL"))
+        self._write("c.json", {"simple_inputs": {}})
+
+        results = batch.run_batch(self.input_dir, self.output_dir, workers=1)
+
+        self.assertEqual([r["status"] for r in results], ["ok", "ok", "invalid"])
+        self.assertEqual(Path(results[0]["output"]).name, "Informe_PT_ACME_SL_2023.docx")
+        self.assertEqual(Path(results[1]["output"]).name, "Informe_PT_ACME_SL_2023_b.docx")
+        self.assertIn("replace_variables", results[0]["timings"])
+        self.assertTrue(results[2]["errors"])
+
+        text = "\n".join(p.text for p in Document(results[0]["output"]).paragraphs)
+        self.assertIn("ACME SL", text)
+        self.assertNotIn("<<", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import copy
+import os
+import shutil
+import sys
+from pathlib import Path
+import tempfile
+import unittest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.config_loader import ConfigLoader, FrozenDict, FrozenList
+
+
+class ConfigLoaderCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config_dir = Path(self.tmp_dir.name) / "config"
+        shutil.copytree(APP_DIR / "config", self.config_dir)
+        self.loader = ConfigLoader(self.config_dir)
+        ConfigLoader.invalidate_cache()
+
+    def tearDown(self):
+        ConfigLoader.invalidate_cache()
+        self.tmp_dir.cleanup()
+
+    def test_cached_configs_are_reused_until_a_file_changes(self):
+        first = self.loader.load_all_configs(cached=True)
+        self.assertIs(ConfigLoader(self.config_dir).load_all_configs(cached=True), first)
+
+        # Solo cambia la fecha: se comprueba el hash y se reutilizan
+        simples = self.config_dir / "variables_simples.yaml"
+        stat = simples.stat()
+        os.utime(simples, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIs(self.loader.load_all_configs(cached=True), first)
+
+        simples.write_text(
+            simples.read_text(encoding="utf-8").replace("Nombre de la Compañía", "Razón social", 1),
+            encoding="utf-8"
+        )
+        second = self.loader.load_all_configs(cached=True)
+        self.assertIsNot(second, first)
+        labels = [var["label"] for var in second[0]["simple_variables"]]
+        self.assertIn("Razón social", labels)
+        self.assertEqual(second[1:], first[1:])
+
+    def test_configs_are_read_only_and_equal_to_uncached(self):
+        cached = self.loader.load_all_configs(cached=True)
+        self.assertEqual(cached, self.loader.load_all_configs())
+
+        cfg_simple, _, cfg_tab = cached
+        self.assertIsInstance(cfg_tab["tables"], FrozenDict)
+        self.assertIsInstance(cfg_simple["simple_variables"], FrozenList)
+        with self.assertRaises(TypeError):
+            cfg_tab["tables"]["nueva"] = {}
+        with self.assertRaises(TypeError):
+            cfg_simple["simple_variables"].append({})
+
+        editable = copy.deepcopy(cfg_tab)
+        editable["tables"]["nueva"] = {}
+        self.assertIs(type(editable["tables"]), dict)
+        self.assertNotIn("nueva", cfg_tab["tables"])
+
+    def test_invalid_yaml_is_not_cached(self):
+        first = self.loader.load_all_configs(cached=True)
+        (self.config_dir / "tablas.yaml").write_text("tables: [", encoding="utf-8")
+        with self.assertRaisesRegex(Exception, "tablas.yaml"):
+            self.loader.load_all_configs(cached=True)
+
+        shutil.copy(APP_DIR / "config" / "tablas.yaml", self.config_dir / "tablas.yaml")
+        self.assertEqual(self.loader.load_all_configs(cached=True), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
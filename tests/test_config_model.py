@@ -0,0 +1,122 @@
+import gc
+import sys
+from copy import deepcopy
+from pathlib import Path
+import unittest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.conditions import validate_conditions
+from modules.config_loader import ConfigLoader, freeze
+from modules.config_model import (
+    ConditionsModel,
+    SimpleVarsModel,
+    _compiled_models,
+    compile_models,
+    conditions_model,
+    simple_vars_model
+)
+from modules.simple_vars import validate_simple_vars
+from modules.utils import build_conditions_context, build_simple_context, validate_inputs
+
+CFG_SIMPLE = freeze({
+    "simple_variables": [
+        {"id": "nombre", "label": "Nombre", "marker": "<<Nombre>>", "type": "text"},
+        {"id": "margen", "label": "Margen", "marker": "<<Margen>>", "type": "percent"},
+        {"id": "importe", "label": "Importe", "marker": "<<Importe>>", "type": "number", "optional": True},
+        {"id": "anio", "label": "Año", "marker": "<<Año>>", "type": "integer"},
+        {"id": "correo", "label": "Correo", "marker": "<<Correo>>", "type": "email", "optional": True},
+        {"id": "anterior", "label": "Ejercicio anterior", "type": "text"},
+    ]
+})
+
+CFG_COND = freeze({
+    "conditions": [
+        {"id": "formal", "label": "Formal", "marker": "<<Formal>>", "word_file": "condiciones/formal.docx"},
+        {"id": "riesgos", "label": "Riesgos", "marker": "<<Riesgos>>", "word_file": "condiciones/riesgos.docx"},
+    ]
+})
+
+compile_models(CFG_SIMPLE, CFG_COND)
+
+
+class SimpleVarsModelTests(unittest.TestCase):
+    def setUp(self):
+        self.model = simple_vars_model(CFG_SIMPLE)
+
+    def test_defaults_and_lookups(self):
+        self.assertEqual(
+            self.model.defaults,
+            {"nombre": "", "margen": 0.0, "importe": 0.0, "anio": 0, "correo": "", "anterior": ""}
+        )
+        self.assertIs(self.model.by_marker["<<Margen>>"], self.model.by_id["margen"])
+        self.assertNotIn(None, self.model.by_marker)
+        self.assertEqual([var.id for var in self.model.context_variables][-1], "correo")
+        self.assertFalse(self.model.by_id["importe"].required)
+
+    def test_context_formats_by_type(self):
+        context = build_simple_context(CFG_SIMPLE, {
+            "nombre": "ACME", "margen": 0.35, "importe": 1234.5, "anio": 2024, "anterior": "2023"
+        })
+        self.assertEqual(context, {
+            "<<Nombre>>": "ACME", "<<Margen>>": "35.00%", "<<Importe>>": "1,234.50", "<<Año>>": "2024"
+        })
+
+    def test_validation_messages(self):
+        inputs = {"nombre": " ", "margen": "x", "importe": "", "anio": "1.5", "correo": "sin_arroba"}
+        self.assertEqual(validate_simple_vars(CFG_SIMPLE, inputs), [
+            "El campo 'Nombre' es requerido",
+            "El campo 'Margen' debe ser un número",
+            "El campo 'Año' debe ser un número entero",
+            "El campo 'Correo' debe ser un email válido",
+        ])
+        self.assertEqual(validate_inputs(CFG_SIMPLE, inputs), [
+            "El campo 'Nombre' es requerido",
+            "El campo 'Importe' es requerido",
+        ])
+
+
+class ConditionsModelTests(unittest.TestCase):
+    def test_context_and_validation(self):
+        context, docs = build_conditions_context(CFG_COND, {"riesgos": "Sí"})
+        self.assertEqual(context, {"<<Formal>>": "", "<<Riesgos>>": ""})
+        self.assertEqual(docs, [{"marker": "<<Riesgos>>", "file": "condiciones/riesgos.docx"}])
+        self.assertEqual(
+            validate_conditions(CFG_COND, {"formal": "Quizá"}),
+            ["El valor de 'Formal' debe ser 'Sí' o 'No'"]
+        )
+        self.assertEqual(ConditionsModel(CFG_COND).by_marker["<<Formal>>"].word_file, "condiciones/formal.docx")
+
+
+class CompiledConfigTests(unittest.TestCase):
+    def test_loader_compiles_models_once(self):
+        cfg_simple, cfg_cond, _ = ConfigLoader().load_all_configs()
+
+        model = simple_vars_model(cfg_simple)
+        self.assertIsInstance(model, SimpleVarsModel)
+        self.assertIs(simple_vars_model(cfg_simple), model)
+        self.assertIsInstance(conditions_model(cfg_cond), ConditionsModel)
+
+    def test_uncompiled_config_fails_instead_of_recompiling(self):
+        cfg_simple, cfg_cond, _ = ConfigLoader().load_all_configs()
+        # La copia mutable de deepcopy es un dict normal sin modelo
+        for config in (deepcopy(cfg_simple), freeze(deepcopy(cfg_simple)), cfg_cond):
+            with self.assertRaises(ValueError):
+                simple_vars_model(config)
+        with self.assertRaises(TypeError):
+            compile_models({"simple_variables": []}, {"conditions": []})
+
+    def test_model_is_released_with_its_config(self):
+        cfg_simple, cfg_cond = freeze({"simple_variables": []}), freeze({"conditions": []})
+        compile_models(cfg_simple, cfg_cond)
+        key = id(cfg_simple)
+        self.assertIn(key, _compiled_models)
+
+        del cfg_simple, cfg_cond
+        gc.collect()
+        self.assertNotIn(key, _compiled_models)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+from io import BytesIO
+from pathlib import Path
+import unittest
+import zipfile
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.docx_package import CompressionPolicy, build_package, read_raw_entries
+
+
+class DocxPackageTests(unittest.TestCase):
+    def _make_zip(self):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr('[Content_Types].xml', '<Types/>' * 50, zipfile.ZIP_DEFLATED)
+            zf.writestr('word/document.xml', '<doc>original</doc>', zipfile.ZIP_DEFLATED)
+            zf.writestr('word/media/image1.jpg', bytes(range(256)) * 40, zipfile.ZIP_STORED)
+        return buffer.getvalue()
+
+    def test_unchanged_parts_are_copied_without_recompression(self):
+        template = self._make_zip()
+        entries = read_raw_entries(template)
+
+        result = build_package(entries, {'word/document.xml': b'<doc>nuevo</doc>'})
+
+        with zipfile.ZipFile(BytesIO(template)) as original, zipfile.ZipFile(BytesIO(result)) as package:
+            self.assertIsNone(package.testzip())
+            self.assertEqual(original.namelist(), package.namelist())
+            self.assertEqual(package.read('word/document.xml'), b'<doc>nuevo</doc>')
+
+            for name in ('[Content_Types].xml', 'word/media/image1.jpg'):
+                original_info = original.getinfo(name)
+                package_info = package.getinfo(name)
+                self.assertEqual(original_info.compress_type, package_info.compress_type)
+                self.assertEqual(original_info.compress_size, package_info.compress_size)
+                self.assertEqual(original_info.CRC, package_info.CRC)
+                self.assertEqual(original.read(name), package.read(name))
+
+    def test_new_parts_are_appended(self):
+        entries = read_raw_entries(self._make_zip())
+
+        result = build_package(entries, {'word/header1.xml': '<hdr>cabecera ñ</hdr>'.encode('utf-8')})
+
+        with zipfile.ZipFile(BytesIO(result)) as package:
+            self.assertIsNone(package.testzip())
+            self.assertEqual(package.namelist()[-1], 'word/header1.xml')
+            self.assertEqual(package.read('word/header1.xml').decode('utf-8'), '<hdr>cabecera ñ</hdr>')
+
+    def test_policy_stores_precompressed_media(self):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr('word/document.xml', '<doc/>', zipfile.ZIP_DEFLATED)
+            zf.writestr('word/media/image1.jpeg', b'\xff\xd8' * 500, zipfile.ZIP_DEFLATED)
+            zf.writestr('word/media/image2.emf', b'\x01\x00' * 500, zipfile.ZIP_DEFLATED)
+        entries = read_raw_entries(buffer.getvalue())
+
+        passthrough = build_package(entries, {'word/media/image3.png': b'png' * 100})
+        recompressed = build_package(
+            entries,
+            {'word/media/image3.png': b'png' * 100},
+            CompressionPolicy(xml_level=9, recompress_template_parts=True)
+        )
+
+        with zipfile.ZipFile(BytesIO(passthrough)) as package:
+            self.assertEqual(package.getinfo('word/media/image1.jpeg').compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(package.getinfo('word/media/image3.png').compress_type, zipfile.ZIP_STORED)
+
+        with zipfile.ZipFile(BytesIO(recompressed)) as package:
+            self.assertIsNone(package.testzip())
+            self.assertEqual(package.getinfo('word/media/image1.jpeg').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(package.getinfo('word/media/image2.emf').compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(package.read('word/media/image1.jpeg'), b'\xff\xd8' * 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import math
+import shutil
+import sys
+from pathlib import Path
+import tempfile
+import unittest
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.config_loader import ConfigLoader
+from modules.formulas import (
+    FormulaError,
+    FormulaEvaluator,
+    FormulaGraph,
+    compile_formula,
+    table_formula_graph,
+)
+from modules.tables import TableBuilder
+
+
+class CompileFormulaTests(unittest.TestCase):
+    def test_references_and_evaluation(self):
+        formula = compile_formula("ebit.ejercicio_actual / cifra_negocios.ejercicio_actual * 100")
+
+        self.assertEqual(formula.references, {"ebit.ejercicio_actual", "cifra_negocios.ejercicio_actual"})
+        self.assertIs(compile_formula("ebit.ejercicio_actual / cifra_negocios.ejercicio_actual * 100"), formula)
+        self.assertAlmostEqual(
+            formula.evaluate({"ebit.ejercicio_actual": 50, "cifra_negocios.ejercicio_actual": "200"}), 25.0
+        )
+        # División entre 0 y valores que faltan: resultado no definido
+        self.assertTrue(math.isnan(formula.evaluate({"ebit.ejercicio_actual": 5, "cifra_negocios.ejercicio_actual": 0})))
+        self.assertTrue(math.isnan(formula.evaluate({"ebit.ejercicio_actual": 5})))
+        self.assertEqual(compile_formula("-(a + 2) * 3 - b").evaluate({"a": 1, "b": 1.5}), -10.5)
+
+    def test_evaluates_arrays_in_one_call(self):
+        formula = compile_formula("(ejercicio_actual - ejercicio_anterior) / ejercicio_anterior * 100")
+        result = formula.evaluate({
+            "ejercicio_actual": np.array([110.0, 5.0, np.nan]),
+            "ejercicio_anterior": np.array([100.0, 0.0, 3.0]),
+        })
+        np.testing.assert_allclose(result, [10.0, np.nan, np.nan])
+
+    def test_rejects_unsafe_or_unsupported_expressions(self):
+        for expression in ("__import__('os').system('x')", "a.b.c", "a ** 2", "'texto'",
+                           "a if b else c", "a[0]", "lambda: 1", "a +", "True + 1"):
+            with self.subTest(expression=expression):
+                with self.assertRaises(FormulaError):
+                    compile_formula(expression)
+
+
+class FormulaGraphTests(unittest.TestCase):
+    def test_orders_dependencies_and_detects_cycles(self):
+        graph = FormulaGraph({
+            "margen.actual": "ebit.actual / ventas.actual * 100",
+            "ebit.actual": "ventas.actual - costes.actual",
+        })
+
+        self.assertEqual(graph.order, ("ebit.actual", "margen.actual"))
+        self.assertEqual(graph.inputs, {"ventas.actual", "costes.actual"})
+        self.assertEqual(
+            graph.evaluate({"ventas.actual": 200, "costes.actual": 150}),
+            {"ebit.actual": 50.0, "margen.actual": 25.0}
+        )
+
+        with self.assertRaises(FormulaError):
+            FormulaGraph({"a.x": "b.x + 1", "b.x": "a.x * 2"})
+
+    def test_evaluator_recomputes_only_changed_nodes(self):
+        evaluator = FormulaEvaluator(FormulaGraph({
+            "om.actual": "ebit.actual / ventas.actual",
+            "om.anterior": "ebit.anterior / ventas.anterior",
+            "ratio.actual": "om.actual / om.anterior",
+        }))
+        values = {"ebit.actual": 20, "ventas.actual": 100, "ebit.anterior": 10, "ventas.anterior": 100}
+
+        evaluator.evaluate(values)
+        self.assertEqual(len(evaluator.recomputed), 3)
+
+        evaluator.evaluate(values)
+        self.assertEqual(evaluator.recomputed, [])
+
+        results = evaluator.evaluate({**values, "ebit.anterior": 5})
+        self.assertEqual(evaluator.recomputed, ["om.anterior", "ratio.actual"])
+        self.assertAlmostEqual(results["ratio.actual"], 4.0)
+
+        # El resultado intermedio no cambia: no se recalcula lo que depende de él
+        evaluator.evaluate({**values, "ebit.anterior": 10, "ventas.anterior": 100.0})
+        evaluator.evaluate({**values, "ebit.anterior": 20, "ventas.anterior": 200})
+        self.assertEqual(evaluator.recomputed, ["om.anterior"])
+
+
+class TableFormulaTests(unittest.TestCase):
+    def test_partidas_contables_calculated_rows(self):
+        cfg_tab = ConfigLoader(APP_DIR / "config").load_all_configs()[2]
+        self.assertEqual(len(table_formula_graph(cfg_tab["tables"]["partidas_contables"])), 4)
+
+        table = TableBuilder(cfg_tab, {}).build_partidas_contables({"partidas_contables": {
+            "cifra_negocios": {"ejercicio_actual": 1000.0, "ejercicio_anterior": 800.0},
+            "total_costes_operativos": {"ejercicio_actual": 900.0, "ejercicio_anterior": 0.0},
+            "ebit": {"ejercicio_actual": 100.0, "ejercicio_anterior": 40.0},
+        }})["<<Tabla partidas contables>>"]
+        rows = {row["partida"]: row for row in table["rows"]}
+
+        om = rows["Operating Margin (OM)"]
+        self.assertAlmostEqual(om["ejercicio_actual"], 10.0)
+        self.assertAlmostEqual(om["ejercicio_anterior"], 5.0)
+        self.assertAlmostEqual(om["variacion"], 100.0)
+        ncp = rows["Net Cost Plus (NCP)"]
+        self.assertAlmostEqual(ncp["ejercicio_actual"], 100.0 / 9)
+        self.assertIsNone(ncp["ejercicio_anterior"])
+        self.assertIsNone(ncp["variacion"])
+
+    def test_invalid_formula_fails_at_config_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config_dir = Path(tmp) / "config"
+            shutil.copytree(APP_DIR / "config", config_dir)
+            tablas = config_dir / "tablas.yaml"
+            tablas.write_text(
+                tablas.read_text(encoding="utf-8").replace(
+                    '"ebit.ejercicio_actual / cifra_negocios.ejercicio_actual * 100"',
+                    '"__import__(\'os\').getcwd()"'
+                ),
+                encoding="utf-8"
+            )
+
+            with self.assertRaisesRegex(Exception, "partidas_contables"):
+                ConfigLoader(config_dir).load_all_configs()
+
+
+if __name__ == "__main__":
+    unittest.main()
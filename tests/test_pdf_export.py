@@ -0,0 +1,316 @@
+import os
+import sys
+from pathlib import Path
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.pdf_export import (
+    ConverterRegistry,
+    PandocConverter,
+    PdfConversion,
+    PdfConverter,
+    SofficeCliConverter,
+    SofficeConverter,
+    SofficePool
+)
+
+# soffice residente simulado: anota el arranque, avisa de que acepta
+# conexiones en su pipe y se queda esperando hasta que lo terminan
+FAKE_SOFFICE = """#!{python}
+import sys
+import time
+from pathlib import Path
+
+here = Path(__file__).parent
+args = sys.argv[1:]
+assert any(a.startswith("-env:UserInstallation=") for a in args), "sin perfil propio"
+pipe = next(a for a in args if a.startswith("--accept=pipe,")).split("name=", 1)[1].split(";", 1)[0]
+with open(here / "calls.log", "a") as log:
+    log.write("start " + pipe + "\\n")
+(here / (pipe + ".ready")).touch()
+while True:
+    time.sleep(1)
+"""
+
+# soffice de una sola conversión (--convert-to), como lo usa SofficeCliConverter
+FAKE_SOFFICE_CLI = """#!{python}
+import sys
+from pathlib import Path
+
+args = sys.argv[1:]
+outdir = Path(args[args.index("--outdir") + 1])
+source = Path(args[-1])
+(outdir / (source.stem + ".pdf")).write_bytes(b"%PDF-" + source.read_bytes())
+"""
+
+
+def _url_to_path(url):
+    return Path(url2pathname(urlparse(url).path))
+
+
+class FakeUno:
+    """Módulo uno simulado: convierte en el soffice simulado copiando el contenido."""
+
+    def __init__(self, tmp):
+        self.tmp = tmp
+
+    @staticmethod
+    def systemPathToFileUrl(path):
+        return Path(path).as_uri()
+
+    def getComponentContext(self):
+        return SimpleNamespace(ServiceManager=SimpleNamespace(
+            createInstanceWithContext=lambda name, context: SimpleNamespace(resolve=self._resolve)
+        ))
+
+    def _resolve(self, url):
+        # Cada proceso acepta una única conexión: la del worker que lo arrancó
+        ready = self.tmp / (url.split("name=", 1)[1].split(";", 1)[0] + ".ready")
+        if not ready.exists():
+            raise OSError("NoConnectException")
+        ready.unlink()
+        desktop = SimpleNamespace(loadComponentFromURL=self._load)
+        return SimpleNamespace(ServiceManager=SimpleNamespace(
+            createInstanceWithContext=lambda name, context: desktop
+        ))
+
+    def _load(self, url, frame, flags, properties):
+        crash = self.tmp / "crash"
+        if crash.exists():
+            crash.unlink()
+            raise OSError("DisposedException")
+        source = _url_to_path(url)
+        return SimpleNamespace(
+            storeToURL=lambda target, props: _url_to_path(target).write_bytes(b"%PDF-" + source.read_bytes()),
+            close=lambda force: None
+        )
+
+
+def _write_script(path, source):
+    path.write_text(source.format(python=sys.executable))
+    path.chmod(0o755)
+    return path
+
+
+@unittest.skipIf(os.name == "nt", "el soffice simulado es un script con shebang")
+class SofficePoolTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self.tmp_dir.name)
+        self.soffice = _write_script(self.tmp / "soffice", FAKE_SOFFICE)
+        patcher = mock.patch.multiple(
+            "modules.pdf_export",
+            uno=FakeUno(self.tmp),
+            PropertyValue=lambda Name, Value: (Name, Value)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _starts(self):
+        return (self.tmp / "calls.log").read_text().splitlines()
+
+    def test_workers_stay_resident_between_conversions(self):
+        pool = SofficePool(size=1, soffice_path=str(self.soffice))
+        try:
+            first = pool.convert(b"uno")
+            second = pool.convert(b"dos")
+            process = pool.workers[0].process
+            self.assertIsNone(process.poll())
+        finally:
+            pool.shutdown()
+
+        self.assertEqual((first.pdf_bytes, second.pdf_bytes), (b"%PDF-uno", b"%PDF-dos"))
+        self.assertEqual(len(self._starts()), 1)
+        self.assertEqual(set(first.timings), {"pdf_queue_wait", "pdf_conversion"})
+        self.assertEqual(pool.stats()["conversions"], 2)
+        self.assertIsNotNone(process.poll())
+        self.assertIsNone(pool.workers[0].profile_dir)
+
+    def test_start_warms_every_worker(self):
+        pool = SofficePool(size=2, soffice_path=str(self.soffice))
+        try:
+            pool.start()
+            self.assertEqual(pool.stats()["alive"], 2)
+            pool.convert(b"uno")
+        finally:
+            pool.shutdown()
+
+        self.assertEqual(len(self._starts()), 2)
+        self.assertEqual(pool.stats()["restarts"], 0)
+
+    def test_dead_worker_is_restarted_before_converting(self):
+        pool = SofficePool(size=1, soffice_path=str(self.soffice))
+        try:
+            pool.convert(b"uno")
+            old_profile = pool.workers[0].profile_dir
+            pool.workers[0].process.kill()
+            pool.workers[0].process.wait()
+
+            result = pool.convert(b"dos")
+        finally:
+            pool.shutdown()
+
+        self.assertEqual((result.pdf_bytes, result.attempts), (b"%PDF-dos", 1))
+        self.assertFalse(old_profile.exists())
+        self.assertEqual(len(self._starts()), 2)
+        self.assertEqual(pool.stats()["restarts"], 1)
+
+    def test_failed_conversion_is_retried_on_a_new_process(self):
+        pool = SofficePool(size=1, soffice_path=str(self.soffice))
+        try:
+            pool.convert(b"uno")
+            (self.tmp / "crash").touch()
+
+            result = pool.convert(b"dos")
+        finally:
+            pool.shutdown()
+
+        self.assertEqual((result.pdf_bytes, result.attempts), (b"%PDF-dos", 2))
+        self.assertEqual(len(self._starts()), 2)
+        stats = pool.stats()
+        self.assertEqual((stats["restarts"], stats["failures"]), (1, 0))
+
+    def test_pool_bounds_concurrent_conversions(self):
+        pool = SofficePool(size=2, soffice_path=str(self.soffice))
+        results = []
+        try:
+            threads = [
+                threading.Thread(target=lambda i=i: results.append(pool.convert(str(i).encode())))
+                for i in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            pool.shutdown()
+
+        self.assertEqual(sorted(r.pdf_bytes for r in results), [b"%PDF-" + str(i).encode() for i in range(5)])
+        self.assertLessEqual({r.worker_id for r in results}, {0, 1})
+        self.assertLessEqual(len(self._starts()), 2)
+
+    def test_missing_soffice_raises_runtime_error(self):
+        with mock.patch("modules.pdf_export.find_soffice", return_value=None):
+            with self.assertRaises(RuntimeError):
+                SofficePool()
+
+        pool = SofficePool(size=1, soffice_path=str(self.tmp / "no_existe"))
+        with self.assertRaises(RuntimeError):
+            pool.convert(b"x")
+        self.assertEqual(pool.stats()["failures"], 1)
+        pool.shutdown()
+
+
+@unittest.skipIf(os.name == "nt", "el soffice simulado es un script con shebang")
+class SofficeWithoutUnoTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.soffice = _write_script(Path(self.tmp_dir.name) / "soffice", FAKE_SOFFICE_CLI)
+        patcher = mock.patch("modules.pdf_export.uno", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pool_is_disabled_without_uno(self):
+        with self.assertRaises(RuntimeError) as ctx:
+            SofficePool(size=1, soffice_path=str(self.soffice))
+        self.assertIn("uno", str(ctx.exception))
+
+        with mock.patch("modules.pdf_export.find_soffice", return_value=str(self.soffice)):
+            self.assertIn("uno", SofficeConverter().probe())
+            self.assertIsNone(SofficeCliConverter().probe())
+
+    def test_cli_converter_runs_one_soffice_per_document(self):
+        with mock.patch("modules.pdf_export.find_soffice", return_value=str(self.soffice)):
+            result = SofficeCliConverter().convert(b"doc")
+
+        self.assertEqual((result.pdf_bytes, result.backend), (b"%PDF-doc", "soffice-cli"))
+
+
+class StubConverter(PdfConverter):
+    def __init__(self, name, reason=None, fails=False):
+        self.name = name
+        self.reason = reason
+        self.fails = fails
+        self.probes = 0
+        self.conversions = 0
+
+    def probe(self):
+        self.probes += 1
+        return self.reason
+
+    def convert(self, docx_bytes):
+        self.conversions += 1
+        if self.fails:
+            self.reason = "ha dejado de funcionar"
+            raise RuntimeError("conversión fallida")
+        return PdfConversion(b"%PDF", 0.0, 0.0, 0, 1, self.name)
+
+
+class ConverterRegistryTests(unittest.TestCase):
+    def test_uses_first_available_converter_without_probing_again(self):
+        soffice = StubConverter("soffice", reason="no instalado")
+        word = StubConverter("docx2pdf")
+        pandoc = StubConverter("pandoc")
+        registry = ConverterRegistry([soffice, word, pandoc])
+        registry.discover()
+
+        self.assertEqual(registry.convert(b"doc").backend, "docx2pdf")
+        self.assertEqual(registry.convert(b"doc").backend, "docx2pdf")
+        self.assertEqual((word.conversions, pandoc.conversions), (2, 0))
+        # probe + health check (que por defecto vuelve a llamar a probe) una sola vez
+        self.assertEqual((soffice.probes, word.probes), (1, 2))
+        self.assertEqual(
+            [(row["backend"], row["priority"], row["available"]) for row in registry.report()],
+            [("soffice", 1, False), ("docx2pdf", 2, True), ("pandoc", 3, True)]
+        )
+
+    def test_failing_converter_is_disabled_and_next_one_used(self):
+        broken = StubConverter("soffice", fails=True)
+        pandoc = StubConverter("pandoc")
+        registry = ConverterRegistry([broken, pandoc])
+
+        self.assertEqual(registry.convert(b"doc").backend, "pandoc")
+        self.assertEqual(registry.status["soffice"], "ha dejado de funcionar")
+        self.assertEqual(registry.convert(b"doc").backend, "pandoc")
+        self.assertEqual(broken.conversions, 1)
+
+    def test_incomplete_converter_cannot_be_instantiated(self):
+        class SinConvert(PdfConverter):
+            name = "incompleto"
+
+            def probe(self):
+                return None
+
+        with self.assertRaises(TypeError):
+            SinConvert()
+
+    def test_no_converter_available_raises_with_reasons(self):
+        registry = ConverterRegistry([StubConverter("soffice", reason="no instalado")])
+        with self.assertRaises(RuntimeError) as ctx:
+            registry.convert(b"doc")
+        self.assertIn("soffice: no instalado", str(ctx.exception))
+
+    def test_pandoc_probe_never_downloads(self):
+        pypandoc = mock.MagicMock()
+        pypandoc.get_pandoc_path.side_effect = OSError("No pandoc was found")
+        with mock.patch.dict(sys.modules, {"pypandoc": pypandoc}), \
+                mock.patch("importlib.util.find_spec", return_value=object()):
+            self.assertEqual(PandocConverter().probe(), "pandoc no está instalado")
+        pypandoc.download_pandoc.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
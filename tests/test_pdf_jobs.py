@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+import threading
+import unittest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.pdf_export import PdfConversion
+from modules.pdf_jobs import PdfJobQueue, docx_key
+
+
+class FakeConverter:
+    """Conversión simulada que espera a que el test la libere."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, docx_bytes: bytes) -> PdfConversion:
+        self.calls.append(docx_bytes)
+        self.release.wait(5)
+        if docx_bytes == b"roto":
+            raise RuntimeError("LibreOffice falló al convertir")
+        return PdfConversion(b"%PDF-" + docx_bytes, 0.0, 0.01, 0, 1)
+
+
+class PdfJobQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.converter = FakeConverter()
+        self.jobs = PdfJobQueue(max_workers=2, max_jobs=2, convert=self.converter)
+
+    def tearDown(self):
+        self.converter.release.set()
+        self.jobs.shutdown()
+
+    def test_submit_returns_immediately_and_coalesces_same_document(self):
+        first = self.jobs.submit(b"informe")
+        second = self.jobs.submit(b"informe")
+
+        self.assertIs(first, second)
+        self.assertEqual(first.key, docx_key(b"informe"))
+        self.assertEqual(first.status, "pending")
+        self.assertIsNone(first.error)
+
+        self.converter.release.set()
+        self.assertEqual(first.result(5).pdf_bytes, b"%PDF-informe")
+        self.assertEqual(first.status, "done")
+        self.assertIs(self.jobs.submit(b"informe"), first)
+        self.assertEqual(self.converter.calls, [b"informe"])
+        self.assertEqual((self.jobs.submitted, self.jobs.coalesced), (1, 2))
+
+    def test_failed_job_reports_error_and_is_resubmitted(self):
+        self.converter.release.set()
+        job = self.jobs.submit(b"roto")
+        with self.assertRaises(RuntimeError):
+            job.result(5)
+
+        self.assertEqual(job.status, "error")
+        self.assertIn("LibreOffice", job.error)
+        self.assertIsNot(self.jobs.submit(b"roto"), job)
+
+    def test_only_finished_jobs_are_evicted(self):
+        pending = [self.jobs.submit(b"a"), self.jobs.submit(b"b"), self.jobs.submit(b"c")]
+        self.assertEqual([self.jobs.get(job.key) for job in pending], pending)
+
+        self.converter.release.set()
+        for job in pending:
+            job.result(5)
+        self.jobs.submit(b"d").result(5)
+
+        self.assertIsNone(self.jobs.get(pending[0].key))
+        self.assertIsNone(self.jobs.get(pending[1].key))
+        self.assertIs(self.jobs.get(pending[2].key), pending[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+from datetime import date
+from pathlib import Path
+import tempfile
+import unittest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.report_cache import ReportCache, canonical_json, file_digest, report_cache_key
+from modules.report_generator import ReportOptions
+
+
+class ReportCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_memory_cache_evicts_least_recently_used_by_size(self):
+        cache = ReportCache(max_bytes=10)
+        cache.put("a", b"1234")
+        cache.put("b", b"5678")
+        self.assertEqual(cache.get("a"), b"1234")
+
+        cache.put("c", b"90ab")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), b"1234")
+        self.assertEqual(cache.size_bytes, 8)
+
+        # Un documento mayor que la caché no se guarda
+        cache.put("d", b"x" * 11)
+        self.assertNotIn("d", cache)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_disk_cache_survives_memory_and_respects_its_limit(self):
+        cache_dir = self.tmp / "informes"
+        ReportCache(cache_dir=cache_dir).put("a", b"documento")
+
+        cache = ReportCache(cache_dir=cache_dir, max_disk_bytes=12)
+        self.assertEqual(cache.get("a"), b"documento")
+        self.assertEqual(len(cache), 1)
+
+        os.utime(cache_dir / "a.docx", ns=(1, 1))
+        cache.put("b", b"otro")
+        self.assertFalse((cache_dir / "a.docx").exists())
+        self.assertTrue((cache_dir / "b.docx").exists())
+
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(list(cache_dir.iterdir()), [])
+
+    def test_canonical_json_ignores_key_order(self):
+        self.assertEqual(
+            canonical_json({"b": [1, 2.5], "a": {"y": date(2023, 12, 31), "x": None}}),
+            canonical_json({"a": {"x": None, "y": date(2023, 12, 31)}, "b": [1, 2.5]})
+        )
+        self.assertNotEqual(canonical_json({"a": 1}), canonical_json({"a": 1.0}))
+        with self.assertRaises(TypeError):
+            canonical_json({"a": object()})
+
+    def test_key_depends_on_inputs_and_template_content(self):
+        template = self.tmp / "Plantilla.docx"
+        template.write_bytes(b"plantilla")
+        configs = ({}, {"conditions": []}, {})
+        options = ReportOptions(config_dir=self.tmp, template_path=template, configs=configs)
+
+        def key(simple_inputs):
+            return report_cache_key(simple_inputs, {}, {}, {}, configs, options)
+
+        self.assertEqual(key({"a": 1, "b": 2}), key({"b": 2, "a": 1}))
+        self.assertNotEqual(key({"a": 1}), key({"a": 2}))
+        self.assertIsNone(key({"a": object()}))
+
+        before = key({"a": 1})
+        digest = file_digest(template)
+        template.write_bytes(b"plantilla modificada")
+        self.assertNotEqual(file_digest(template), digest)
+        self.assertNotEqual(key({"a": 1}), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
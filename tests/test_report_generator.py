@@ -0,0 +1,125 @@
+import sys
+from io import BytesIO
+from pathlib import Path
+import tempfile
+import unittest
+import zipfile
+
+from docx import Document
+from lxml import etree
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.config_loader import ConfigLoader
+from modules.report_cache import ReportCache
+from modules.report_generator import (
+    ReportOptions,
+    generate_report,
+    report_filename,
+    validate_report_inputs
+)
+from modules.tables import calculate_partidas_rows
+
+
+class ReportGeneratorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.configs = ConfigLoader(APP_DIR / "config").load_all_configs()
+        cls.simple_inputs = {}
+        for var in cls.configs[0]["simple_variables"]:
+            var_type = var.get("type", "text")
+            if var_type == "email":
+                cls.simple_inputs[var["id"]] = "revisor@example.com"
+            elif var_type in ("number", "percent"):
+                cls.simple_inputs[var["id"]] = 12.5
+            else:
+                cls.simple_inputs[var["id"]] = f"Texto {var['id']}"
+        cls.simple_inputs.update(nombre_compania="ACME SL", ejercicio_completo="2023")
+
+    def test_generates_document_and_stage_timings(self):
+        cfg_simple, cfg_cond, _ = self.configs
+        self.assertEqual(validate_report_inputs(cfg_simple, cfg_cond, self.simple_inputs, {}), [])
+
+        result = generate_report(self.simple_inputs, {}, {}, {}, ReportOptions(configs=self.configs))
+
+        text = "\n".join(p.text for p in Document(BytesIO(result.doc_bytes)).paragraphs)
+        self.assertIn("ACME SL", text)
+        self.assertNotIn("<<", text)
+
+        stages = list(result.timings)
+        self.assertEqual(stages[0], "load_configs")
+        self.assertEqual(stages[-1], "get_document_bytes")
+        self.assertLess(stages.index("replace_variables"), stages.index("clean_document"))
+        self.assertAlmostEqual(result.total_seconds, sum(result.timings.values()))
+        self.assertEqual(report_filename(self.simple_inputs, "pdf"), "Informe_PT_ACME_SL_2023.pdf")
+
+    def test_streaming_engine_produces_the_same_document(self):
+        condition_inputs = {cond["id"]: "Sí" for cond in self.configs[1]["conditions"]}
+        documents = []
+        for streaming in (False, True):
+            result = generate_report(
+                self.simple_inputs, condition_inputs, {}, {},
+                ReportOptions(configs=self.configs, streaming=streaming)
+            )
+            self.assertEqual(type(result.engine).__name__,
+                             "StreamingWordEngine" if streaming else "XMLWordEngineAdapter")
+            xml = zipfile.ZipFile(BytesIO(result.doc_bytes)).read("word/document.xml")
+            documents.append(etree.tostring(etree.fromstring(xml), method="c14n"))
+
+        self.assertEqual(documents[0], documents[1])
+
+    def test_identical_request_is_served_from_result_cache(self):
+        cache = ReportCache()
+        options = ReportOptions(configs=self.configs, result_cache=cache)
+        first = generate_report(self.simple_inputs, {}, {}, {}, options)
+        second = generate_report(dict(self.simple_inputs), {}, {}, {}, options)
+
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertIsNone(second.engine)
+        self.assertEqual(second.doc_bytes, first.doc_bytes)
+        self.assertNotIn("replace_variables", second.timings)
+        self.assertEqual(second.engine_metrics, [])
+
+        changed = dict(self.simple_inputs, nombre_compania="OTRA SA")
+        third = generate_report(changed, {}, {}, {}, options)
+        self.assertFalse(third.cached)
+        self.assertEqual(len(cache), 2)
+
+    def test_partidas_percentages_match_the_ui(self):
+        cfg = self.configs[2]["tables"]["partidas_contables"]
+        manual = {
+            "cifra_negocios": {"ejercicio_actual": 1000.0, "ejercicio_anterior": 0.0},
+            "total_costes_operativos": {"ejercicio_actual": 800.0, "ejercicio_anterior": 400.0},
+            "ebit": {"ejercicio_actual": 50.0, "ejercicio_anterior": 20.0},
+        }
+        ui_values = calculate_partidas_rows(cfg, manual)
+
+        result = generate_report(
+            self.simple_inputs, {}, {"partidas_contables": {**manual, **ui_values}}, {},
+            ReportOptions(configs=self.configs)
+        )
+
+        cells = {
+            row.cells[0].text: [cell.text for cell in row.cells[1:3]]
+            for table in Document(BytesIO(result.doc_bytes)).tables for row in table.rows
+        }
+        for row_cfg in cfg["rows"]:
+            if row_cfg["id"] in ui_values:
+                values = ui_values[row_cfg["id"]]
+                self.assertEqual(
+                    cells[row_cfg["label"]],
+                    [f"{values['ejercicio_actual']:,.2f}", f"{values['ejercicio_anterior']:,.2f}"]
+                )
+
+    def test_missing_template_raises(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            options = ReportOptions(configs=self.configs, template_path=Path(tmp) / "no_existe.docx")
+            with self.assertRaises(FileNotFoundError):
+                generate_report(self.simple_inputs, {}, {}, {}, options)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import sys
+from io import BytesIO
+from pathlib import Path
+import tempfile
+import unittest
+import zipfile
+
+from docx import Document
+from lxml import etree
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.streaming_word_engine import StreamingWordEngine, _stream_body
+from modules.template_cache import BlockFragmentCache
+from modules.xml_word_engine_adapter import XMLWordEngineAdapter
+
+
+class StreamingWordEngineTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.base = Path(self.tmp_dir.name)
+
+        doc = Document()
+        doc.sections[0].header.paragraphs[0].text = "Cabecera <<Nombre>>"
+        doc.add_paragraph("Portada <<Nombre>>")
+        doc.add_paragraph("Índice <<Indice>>")
+        doc.add_paragraph("Uno <<1>>")
+        doc.add_paragraph("Fantasma <<2>>")
+        doc.add_paragraph("Tres <<3>>")
+        doc.add_paragraph("<<fin Indice>>")
+        doc.add_paragraph("<<1>> Uno")
+        para = doc.add_paragraph()
+        para.add_run("Texto de <<Nom")
+        para.add_run("bre>> {salto}")
+        doc.add_paragraph("<<Tabla ventas>>")
+        doc.add_paragraph("<<Bloque>>")
+        doc.add_paragraph("")
+        doc.add_paragraph("<<3>> Tres <<Sin valor>>")
+        table = doc.add_table(rows=1, cols=1)
+        table.cell(0, 0).text = "<<Celda>>"
+        self.template = self.base / "plantilla.docx"
+        doc.save(self.template)
+
+        (self.base / "condiciones").mkdir()
+        block = Document()
+        block.add_paragraph("Texto del bloque <<Nombre>>")
+        block.add_paragraph("<<Tabla del bloque>>")
+        block.save(self.base / "condiciones" / "bloque.docx")
+
+    def _run_pipeline(self, engine):
+        table = {"columns": [{"id": "a", "header": "A"}], "rows": [{"a": "valor"}]}
+        engine.replace_variables({"<<Nombre>>": "ACME"})
+        engine.insert_tables({"<<Tabla ventas>>": table, "<<Tabla del bloque>>": table}, {})
+        engine.insert_conditional_blocks(
+            [{"marker": "<<Bloque>>", "file": "condiciones/bloque.docx"}], self.base / "config"
+        )
+        engine.process_salto_markers()
+        engine.process_table_of_contents()
+        engine.clean_document()
+        return engine.get_document_bytes()
+
+    def test_matches_xml_engine_output(self):
+        expected_bytes = self._run_pipeline(
+            XMLWordEngineAdapter(self.template, block_cache=BlockFragmentCache())
+        )
+        # Un límite de 1 byte fuerza el fichero temporal entre las dos pasadas
+        result_bytes = self._run_pipeline(StreamingWordEngine(
+            self.template, block_cache=BlockFragmentCache(), spool_max_size=1
+        ))
+        expected = zipfile.ZipFile(BytesIO(expected_bytes))
+        result = zipfile.ZipFile(BytesIO(result_bytes))
+
+        self.assertEqual(sorted(result.namelist()), sorted(expected.namelist()))
+        for part in ("word/document.xml", "word/header1.xml"):
+            self.assertEqual(
+                etree.tostring(etree.fromstring(result.read(part)), method="c14n"),
+                etree.tostring(etree.fromstring(expected.read(part)), method="c14n"),
+                part
+            )
+
+        result_doc = Document(BytesIO(result_bytes))
+        texts = [p.text for p in result_doc.paragraphs]
+        # Los bloques se insertan después de reemplazar variables (como en generate_report)
+        self.assertIn("Texto del bloque ", texts)
+        self.assertFalse(any("Fantasma" in text or "<<" in text for text in texts))
+        # La tabla del bloque no se inserta: las tablas van antes que los bloques
+        self.assertEqual(len(result_doc.tables), 2)
+
+    def test_document_is_written_without_loading_the_tree(self):
+        engine = StreamingWordEngine(self.template, block_cache=BlockFragmentCache())
+        engine.replace_variables({"<<Nombre>>": "ACME"})
+        engine.clean_document()
+        self.assertIsNone(engine.root)
+
+        output = self.base / "salida.docx"
+        with open(output, "wb") as f:
+            engine.save(f)
+
+        texts = [p.text for p in Document(output).paragraphs]
+        self.assertEqual(texts[0], "Portada ACME")
+        self.assertIn("Texto de ACME {salto}", texts)
+        self.assertFalse(engine._paragraph_views)
+
+
+class StreamBodyTests(unittest.TestCase):
+    def test_children_do_not_repeat_inherited_namespaces(self):
+        w = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+        source = (
+            f'<w:document xmlns:w="{w}" xmlns:r="urn:r">'
+            f'<w:body xmlns:x="urn:x">'
+            f'<w:p r:id="1" x:a="xmlns:r=&quot;urn:r&quot;"><w:r><w:t>Uno</w:t></w:r></w:p>\n'
+            f'<w:p xmlns:y="urn:y" y:b="2"/>'
+            f'</w:body></w:document>'
+        ).encode()
+        sink = BytesIO()
+        _stream_body(BytesIO(source), sink, lambda elem: [elem])
+        output = sink.getvalue()
+
+        self.assertEqual(
+            etree.tostring(etree.fromstring(output), method="c14n"),
+            etree.tostring(etree.fromstring(source), method="c14n")
+        )
+        # Cada declaración aparece una sola vez, en el elemento que la introduce
+        for declaration in (b' xmlns:w="', b' xmlns:r="', b' xmlns:x="', b' xmlns:y="'):
+            self.assertEqual(output.count(declaration), 1, declaration)
+        self.assertIn(b'x:a="xmlns:r=&quot;urn:r&quot;"', output)
+        self.assertIn(b'<w:body xmlns:x="urn:x">', output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import sys
+from pathlib import Path
+import unittest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.config_loader import ConfigLoader
+from modules.tables import TableBuilder, TableFrame, calculate_partidas_rows
+
+
+class TableFrameTests(unittest.TestCase):
+    def test_sums_variation_and_percent_of(self):
+        frame = TableFrame(
+            [{"a": 10, "b": 4.0}, {"a": None, "b": 0}, {"b": "no numérico"}, {"a": 5, "b": 2.5}],
+            ["a", "b"]
+        )
+
+        self.assertEqual(len(frame), 4)
+        self.assertEqual(frame.sums(["a", "b", "c"]), {"a": 15.0, "b": 6.5, "c": 0.0})
+        self.assertEqual(frame.variation("a", "b"), [150.0, None, None, 100.0])
+        self.assertEqual(
+            TableFrame.percent_of({"a": 25, "b": 10, "c": 3}, {"a": 100, "b": 0}),
+            {"a": 25.0, "b": None, "c": None}
+        )
+
+    def test_empty_table(self):
+        frame = TableFrame([], ["a"])
+        self.assertEqual(frame.sums(["a"]), {"a": 0})
+        self.assertEqual(frame.variation("a", "a"), [])
+
+
+class TableBuilderTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cfg_tab = ConfigLoader(APP_DIR / "config").load_all_configs()[2]
+
+    def test_operaciones_vinculadas_totals_and_weights(self):
+        table_inputs = {
+            "operaciones_vinculadas": [
+                {"tipo_operacion": "Servicios", "entidad_vinculada": "A",
+                 "ingreso_local_file": 300.0, "gasto_local_file": 50.0},
+                {"tipo_operacion": "", "entidad_vinculada": "",
+                 "ingreso_local_file": "", "gasto_local_file": ""},
+                {"tipo_operacion": "Préstamo", "entidad_vinculada": "B",
+                 "ingreso_local_file": 100.0, "gasto_local_file": None},
+            ],
+            "partidas_contables": {
+                "cifra_negocios": {"ejercicio_actual": 1000.0},
+                "total_costes_operativos": {"ejercicio_actual": 0.0},
+            },
+        }
+        table = TableBuilder(self.cfg_tab, {}).build_all_tables(table_inputs)[
+            "<<Tabla operaciones vinculadas>>"
+        ]
+
+        self.assertEqual(len(table["rows"]), 2)
+        total, pesos = table["footer_rows"]
+        self.assertEqual(total, {"tipo_operacion": "Total", "ingreso_local_file": 400.0, "gasto_local_file": 50.0})
+        self.assertEqual(pesos["ingreso_local_file"], 40.0)
+        # Sin referencia (total de costes a 0) el peso queda vacío
+        self.assertEqual(pesos["gasto_local_file"], "")
+        # El formato viene de value_type en tablas.yaml, no de las filas
+        self.assertEqual(set(pesos), {"tipo_operacion", "ingreso_local_file", "gasto_local_file"})
+        self.assertEqual(
+            table["footer_column_types"],
+            [{}, {"ingreso_local_file": "percent", "gasto_local_file": "percent"}]
+        )
+
+    def test_partidas_contables_variation(self):
+        table_inputs = {"partidas_contables": {
+            "cifra_negocios": {"ejercicio_actual": 1100.0, "ejercicio_anterior": 1000.0},
+            "ebit": {"ejercicio_actual": 50.0, "ejercicio_anterior": 0.0},
+        }}
+        table = TableBuilder(self.cfg_tab, {"ejercicio_completo": "Ejercicio 2024"}).build_partidas_contables(
+            table_inputs
+        )["<<Tabla partidas contables>>"]
+        rows = {row["partida"]: row for row in table["rows"]}
+
+        self.assertAlmostEqual(rows["Cifra de negocios"]["variacion"], 10.0)
+        self.assertIsNone(rows["EBIT"]["variacion"])
+        self.assertIsNone(rows["EBT"]["variacion"])
+        self.assertEqual(table["headers"]["ejercicio_actual"], "2024")
+
+    def test_partidas_calculated_rows_match_between_ui_and_report(self):
+        cfg = self.cfg_tab["tables"]["partidas_contables"]
+        manual = {
+            "cifra_negocios": {"ejercicio_actual": 1000.0, "ejercicio_anterior": 0.0},
+            "total_costes_operativos": {"ejercicio_actual": 800.0, "ejercicio_anterior": 400.0},
+            "ebit": {"ejercicio_actual": 50.0, "ejercicio_anterior": 20.0},
+        }
+        ui_values = calculate_partidas_rows(cfg, manual)
+
+        # Porcentajes; un denominador cero se muestra como 0, como en la UI original
+        self.assertEqual(ui_values["operating_margin_om"], {"ejercicio_actual": 5.0, "ejercicio_anterior": 0})
+        self.assertEqual(ui_values["net_cost_plus_ncp"], {"ejercicio_actual": 6.25, "ejercicio_anterior": 5.0})
+
+        table = TableBuilder(self.cfg_tab, {}).build_partidas_contables(
+            {"partidas_contables": {**manual, **ui_values}}
+        )["<<Tabla partidas contables>>"]
+        rows = {row["partida"]: row for row in table["rows"]}
+        for row_cfg in cfg["rows"]:
+            if row_cfg["id"] in ui_values:
+                for col_id, value in ui_values[row_cfg["id"]].items():
+                    self.assertEqual(rows[row_cfg["label"]][col_id], value)
+
+
+if __name__ == "__main__":
+    unittest.main()
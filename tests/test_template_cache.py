@@ -0,0 +1,148 @@
+import os
+import sys
+from io import BytesIO
+from pathlib import Path
+import tempfile
+import unittest
+
+from docx import Document
+from lxml import etree
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from modules.template_cache import BlockFragmentCache, TemplateCache, find_story_parts
+from modules.xml_word_engine_adapter import XMLWordEngineAdapter
+
+
+class TemplateCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.doc_path = Path(self.tmp_dir.name) / "plantilla.docx"
+        doc = Document()
+        doc.add_paragraph("Hola <<Nombre>>")
+        doc.save(self.doc_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_template_is_loaded_once_and_reused(self):
+        cache = TemplateCache()
+        first = cache.get(self.doc_path)
+        second = cache.get(self.doc_path)
+
+        self.assertIs(first, second)
+        self.assertIn("word/styles.xml", first.parts)
+        self.assertNotIn("word/document.xml", first.parts)
+        self.assertIn("word/document.xml", first.part_names)
+
+    def test_touched_template_with_same_content_reuses_parsed_tree(self):
+        cache = TemplateCache()
+        first = cache.get(self.doc_path)
+
+        stat = self.doc_path.stat()
+        os.utime(self.doc_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        second = cache.get(self.doc_path)
+
+        self.assertIsNot(first, second)
+        self.assertIs(first.document_tree, second.document_tree)
+
+    def test_modified_template_is_reloaded(self):
+        cache = TemplateCache()
+        first = cache.get(self.doc_path)
+
+        doc = Document()
+        doc.add_paragraph("Contenido nuevo")
+        doc.save(self.doc_path)
+        stat = self.doc_path.stat()
+        os.utime(self.doc_path, ns=(stat.st_atime_ns, first.mtime_ns + 1_000_000_000))
+        second = cache.get(self.doc_path)
+
+        self.assertNotEqual(first.sha256, second.sha256)
+        self.assertIsNot(first.document_tree, second.document_tree)
+
+    def test_engines_work_on_independent_copies(self):
+        cache = TemplateCache()
+        engine_a = XMLWordEngineAdapter(self.doc_path, template_cache=cache)
+        engine_b = XMLWordEngineAdapter(self.doc_path, template_cache=cache)
+
+        engine_a.replace_variables({"<<Nombre>>": "Ana"})
+        engine_b.replace_variables({"<<Nombre>>": "Luis"})
+
+        text_a = Document(BytesIO(engine_a.get_document_bytes())).paragraphs[0].text
+        text_b = Document(BytesIO(engine_b.get_document_bytes())).paragraphs[0].text
+        cached_xml = cache.get(self.doc_path).document_tree.getroot()
+
+        self.assertEqual(text_a, "Hola Ana")
+        self.assertEqual(text_b, "Hola Luis")
+        self.assertIn(b"&lt;&lt;Nombre&gt;&gt;", etree.tostring(cached_xml))
+
+    def test_story_parts_are_discovered_from_relationships(self):
+        doc = Document()
+        doc.sections[0].header.paragraphs[0].text = "Cabecera <<Nombre>>"
+        doc.sections[0].footer.paragraphs[0].text = "Pie"
+        doc.save(self.doc_path)
+
+        template = TemplateCache().get(self.doc_path)
+
+        self.assertEqual(
+            sorted(template.story_trees),
+            sorted(name for name in template.parts if name.startswith(("word/header", "word/footer")))
+        )
+        self.assertTrue(template.story_trees)
+
+        rels = (
+            b'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            b'<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" Target="header7.xml"/>'
+            b'<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/footnotes" Target="/word/footnotes.xml"/>'
+            b'<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+            b'</Relationships>'
+        )
+        self.assertEqual(find_story_parts(rels), ["word/header7.xml", "word/footnotes.xml"])
+        self.assertEqual(find_story_parts(None), [])
+
+
+class BlockFragmentCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.conditions_dir = Path(self.tmp_dir.name) / "condiciones"
+        self.conditions_dir.mkdir()
+        for name in ("a", "b", "c"):
+            doc = Document()
+            doc.add_paragraph(f"Bloque {name}")
+            doc.save(self.conditions_dir / f"{name}.docx")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fragments_are_parsed_once_without_section_properties(self):
+        cache = BlockFragmentCache()
+        block = cache.get(self.conditions_dir / "a.docx")
+
+        self.assertIs(block, cache.get(self.conditions_dir / "a.docx"))
+        xml = b"".join(etree.tostring(fragment) for fragment in block.fragments)
+        self.assertIn(b"Bloque a", xml)
+
+        copies = block.new_fragments()
+        self.assertIsNot(copies[0], block.fragments[0])
+        for fragment in copies:
+            self.assertEqual(fragment.findall(".//{*}pPr/{*}sectPr"), [])
+
+    def test_cache_is_bounded_and_warmed_from_config(self):
+        cache = BlockFragmentCache(max_entries=2)
+        cfg_cond = {"conditions": [
+            {"id": name, "marker": f"<<{name}>>", "word_file": f"condiciones/{name}.docx"}
+            for name in ("a", "b", "c", "inexistente")
+        ]}
+
+        loaded = cache.warm_from_config(cfg_cond, Path(self.tmp_dir.name) / "config")
+
+        self.assertEqual(loaded, 3)
+        self.assertEqual(len(cache._entries), 2)
+        self.assertNotIn(str((self.conditions_dir / "a.docx").resolve()), cache._entries)
+        self.assertIsNone(cache.get(self.conditions_dir / "inexistente.docx"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,8 +3,10 @@ from io import BytesIO
 from pathlib import Path
 import tempfile
 import unittest
+import zipfile
 
 from docx import Document
+from lxml import etree
 
 APP_DIR = Path(__file__).resolve().parents[1] / "app"
 if str(APP_DIR) not in sys.path:
@@ -36,7 +38,6 @@ class XMLWordEngineAdapterTests(unittest.TestCase):
             })
             engine.clean_unused_markers()
             result_bytes = engine.get_document_bytes()
-            engine.__del__()
 
             result_doc = Document(BytesIO(result_bytes))
             full_text = "\n".join(p.text for p in result_doc.paragraphs)
@@ -46,6 +47,99 @@ class XMLWordEngineAdapterTests(unittest.TestCase):
         finally:
             tmp_dir.cleanup()
 
+    def test_replace_variables_handles_several_markers_in_one_paragraph(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            para = doc.add_paragraph()
+            para.add_run("<<Nombre>> (<<Nom")
+            para.add_run("bre corto>>) - ejercicio <<Ejer")
+            para.add_run("cicio>> y <<Nombre>>.")
+            doc.save(doc_path)
+
+            engine = XMLWordEngineAdapter(doc_path)
+            engine.replace_variables({
+                "<<Nombre>>": "ACME S.L.",
+                "<<Nombre corto>>": "ACME",
+                "<<Ejercicio>>": "2023",
+                "<<Vacío>>": "",
+            })
+            result_bytes = engine.get_document_bytes()
+
+            result_doc = Document(BytesIO(result_bytes))
+            runs = [run.text for run in result_doc.paragraphs[0].runs]
+
+            self.assertEqual(
+                "".join(runs),
+                "ACME S.L. (ACME) - ejercicio 2023 y ACME S.L.."
+            )
+            # Los reemplazos se aplican sobre los runs existentes
+            self.assertEqual(runs[0], "ACME S.L. (ACME")
+            self.assertEqual(runs[1], ") - ejercicio 2023")
+        finally:
+            tmp_dir.cleanup()
+
+    def test_marker_index_tracks_inserted_conditional_blocks(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            doc.add_paragraph("Introducción")
+            doc.add_paragraph("<<Bloque condicional>>")
+            doc.add_paragraph("Conclusión")
+            doc.save(doc_path)
+
+            conditions_dir = Path(tmp_dir.name) / "condiciones"
+            conditions_dir.mkdir()
+            block = Document()
+            block.add_paragraph("Texto del bloque")
+            block.add_paragraph("<<Tabla del bloque>>")
+            block.save(conditions_dir / "bloque.docx")
+
+            engine = XMLWordEngineAdapter(doc_path)
+            engine.insert_conditional_blocks(
+                [{"marker": "<<Bloque condicional>>", "file": "condiciones/bloque.docx"}],
+                Path(tmp_dir.name) / "config"
+            )
+            self.assertNotIn("<<Bloque condicional>>", engine._marker_index)
+            self.assertIn("<<Tabla del bloque>>", engine._marker_index)
+
+            engine.insert_tables({
+                "<<Tabla del bloque>>": {
+                    "columns": [{"id": "a", "header": "A"}],
+                    "rows": [{"a": "valor"}],
+                }
+            }, {})
+            self.assertNotIn("<<Tabla del bloque>>", engine._marker_index)
+            result_bytes = engine.get_document_bytes()
+
+            result_doc = Document(BytesIO(result_bytes))
+            self.assertEqual(len(result_doc.tables), 1)
+            self.assertEqual(result_doc.tables[0].cell(1, 0).text, "valor")
+            texts = [p.text for p in result_doc.paragraphs]
+            self.assertIn("Texto del bloque", texts)
+            self.assertLess(texts.index("Introducción"), texts.index("Texto del bloque"))
+        finally:
+            tmp_dir.cleanup()
+
+    def test_clean_unused_markers_removes_markers_outside_the_index(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            doc.add_paragraph("Texto <<a<b>> fijo")
+            doc.add_paragraph("<<x<y>>")
+            table = doc.add_table(rows=1, cols=1)
+            table.cell(0, 0).text = "Celda <<c<d>>"
+            doc.save(doc_path)
+
+            engine = XMLWordEngineAdapter(doc_path)
+            engine.clean_unused_markers()
+            result_doc = Document(BytesIO(engine.get_document_bytes()))
+
+            self.assertEqual([p.text for p in result_doc.paragraphs], ["Texto  fijo"])
+            self.assertEqual(result_doc.tables[0].cell(0, 0).text, "Celda ")
+        finally:
+            tmp_dir.cleanup()
+
     def test_process_table_of_contents_removes_missing_entries(self):
         tmp_dir, doc_path = self._create_temp_doc()
         try:
@@ -62,7 +156,6 @@ class XMLWordEngineAdapterTests(unittest.TestCase):
             engine.process_table_of_contents()
             engine.clean_unused_markers()
             result_bytes = engine.get_document_bytes()
-            engine.__del__()
 
             result_doc = Document(BytesIO(result_bytes))
             paragraphs = [p.text for p in result_doc.paragraphs if p.text.strip()]
@@ -81,6 +174,215 @@ class XMLWordEngineAdapterTests(unittest.TestCase):
         finally:
             tmp_dir.cleanup()
 
+    def test_process_table_of_contents_numbers_pages_in_order(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            doc.add_paragraph("Índice <<Indice>>")
+            doc.add_paragraph("Uno <<1>>")
+            doc.add_paragraph("Dos <<2>>")
+            doc.add_paragraph("Tres <<3>>")
+            doc.add_paragraph("<<fin Indice>>")
+            doc.add_paragraph("<<1>> Uno")
+            doc.add_paragraph("Contenido")
+            doc.add_paragraph("<<2>> Dos")
+            doc.add_paragraph("Contenido")
+            doc.add_paragraph("<<3>> Tres")
+            doc.save(doc_path)
+
+            engine = XMLWordEngineAdapter(doc_path)
+            engine.process_table_of_contents()
+            engine.clean_unused_markers()
+            result_doc = Document(BytesIO(engine.get_document_bytes()))
+
+            entries = [p.text for p in result_doc.paragraphs if ". " in p.text]
+            self.assertEqual(
+                [(text.split()[0], text.split()[-1]) for text in entries],
+                [("Uno", "2"), ("Dos", "3"), ("Tres", "4")]
+            )
+        finally:
+            tmp_dir.cleanup()
+
+    def test_paragraph_view_is_invalidated_on_mutation(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            doc.add_paragraph("Hola <<Nombre>>")
+            doc.save(doc_path)
+
+            engine = XMLWordEngineAdapter(doc_path)
+            para = next(engine.root.iter(f"{{{engine.w_ns}}}p"))
+
+            view = engine._paragraph_view(para)
+            self.assertIs(engine._paragraph_view(para), view)
+            self.assertFalse(engine._has_page_break_xml(para))
+
+            engine.replace_variables({"<<Nombre>>": "Ana"})
+            self.assertEqual(engine._get_paragraph_text(para), "Hola Ana")
+
+            engine._insert_page_break_at_end_of_paragraph(para)
+            self.assertTrue(engine._has_page_break_xml(para))
+            self.assertIsNot(engine._paragraph_view(para), view)
+        finally:
+            tmp_dir.cleanup()
+
+    def test_clean_document_matches_separate_cleanup_passes(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            doc.add_paragraph("Hola <<Nombre>> mundo")
+            doc.add_paragraph("1. <<Sin valor>>")
+            doc.add_paragraph("")
+            doc.add_paragraph("\u00A0")
+            doc.add_paragraph("Texto fijo")
+            table = doc.add_table(rows=1, cols=2)
+            table.cell(0, 0).text = "<<Celda>>"
+            table.cell(0, 1).text = "Dato"
+            doc.save(doc_path)
+
+            separate = XMLWordEngineAdapter(doc_path)
+            separate.clean_unused_markers()
+            separate.clean_empty_paragraphs()
+
+            fused = XMLWordEngineAdapter(doc_path)
+            fused.clean_document()
+
+            fused_bytes = fused.get_document_bytes()
+            self.assertEqual(
+                zipfile.ZipFile(BytesIO(fused_bytes)).read("word/document.xml"),
+                zipfile.ZipFile(BytesIO(separate.get_document_bytes())).read("word/document.xml")
+            )
+            result_doc = Document(BytesIO(fused_bytes))
+            self.assertEqual([p.text for p in result_doc.paragraphs], ["Hola  mundo", "\u00A0", "Texto fijo"])
+            self.assertEqual(result_doc.tables[0].cell(0, 0).text, "")
+        finally:
+            tmp_dir.cleanup()
+
+    def test_headers_and_footers_are_processed_in_memory(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            doc.add_paragraph("Cuerpo <<Nombre>>")
+            doc.sections[0].header.paragraphs[0].text = "Cabecera <<Nombre>>"
+            doc.sections[0].footer.paragraphs[0].text = "Pie <<Sin valor>>"
+            doc.save(doc_path)
+
+            engine = XMLWordEngineAdapter(doc_path)
+            engine.replace_variables({"<<Nombre>>": "Ana"})
+            engine.clean_document()
+
+            result_doc = Document(BytesIO(engine.get_document_bytes()))
+            section = result_doc.sections[0]
+
+            self.assertEqual(result_doc.paragraphs[0].text, "Cuerpo Ana")
+            self.assertEqual(section.header.paragraphs[0].text, "Cabecera Ana")
+            self.assertEqual(section.footer.paragraphs[0].text, "Pie ")
+            # El índice de marcadores solo cubre el cuerpo del documento
+            self.assertIsNone(engine._find_paragraph_with_marker("<<Sin valor>>"))
+        finally:
+            tmp_dir.cleanup()
+
+    def test_table_rows_are_cloned_from_prototypes(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            doc.add_paragraph("<<Tabla>>")
+            doc.save(doc_path)
+
+            engine = XMLWordEngineAdapter(doc_path)
+            table_data = {
+                "columns": [{"id": "a", "header": "A"}, {"id": "b", "header": "B", "type": "number"}],
+                "rows": [{"a": "uno", "b": 1}, {"a": "dos", "b": 2500}],
+                "footer_rows": [{"a": "Total", "b": 2501}],
+            }
+            first = engine._create_table_xml(table_data)
+            second = engine._create_table_xml(table_data)
+
+            w = f"{{{engine.w_ns}}}"
+            texts = [[t.text for t in tr.iter(f"{w}t")] for tr in first.iter(f"{w}tr")]
+            self.assertEqual(texts, [["A", "B"], ["uno", "1.00"], ["dos", "2,500.00"], ["Total", "2,501.00"]])
+            self.assertEqual(etree.tostring(first), etree.tostring(second))
+
+            # Cabecera con sombreado, pie en negrita y prototipos sin texto
+            rows = first.findall(f"{w}tr")
+            self.assertIsNotNone(rows[0].find(f".//{w}shd"))
+            self.assertIsNone(rows[1].find(f".//{w}b"))
+            self.assertIsNotNone(rows[-1].find(f".//{w}b"))
+            prototype = engine._table_prototype(table_data)
+            self.assertIs(engine._table_prototype(table_data), prototype)
+            self.assertEqual([t.text for t in prototype.data_row.iter(f"{w}t")], ["", ""])
+            # Cada table_id tiene su propio prototipo
+            self.assertIsNot(engine._table_prototype({**table_data, "table_id": "otra"}), prototype)
+        finally:
+            tmp_dir.cleanup()
+
+    def test_insert_tables_locates_all_markers_in_one_pass(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            doc.add_paragraph("<<Tabla 1>>")
+            doc.add_paragraph("Texto intermedio")
+            doc.add_paragraph("<<Tabla 2>>")
+            doc.save(doc_path)
+
+            def table(value):
+                return {"columns": [{"id": "a", "header": "A"}], "rows": [{"a": value}]}
+
+            engine = XMLWordEngineAdapter(doc_path)
+            engine.insert_tables({
+                "<<Tabla 2>>": table("dos"),
+                "<<Tabla 1>>": table("<<Tabla 3>>"),
+                "<<Tabla 3>>": table("tres"),
+            }, {})
+
+            w = f"{{{engine.w_ns}}}"
+            body = engine.root.find(f"{w}body")
+            tables = body.findall(f"{w}tbl")
+            self.assertEqual([body.index(tbl) for tbl in tables], [1, 5])
+            self.assertEqual(body[3].find(f".//{w}t").text, "Texto intermedio")
+            self.assertEqual("".join(tables[1].itertext()), "Ados")
+
+            # El marcador que solo existe en una tabla insertada también se resuelve
+            nested = tables[0].findall(f".//{w}tbl")
+            self.assertEqual(len(nested), 1)
+            self.assertEqual("".join(nested[0].itertext()), "Atres")
+            self.assertEqual(engine._marker_index.get("<<Tabla 3>>"), None)
+        finally:
+            tmp_dir.cleanup()
+
+    def test_metrics_record_public_methods_once(self):
+        tmp_dir, doc_path = self._create_temp_doc()
+        try:
+            doc = Document()
+            doc.add_paragraph("Hola <<Nombre>>")
+            doc.add_paragraph("<<Sin valor>>")
+            doc.add_paragraph("Texto fijo")
+            doc.save(doc_path)
+
+            engine = XMLWordEngineAdapter(doc_path)
+            engine.replace_variables({"<<Nombre>>": "Ana"})
+            engine.clean_unused_markers()
+            engine.get_document_bytes()
+
+            rows = {row["method"]: row for row in engine.metrics.report()}
+
+            self.assertEqual(
+                list(rows),
+                ["_build_marker_index", "replace_variables", "clean_unused_markers", "get_document_bytes"]
+            )
+            self.assertEqual(rows["replace_variables"]["calls"], 1)
+            # El índice ya leyó los tres párrafos: solo se relee el modificado
+            self.assertEqual(rows["_build_marker_index"]["paragraphs_scanned"], 3)
+            self.assertEqual(rows["replace_variables"]["paragraphs_scanned"], 1)
+            self.assertEqual(rows["replace_variables"]["nodes_touched"], 1)
+            # El párrafo que solo tenía el marcador se elimina
+            self.assertEqual(rows["clean_unused_markers"]["nodes_touched"], 1)
+            self.assertGreater(rows["get_document_bytes"]["seconds"], 0)
+            self.assertEqual(engine.metrics.totals()["calls"], 4)
+            self.assertIn("replace_variables", engine.metrics.format_table())
+        finally:
+            tmp_dir.cleanup()
+
 
 if __name__ == "__main__":
     unittest.main()